@@ -1,14 +1,20 @@
 import re
 import json
-import pdfplumber
+import sys
+from pathlib import Path
+
+# Texte des pages via le cache partagé avec les scripts py/pokedex (pdf_text_cache.sqlite)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "pokedex"))
+from pdf_engines import pdfplumber_pages  # noqa: E402
+from pdf_text_cache import PageTextCache  # noqa: E402
 
 def extraire_abilities(pdf_path):
     abilities = []
 
-    with pdfplumber.open(pdf_path) as pdf:
+    with PageTextCache() as cache:
         texte_total = ""
-        for page in pdf.pages:
-            texte_total += page.extract_text() + "\n"
+        for texte in pdfplumber_pages(pdf_path, cache=cache):
+            texte_total += texte + "\n"
 
     # Séparer par bloc commençant par "Ability:"
     blocs = re.split(r'(?=Ability\s*:)', texte_total, flags=re.IGNORECASE)
@@ -4,12 +4,22 @@ Script to fetch legendary/mythical Pokémon from PokéAPI and add "Legendary": t
 to the corresponding entries in PTU data pokedex files.
 """
 
-import json
+import argparse
+import asyncio
 import csv
-import urllib.request
-import urllib.error
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, List, Set, Tuple
+
+# Shared PokeAPI client, HTTP cache and offline dump (py/pokeapi)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "pokeapi"))
+from pokeapi_cache import add_cache_args, cache_from_args  # noqa: E402
+from pokeapi_client import ClientConfig, PokeApiClient, add_throttle_args, throttle_kwargs  # noqa: E402
+from pokeapi_dump import add_dump_args, dump_from_args  # noqa: E402
+from pokeapi_metrics import add_metrics_args, metrics_from_args  # noqa: E402
 
 # Configuration
 POKEAPI_BASE_URL = "https://pokeapi.co/api/v2"
@@ -19,69 +29,54 @@ POKEDEX_DIRS = [
     Path("ptu/data/pokedex/community"),
     Path("ptu/data/pokedex/homebrew"),
 ]
+USER_AGENT = "PTU-Data-Tagger/1.0 (+https://github.com/Sewef/PTU-Data)"
 
-def load_mapping() -> Dict[str, str]:
+def load_mapping(path: Path = MAPPING_FILE) -> Dict[str, str]:
     """Load the species name mapping from CSV."""
     mapping = {}
-    with open(MAPPING_FILE, 'r', encoding='utf-8') as f:
+    with open(path, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
             mapping[row['species']] = row['othername']
     return mapping
 
-def fetch_url(url: str) -> dict:
-    """Fetch JSON from URL with proper User-Agent."""
-    request = urllib.request.Request(
-        url,
-        headers={'User-Agent': 'PTU-Data-Tagger/1.0 (+https://github.com/Sewef/PTU-Data)'}
-    )
-    with urllib.request.urlopen(request) as response:
-        return json.loads(response.read().decode('utf-8'))
+async def fetch_species_flags(cfg: ClientConfig) -> Dict[str, Dict[str, bool]]:
+    """
+    is_legendary / is_mythical for every species in one pass:
+    one SQL query with --dump-db, otherwise the full species list then all species concurrently
+    (served from the shared HTTP cache on later runs).
+    """
+    if cfg.dump is not None:
+        return cfg.dump.species_flags()
+    async with PokeApiClient(cfg) as client:
+        listing = await client.get_json("pokemon-species/?limit=100000")
+        names = [r['name'] for r in listing.get('results', [])]
+        print(f"  {len(names)} species to check...")
+        details = await asyncio.gather(*(client.get_json_or_none(f"pokemon-species/{n}/") for n in names))
+    flags = {}
+    for name, data in zip(names, details):
+        if data is None:
+            print(f"    Warning: Could not fetch {name}")
+            continue
+        flags[name] = {"is_legendary": bool(data.get('is_legendary')), "is_mythical": bool(data.get('is_mythical'))}
+    return flags
 
-def fetch_legendary_pokemon() -> Set[str]:
+def fetch_legendary_pokemon(cfg: ClientConfig) -> Set[str]:
     """Fetch all legendary/mythical Pokémon from PokéAPI."""
-    legendary = set()
-    mythical = set()
-    
     print("Fetching legendary Pokémon list from PokéAPI...")
-    
     try:
-        # Get legendary Pokémon
-        url = f"{POKEAPI_BASE_URL}/pokemon-species/"
-        page_count = 0
-        while url:
-            page_count += 1
-            print(f"  Fetching page {page_count}...")
-            data = fetch_url(url)
-            
-            for species in data.get('results', []):
-                # Fetch species details to check if legendary/mythical
-                species_url = species['url']
-                try:
-                    species_data = fetch_url(species_url)
-                    
-                    if species_data.get('is_legendary'):
-                        legendary.add(species['name'])
-                        print(f"    Found legendary: {species['name']}")
-                    elif species_data.get('is_mythical'):
-                        mythical.add(species['name'])
-                        print(f"    Found mythical: {species['name']}")
-                except (urllib.error.URLError, json.JSONDecodeError) as e:
-                    print(f"    Warning: Could not fetch {species['name']}: {e}")
-            
-            # Next page
-            url = data.get('next')
-    
-    except (urllib.error.URLError, json.JSONDecodeError) as e:
+        flags = asyncio.run(fetch_species_flags(cfg))
+    except Exception as e:
         print(f"Error fetching from PokéAPI: {e}")
         return set()
-    
+
+    legendary = {n for n, f in flags.items() if f['is_legendary']}
+    mythical = {n for n, f in flags.items() if f['is_mythical'] and not f['is_legendary']}
+    print(f"  Found {len(legendary)} legendary and {len(mythical)} mythical species")
     return legendary | mythical
 
-def get_legendary_set_with_mapping(mapping: Dict[str, str]) -> Set[str]:
-    """Get legendary Pokémon set, using mapping to match PTU species names."""
-    pokeapi_legendary = fetch_legendary_pokemon()
-    
+def get_legendary_set_with_mapping(mapping: Dict[str, str], pokeapi_legendary: Set[str]) -> Set[str]:
+    """Map the PokéAPI legendary set to PTU species names."""    
     # Create a reverse mapping: pokeapi_name -> ptu_species_name
     reverse_mapping = {v: k for k, v in mapping.items()}
     
@@ -112,72 +107,99 @@ def get_legendary_set_with_mapping(mapping: Dict[str, str]) -> Set[str]:
     
     return ptu_legendary
 
-def process_pokedex_file(filepath: Path, legendary_set: Set[str]) -> int:
+def process_pokedex_file(filepath: Path, legendary_set: Set[str]) -> Tuple[int, List[str]]:
     """
-    Add "Legendary": true to entries in a pokedex file.
-    Returns the number of entries updated.
+    Add "Legendary": true to entries in a pokedex file (runs in a worker process).
+    Returns the number of entries actually changed and the log lines; the file is rewritten only if > 0.
     """
+    log: List[str] = []
     with open(filepath, 'r', encoding='utf-8') as f:
         data = json.load(f)
-    
+
     if not isinstance(data, list):
-        print(f"Warning: {filepath} is not a JSON array, skipping")
-        return 0
-    
+        return 0, [f"Warning: {filepath} is not a JSON array, skipping"]
+
     updated = 0
     for entry in data:
         if isinstance(entry, dict) and 'Species' in entry:
             species_name = entry['Species']
-            if species_name in legendary_set:
+            if species_name in legendary_set and entry.get('Legendary') is not True:
                 entry['Legendary'] = True
                 updated += 1
-                print(f"  Tagged {species_name} as Legendary in {filepath.name}")
-    
+                log.append(f"  Tagged {species_name} as Legendary in {filepath.name}")
+
     # Write back only if changes were made
     if updated > 0:
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
-        print(f"  Saved {filepath.name} with {updated} updates")
-    
-    return updated
+        log.append(f"  Saved {filepath.name} with {updated} updates")
+
+    return updated, log
+
+def pokedex_files(dirs: List[Path]) -> List[Path]:
+    files = []
+    for pokedex_dir in dirs:
+        if not pokedex_dir.exists():
+            print(f"Directory not found: {pokedex_dir}")
+            continue
+        # Skip minified files for now
+        files += [p for p in sorted(pokedex_dir.glob("pokedex_*.json")) if not p.name.endswith(".min.json")]
+    return files
 
 def main():
+    ap = argparse.ArgumentParser(description="Tag legendary/mythical species (PokéAPI) in the PTU pokedex files.")
+    ap.add_argument("--mapping", default=str(MAPPING_FILE), help=f"species,othername mapping (default: {MAPPING_FILE})")
+    ap.add_argument("--dirs", nargs="+", default=[str(d) for d in POKEDEX_DIRS], help="Pokedex folders to tag")
+    ap.add_argument("--concurrency", type=int, default=32, help="Max concurrent PokéAPI requests (default: 32)")
+    ap.add_argument("--workers", type=int, default=0, help="Processes tagging files in parallel (default: 0 = all cores)")
+    ap.add_argument("--base-url", default=POKEAPI_BASE_URL, help="PokéAPI base URL (default: official)")
+    add_throttle_args(ap)
+    add_metrics_args(ap)
+    add_cache_args(ap)
+    add_dump_args(ap)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
     print("=" * 60)
     print("PTU Legendary Pokémon Tagger")
     print("=" * 60)
-    
+
     # Load mapping
     print("\nLoading species mapping...")
-    mapping = load_mapping()
+    mapping = load_mapping(Path(args.mapping))
     print(f"Loaded {len(mapping)} species mappings")
-    
+
     # Fetch legendary Pokémon from PokéAPI
-    legendary_set = get_legendary_set_with_mapping(mapping)
+    cfg = ClientConfig(
+        base_url=args.base_url,
+        max_concurrency=max(1, args.concurrency),
+        user_agent=USER_AGENT,
+        cache=cache_from_args(args),
+        dump=dump_from_args(args),
+        metrics=metrics_from_args(args),
+        **throttle_kwargs(args),
+    )
+    legendary_set = get_legendary_set_with_mapping(mapping, fetch_legendary_pokemon(cfg))
     print(f"\nFound {len(legendary_set)} legendary/mythical Pokémon in PTU data")
-    
-    # Process all pokedex files
+
+    # Process all pokedex files, in parallel
     print("\n" + "=" * 60)
     print("Processing pokedex files...")
     print("=" * 60)
-    
+
+    files = pokedex_files([Path(d) for d in args.dirs])
     total_updated = 0
-    for pokedex_dir in POKEDEX_DIRS:
-        if not pokedex_dir.exists():
-            print(f"Directory not found: {pokedex_dir}")
-            continue
-        
-        print(f"\nProcessing {pokedex_dir}...")
-        
-        # Process both regular and minified files
-        for json_file in sorted(pokedex_dir.glob("pokedex_*.json")):
-            if json_file.name.endswith(".min.json"):
-                continue  # Skip minified files for now
-            
-            updated = process_pokedex_file(json_file, legendary_set)
+    changed_files = 0
+    with ProcessPoolExecutor(max_workers=args.workers or None) as ex:
+        results = ex.map(process_pokedex_file, files, [legendary_set] * len(files))
+        for json_file, (updated, log) in zip(files, results):
+            for line in log:
+                print(line)
             total_updated += updated
-    
+            changed_files += 1 if updated else 0
+
     print("\n" + "=" * 60)
-    print(f"Total entries updated: {total_updated}")
+    print(f"Total entries updated: {total_updated} ({changed_files}/{len(files)} files rewritten) in {time.perf_counter() - t0:.1f}s")
     print("=" * 60)
 
 if __name__ == "__main__":
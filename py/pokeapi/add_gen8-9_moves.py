@@ -10,7 +10,8 @@ Règles:
 - lvl == 0  -> Level "Evo" (Level Up Move List).
 - lvl == 1 ET Stade d'évolution > 1 -> ajouter dans TM/Tutor Moves List (pas en level-up)
   avec le tag "N" en plus de "Deleted".
-- Type & damage class (physical/special/status) récupérés via PokeAPI (/api/v2/move/{move}).
+- Type & damage class (physical/special/status) lus dans l'index des moves (pokeapi_moves.idx),
+  à défaut récupérés via PokeAPI (/api/v2/move/{move}).
 - Si damage class != status ET move.type ∈ {types du Pokémon} -> ajouter tag "Stab".
 - Pas de doublon si le move est déjà présent dans la fiche.
 
@@ -36,11 +37,11 @@ import argparse
 import csv
 import json
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
-import requests
+from pokeapi_client import ClientConfig, fetch_many_sync
+from pokeapi_moves import MoveIndex, add_move_index_args, move_index_from_args
 
 POKEAPI_MOVE_BASE = "https://pokeapi.co/api/v2/move/"
 TIMEOUT = 30
@@ -153,41 +154,39 @@ def load_removed(path: Path) -> List[dict]:
 # Accès PokeAPI (moves)
 # ----------------------------
 
-def fetch_move_info(move_api_name: str) -> Optional[Tuple[str, str]]:
+def move_info_from_payload(j: Optional[dict]) -> Optional[Tuple[str, str]]:
     """
     Retourne (type_name, damage_class) en minuscules pour le move,
     ex: ('fire', 'special') ; None si non trouvé.
     """
-    url = f"{POKEAPI_MOVE_BASE}{move_api_name}"
-    try:
-        resp = requests.get(url, timeout=TIMEOUT)
-        if resp.status_code == 404:
-            return None
-        resp.raise_for_status()
-        j = resp.json()
-        mtype = (j.get("type", {}) or {}).get("name")
-        dmgc = (j.get("damage_class", {}) or {}).get("name")
-        if mtype and dmgc:
-            return mtype.lower(), dmgc.lower()
+    if not j:
         return None
-    except Exception:
-        return None
-
-def fetch_moves_info_parallel(move_names: List[str], workers: int = 12) -> Dict[str, Optional[Tuple[str, str]]]:
+    mtype = (j.get("type", {}) or {}).get("name")
+    dmgc = (j.get("damage_class", {}) or {}).get("name")
+    if mtype and dmgc:
+        return mtype.lower(), dmgc.lower()
+    return None
+
+def fetch_moves_info_parallel(move_names: List[str], workers: int = 12,
+                              index: Optional[MoveIndex] = None) -> Dict[str, Optional[Tuple[str, str]]]:
     """
     move_names: liste de noms PokeAPI ('flame-burst')
     Retourne dict move_api -> (type, damage_class) ou None.
+    Les moves présents dans l'index sont résolus localement ; les autres par requêtes
+    concurrentes via le client partagé (au plus `workers` simultanées).
     """
     unique = sorted(set(move_names))
     out: Dict[str, Optional[Tuple[str, str]]] = {}
-    with ThreadPoolExecutor(max_workers=workers) as ex:
-        futs = {ex.submit(fetch_move_info, m): m for m in unique}
-        for fut in as_completed(futs):
-            m = futs[fut]
-            try:
-                out[m] = fut.result()
-            except Exception:
-                out[m] = None
+    for m in unique:
+        info = index.get(m) if index is not None else None
+        if info is not None:
+            out[m] = move_info_from_payload(info.payload())
+    todo = [m for m in unique if m not in out]
+    if todo:
+        cfg = ClientConfig(timeout=TIMEOUT, max_concurrency=max(1, workers))
+        payloads = fetch_many_sync([f"{POKEAPI_MOVE_BASE}{m}" for m in todo], cfg)
+        for m in todo:
+            out[m] = move_info_from_payload(payloads.get(f"{POKEAPI_MOVE_BASE}{m}"))
     return out
 
 # ----------------------------
@@ -253,6 +252,7 @@ def main():
     ap.add_argument("--out", default="pokedex_patched.json", help="fichier json de sortie")
     ap.add_argument("--report", default=None, help="csv rapport des insertions (optionnel)")
     ap.add_argument("--workers", type=int, default=12, help="concurrence pour PokeAPI (défaut: 12)")
+    add_move_index_args(ap)
     args = ap.parse_args()
 
     pokedex_path = Path(args.pokedex)
@@ -273,7 +273,7 @@ def main():
 
     # Préparer la liste des moves à requêter (PokeAPI)
     all_moves_api = [r["move_api"] for r in removed_rows]
-    move_meta = fetch_moves_info_parallel(all_moves_api, workers=args.workers)
+    move_meta = fetch_moves_info_parallel(all_moves_api, workers=args.workers, index=move_index_from_args(args))
 
     # Rapport des ajouts
     report_rows: List[dict] = []
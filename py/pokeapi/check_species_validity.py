@@ -5,11 +5,13 @@
 check_species_validity_async.py
 -------------------------------
 Valide rapidement une liste d'espèces depuis un CSV contre PokeAPI (/pokemon/{name}).
-- Asynchrone avec aiohttp, concurrence réglable
-- Retries + backoff, support 429 Retry-After
+- Asynchrone via le client partagé pokeapi_client (concurrence adaptative, token bucket)
+- Retries + backoff avec jitter, support 429 Retry-After
 - Lecture par nom de colonne (--header) ou index (--column)
 - Normalisation simple en "slug" (minuscules, espaces -> -, apostrophes retirées) activable/désactivable
 - Sortie d'une liste d'espèces invalides (--out) et/ou rapport détaillé (--report)
+- Avec l'index local des noms (pokeapi_names.json) : validation sans réseau, et le rapport
+  propose pour chaque espèce invalide la meilleure correspondance avec son score
 """
 
 from __future__ import annotations
@@ -18,15 +20,14 @@ import argparse
 import asyncio
 import csv
 import sys
+import time
 import unicodedata
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
-try:
-    import aiohttp
-except ImportError:
-    print("Ce script requiert le paquet 'aiohttp' (pip install aiohttp).", file=sys.stderr)
-    sys.exit(1)
+from pokeapi_client import ClientConfig, PokeApiClient, RetryPolicy, add_throttle_args, throttle_kwargs
+from pokeapi_metrics import add_metrics_args, metrics_from_args
+from pokeapi_names import NameIndex, add_name_index_args, name_index_from_args
 
 POKEAPI = "https://pokeapi.co/api/v2/pokemon"
 
@@ -40,16 +41,6 @@ class Config:
     user_agent: str = "check-species-validity/1.0 (+https://pokeapi.co)"
 
 
-class Limiter:
-    def __init__(self, n: int):
-        self.sem = asyncio.Semaphore(max(1, n))
-    async def __aenter__(self):
-        await self.sem.acquire()
-        return self
-    async def __aexit__(self, exc_type, exc, tb):
-        self.sem.release()
-
-
 def simple_slug(s: str) -> str:
     s = s.strip().lower()
     s = unicodedata.normalize("NFKD", s)
@@ -65,41 +56,28 @@ def simple_slug(s: str) -> str:
     return s.strip("-")
 
 
-async def fetch_status(session: aiohttp.ClientSession, url: str, cfg: Config) -> Tuple[int, Optional[str]]:
-    last_err = None
-    for attempt in range(cfg.retries + 1):
-        try:
-            async with session.get(url, timeout=cfg.timeout) as resp:
-                if resp.status == 200:
-                    return 200, None
-                if resp.status in (429, 500, 502, 503, 504):
-                    retry_after = resp.headers.get("Retry-After")
-                    if retry_after:
-                        try:
-                            delay = float(retry_after)
-                        except ValueError:
-                            delay = cfg.backoff * (2 ** attempt)
-                    else:
-                        delay = cfg.backoff * (2 ** attempt)
-                    await asyncio.sleep(delay)
-                    continue
-                text = await resp.text()
-                return resp.status, text[:200]
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            last_err = str(e)
-            await asyncio.sleep(cfg.backoff * (2 ** attempt))
-    return 0, last_err or "network error"
-
-
-async def validate_one(session: aiohttp.ClientSession, name: str, normalized: bool, cfg: Config, limiter: Limiter) -> Tuple[str, str, int, bool]:
+async def validate_one(client: PokeApiClient, name: str, normalized: bool) -> Tuple[str, str, int, bool]:
     q = simple_slug(name) if normalized else name.strip()
     url = f"{POKEAPI}/{q}/"
-    async with limiter:
-        status, _ = await fetch_status(session, url, cfg)
+    status, _ = await client.get_status(url)
     ok = (status == 200)
     return name, q, status, ok
 
 
+def validate_locally(index: NameIndex, species: List[str], normalized: bool) -> List[Tuple[str, str, int, bool, str, str]]:
+    """Même verdict qu'un GET /pokemon/{q}/ (200 ou 404), plus une suggestion pour les invalides."""
+    t0 = time.perf_counter()
+    out = []
+    for name in species:
+        q = simple_slug(name) if normalized else name.strip()
+        ok = q in index
+        best = None if ok else index.best(name)
+        out.append((name, q, 200 if ok else 404, ok,
+                    best.name if best else "", f"{best.score:.3f}" if best else ""))
+    print(f"[info] Validation locale en {(time.perf_counter() - t0) * 1000:.0f} ms", file=sys.stderr)
+    return out
+
+
 def read_species_from_csv(path: str, header: Optional[str], column: Optional[int]) -> List[str]:
     vals: List[str] = []
     with open(path, "r", encoding="utf-8", newline="") as f:
@@ -132,12 +110,28 @@ async def main_async(args) -> None:
         print("[warn] Aucune espèce trouvée dans le CSV.", file=sys.stderr)
         return
 
-    async with aiohttp.ClientSession(headers={"User-Agent": cfg.user_agent}) as session:
-        limiter = Limiter(cfg.concurrency)
-        tasks = [asyncio.create_task(validate_one(session, sp, not args.no_normalize, cfg, limiter)) for sp in species]
+    index = name_index_from_args(args)
+    if index is not None:
+        write_results(args, validate_locally(index, species, not args.no_normalize))
+        return
+
+    client_cfg = ClientConfig(
+        timeout=cfg.timeout,
+        max_concurrency=max(1, cfg.concurrency),
+        retry=RetryPolicy(retries=cfg.retries, backoff=cfg.backoff),
+        user_agent=cfg.user_agent,
+        metrics=metrics_from_args(args),
+        **throttle_kwargs(args),
+    )
+    async with PokeApiClient(client_cfg) as client:
+        tasks = [asyncio.create_task(validate_one(client, sp, not args.no_normalize)) for sp in species]
         results = await asyncio.gather(*tasks)
 
-    invalid = [orig for (orig, norm, status, ok) in results if not ok]
+    write_results(args, [(orig, norm, status, ok, "", "") for orig, norm, status, ok in results])
+
+
+def write_results(args, results: List[Tuple[str, str, int, bool, str, str]]) -> None:
+    invalid = [orig for (orig, norm, status, ok, _, _) in results if not ok]
 
     if args.out:
         with open(args.out, "w", encoding="utf-8") as f:
@@ -152,9 +146,9 @@ async def main_async(args) -> None:
     if args.report:
         with open(args.report, "w", encoding="utf-8", newline="") as f:
             w = csv.writer(f)
-            w.writerow(["original", "normalized", "status", "ok"])
-            for orig, norm, status, ok in results:
-                w.writerow([orig, norm, status, "true" if ok else "false"])
+            w.writerow(["original", "normalized", "status", "ok", "suggestion", "score"])
+            for orig, norm, status, ok, suggestion, score in results:
+                w.writerow([orig, norm, status, "true" if ok else "false", suggestion, score])
         print(f"[ok] Rapport écrit : {args.report}", file=sys.stderr)
 
 
@@ -164,12 +158,15 @@ def parse_args():
     p.add_argument("--header", help="Nom de la colonne à lire (sinon --column).", default=None)
     p.add_argument("--column", type=int, help="Index de la colonne à lire (défaut 0 si --header non fourni).", default=None)
     p.add_argument("--out", help="Fichier de sortie listant les espèces invalides (sinon stdout).")
-    p.add_argument("--report", help="Fichier CSV pour un rapport détaillé (original, normalized, status, ok).")
+    p.add_argument("--report", help="Fichier CSV pour un rapport détaillé (original, normalized, status, ok, suggestion, score).")
     p.add_argument("--no-normalize", action="store_true", help="Ne pas normaliser les noms (par défaut on slugifie).")
     p.add_argument("--concurrency", type=int, default=32, help="Nombre de requêtes simultanées (défaut 32).")
     p.add_argument("--timeout", type=int, default=15, help="Timeout HTTP (s).")
     p.add_argument("--retries", type=int, default=3, help="Nombre de retries sur 429/5xx/erreurs réseau.")
     p.add_argument("--backoff", type=float, default=0.8, help="Backoff initial (exponentiel).")
+    add_name_index_args(p)
+    add_throttle_args(p)
+    add_metrics_args(p)
     return p.parse_args()
 
 
@@ -18,13 +18,29 @@ Exemples :
   python compare_moves.py --left-gen 8 --right-gen 9 bulbasaur squirtle
   python compare_moves.py --gen9-groups scarlet-violet --left-gen 9 --right-gen 7 eevee
   python compare_moves.py --left-groups sword-shield --right-groups scarlet-violet gengar
+
+Mode batch (toutes les espèces d'un coup, requêtes concurrentes via pokeapi_client, cache/dump compris) :
+  python compare_moves.py --mapping-csv mapping.csv --left-gen 8 --right-gen 9 --out diff_g8_g9.csv --aggregate-out agg_g8_g9.csv
+  python compare_moves.py --all --out diff_g7_g8.parquet          # tout /pokemon/ ; .parquet requiert pyarrow
+Table de sortie (une ligne par move qui diffère) :
+  species, pokemon, move, move_human, left_level, right_level, change (removed | added | level)
 """
 
 import argparse
+import asyncio
+import csv
+import sys
 import time
-from typing import Dict, List, Set, Tuple
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
 import requests
 
+from pokeapi_cache import add_cache_args, cache_from_args
+from pokeapi_client import POKEAPI, ClientConfig, NotFound, PokeApiClient, add_throttle_args, throttle_kwargs
+from pokeapi_dump import add_dump_args, dump_from_args
+from pokeapi_learnsets import level_up_moves
+from pokeapi_metrics import add_metrics_args, metrics_from_args
+
 POKEAPI_BASE = "https://pokeapi.co/api/v2/pokemon/"
 REQUEST_SLEEP = 0.2  # petite pause par requête
 
@@ -44,24 +60,6 @@ def fetch_pokemon_data(name: str) -> dict:
     time.sleep(REQUEST_SLEEP)
     return resp.json()
 
-def extract_level_up_moves(data: dict, version_groups: Set[str]) -> Dict[str, int]:
-    """Retourne {move_name: min_level_observé} pour les moves appris par level-up dans les version_groups donnés."""
-    result: Dict[str, int] = {}
-    for move_entry in data.get("moves", []):
-        move_name = move_entry["move"]["name"]
-        for vgd in move_entry.get("version_group_details", []):
-            vg_name = vgd["version_group"]["name"]
-            if vg_name not in version_groups:
-                continue
-            if vgd["move_learn_method"]["name"] != "level-up":
-                continue
-            level_learned = vgd.get("level_learned_at", 0)
-            if move_name not in result:
-                result[move_name] = level_learned
-            else:
-                result[move_name] = min(result[move_name], level_learned)
-    return result
-
 def compare_moves(left: Dict[str, int], right: Dict[str, int]):
     """
     Compare deux dicts {move: level}.
@@ -110,9 +108,160 @@ def print_report(pokemon: str, left_label: str, right_label: str,
     else:
         print("❖ Aucun niveau différent pour les moves communs.\n")
 
+# --- Mode batch -------------------------------------------------------------------
+
+DIFF_COLUMNS = ["species", "pokemon", "move", "move_human", "left_level", "right_level", "change"]
+
+
+class DiffRow(NamedTuple):
+    species: str
+    pokemon: str
+    move: str
+    move_human: str
+    left_level: Optional[int]
+    right_level: Optional[int]
+    change: str
+
+
+def diff_rows(species: str, pokemon: str, left_map: Dict[str, int], right_map: Dict[str, int]) -> List[DiffRow]:
+    onlyL, onlyR, changed = compare_moves(left_map, right_map)
+    rows = [DiffRow(species, pokemon, m, humanize_move(m), left_map[m], None, "removed") for m in sorted(onlyL)]
+    rows += [DiffRow(species, pokemon, m, humanize_move(m), None, right_map[m], "added") for m in sorted(onlyR)]
+    rows += [DiffRow(species, pokemon, m, humanize_move(m), l, r, "level") for m, (l, r) in sorted(changed.items())]
+    return rows
+
+
+def read_mapping_pairs(path: str) -> List[Tuple[str, str]]:
+    """[(species, othername)] depuis mapping.csv (séparateur ';' ou ',', lignes sans othername ignorées)."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        head = f.readline()
+        f.seek(0)
+        reader = csv.DictReader(f, delimiter=';' if ';' in head else ',')
+        field_map = {k.lower().strip(): k for k in (reader.fieldnames or [])}
+        if "species" not in field_map or "othername" not in field_map:
+            raise SystemExit(f"[err] {path} doit contenir les en-têtes species et othername")
+        pairs = []
+        for row in reader:
+            species = (row.get(field_map["species"]) or "").strip()
+            other = (row.get(field_map["othername"]) or "").strip()
+            if species and other:
+                pairs.append((species, other))
+    return pairs
+
+
+async def batch_diff(pairs: List[Tuple[str, str]], left_groups: Set[str], right_groups: Set[str],
+                     cfg: ClientConfig, list_all: bool) -> Tuple[List[DiffRow], List[str]]:
+    """Diff de toutes les paires (species, pokemon) ; chaque payload est jeté dès son diff calculé."""
+    async with PokeApiClient(cfg) as client:
+        if list_all:
+            listing = await client.get_json("pokemon?limit=100000&offset=0")
+            pairs = [(r["name"], r["name"]) for r in listing.get("results") or []]
+            print(f"[info] {len(pairs)} Pokémon listés", file=sys.stderr)
+
+        async def one(species: str, pokemon: str) -> Tuple[str, List[DiffRow]]:
+            try:
+                data = await client.get_json(f"pokemon/{pokemon.strip().lower().replace(' ', '-')}/")
+            except NotFound:
+                return f"{species} ({pokemon}): introuvable", []
+            except Exception as e:
+                return f"{species} ({pokemon}): {e}", []
+            left_map, right_map = level_up_moves(data, left_groups, right_groups)
+            return "", diff_rows(species, pokemon, left_map, right_map)
+
+        results = await asyncio.gather(*(one(sp, pk) for sp, pk in pairs))
+    rows = [r for _, rs in results for r in rs]
+    errors = [err for err, _ in results if err]
+    return rows, errors
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("[err] La sortie Parquet requiert 'pyarrow' (pip install pyarrow) ; sinon utiliser .csv")
+    return pa, pq
+
+
+def write_diff(path: str, rows: List[DiffRow]) -> None:
+    if path.endswith(".parquet"):
+        pa, pq = _pyarrow()
+        cols = {c: [getattr(r, c) for r in rows] for c in DIFF_COLUMNS}
+        table = pa.table({c: pa.array(v, type=pa.int16() if c.endswith("_level") else pa.string())
+                          for c, v in cols.items()})
+        pq.write_table(table, path)
+    else:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(DIFF_COLUMNS)
+            w.writerows(["" if v is None else v for v in r] for r in rows)
+    print(f"[ok] Diff écrit : {path} ({len(rows)} lignes)", file=sys.stderr)
+
+
+def write_aggregate(path: str, rows: List[DiffRow]) -> None:
+    counts: Dict[str, Counter] = {}
+    for r in rows:
+        counts.setdefault(r.move, Counter())[r.change] += 1
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["move", "move_human", "removed_count", "added_count", "level_changed_count"])
+        for m, c in sorted(counts.items(), key=lambda x: (-sum(x[1].values()), x[0])):
+            w.writerow([m, humanize_move(m), c["removed"], c["added"], c["level"]])
+    print(f"[ok] Agrégat écrit : {path} ({len(counts)} moves)", file=sys.stderr)
+
+
+def run_batch(args, left_groups: Set[str], right_groups: Set[str], left_label: str, right_label: str) -> None:
+    if args.out.endswith(".parquet"):
+        _pyarrow()  # échouer avant de tout télécharger
+    pairs = [] if args.all else read_mapping_pairs(args.mapping_csv)
+    if not args.all and not pairs:
+        print("[warn] Aucune paire species/othername dans le mapping.", file=sys.stderr)
+        return
+    cache = cache_from_args(args)
+    dump = dump_from_args(args)
+    cfg = ClientConfig(
+        base_url=args.base_url,
+        max_concurrency=max(1, args.concurrency),
+        cache=cache,
+        dump=dump,
+        metrics=metrics_from_args(args),
+        **throttle_kwargs(args),
+    )
+    print(f"[info] Comparaison batch : {left_label} → {right_label}", file=sys.stderr)
+    t0 = time.perf_counter()
+    rows, errors = asyncio.run(batch_diff(pairs, left_groups, right_groups, cfg, args.all))
+    for err in errors:
+        print(f"[warn] {err}", file=sys.stderr)
+    n_species = len({r.species for r in rows})
+    print(f"[info] {n_species} espèces avec différences, {len(errors)} erreurs, "
+          f"{time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+    write_diff(args.out, rows)
+    if args.aggregate_out:
+        write_aggregate(args.aggregate_out, rows)
+    if dump is not None:
+        print(f"[info] Dump local: {dump.served} réponses servies sans réseau", file=sys.stderr)
+        dump.close()
+    if cache is not None:
+        cache.close()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Compare level-up moves entre 7/8/9 via PokeAPI")
-    parser.add_argument("pokemon", nargs="+", help="Nom(s) de Pokémon (ex: pikachu, charizard, mr-mime)")
+    parser.add_argument("pokemon", nargs="*", help="Nom(s) de Pokémon (ex: pikachu, charizard, mr-mime)")
+
+    # Mode batch
+    batch = parser.add_mutually_exclusive_group()
+    batch.add_argument("--mapping-csv", help="Batch : toutes les espèces d'un mapping 'species;othername'.")
+    batch.add_argument("--all", action="store_true", help="Batch : tous les /pokemon/ de PokeAPI (formes comprises).")
+    parser.add_argument("--out", help="Batch : table de diff (.csv, ou .parquet avec pyarrow).")
+    parser.add_argument("--aggregate-out", help="Batch : CSV agrégé par move (removed/added/level_changed).")
+    parser.add_argument("--concurrency", type=int, default=32, help="Batch : requêtes simultanées max (défaut: 32).")
+    parser.add_argument("--base-url", default=POKEAPI, help="Batch : base URL PokeAPI (défaut: officiel).")
+    add_cache_args(parser)
+    add_dump_args(parser)
+    add_throttle_args(parser)
+    add_metrics_args(parser)
 
     # Choix de la paire à comparer
     parser.add_argument("--left-gen", type=int, choices=[7, 8, 9], default=7, help="Génération côté gauche (défaut: 7)")
@@ -128,6 +277,11 @@ def main():
     parser.add_argument("--right-groups", nargs="+", help="Version groups côté droit (prioritaire sur --right-gen)")
 
     args = parser.parse_args()
+    batch_mode = bool(args.mapping_csv or args.all)
+    if batch_mode and not args.out:
+        parser.error("--out est requis avec --mapping-csv / --all")
+    if not batch_mode and not args.pokemon:
+        parser.error("indiquer au moins un Pokémon, ou --mapping-csv / --all")
 
     # Construire les groupes pour chaque gen, avec surclassements éventuels
     groups_by_gen = DEFAULT_GROUPS_BY_GEN.copy()
@@ -153,6 +307,10 @@ def main():
         right_groups = set(groups_by_gen[args.right_gen])
         right_label = f"Gen{args.right_gen} ({' / '.join(groups_by_gen[args.right_gen])})"
 
+    if batch_mode:
+        run_batch(args, left_groups, right_groups, left_label, right_label)
+        return
+
     for name in args.pokemon:
         try:
             data = fetch_pokemon_data(name)
@@ -160,8 +318,8 @@ def main():
             print(f"[ERREUR] {name}: {e}")
             continue
 
-        left_moves = extract_level_up_moves(data, left_groups)
-        right_moves = extract_level_up_moves(data, right_groups)
+        # {move: min_level} des deux côtés en une seule passe sur le payload
+        left_moves, right_moves = level_up_moves(data, left_groups, right_groups)
 
         print_report(name, left_label, right_label, left_moves, right_moves)
 
@@ -9,6 +9,11 @@ Lit un CSV d'entrée avec une colonne "species" (ou une colonne choisie) et prod
 
 - "species" : la valeur telle que présente dans TON CSV d'origine (sans modification)
 - "othername" : le nom canonique selon PokeAPI (/pokemon-species/{name}) si trouvé ; sinon vide
+
+Avec l'index local des noms (pokeapi_names.json, voir pokeapi_names.py), aucune requête HTTP :
+"othername" est le nom /pokemon/ le mieux classé (forme par défaut pour une espèce, formes régionales
+et alternatives comprises) si son score atteint --min-score. --suggestions écrit les meilleurs candidats
+classés pour les lignes non exactes, à relire à la place du remplissage manuel depuis all_pokemon.txt.
 """
 
 from __future__ import annotations
@@ -17,15 +22,14 @@ import argparse
 import asyncio
 import csv
 import sys
+import time
 import unicodedata
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
-try:
-    import aiohttp
-except ImportError:
-    print("Ce script requiert 'aiohttp' (pip install aiohttp).", file=sys.stderr)
-    sys.exit(1)
+from pokeapi_client import ClientConfig, PokeApiClient, RetryPolicy, add_throttle_args, throttle_kwargs
+from pokeapi_metrics import add_metrics_args, metrics_from_args
+from pokeapi_names import SCORE_TOKENS, NameIndex, add_name_index_args, name_index_from_args
 
 BASE = "https://pokeapi.co/api/v2"
 UA = "gen-species-mapping/1.0 (+https://pokeapi.co)"
@@ -39,17 +43,6 @@ class Cfg:
     concurrency: int = 48
 
 
-class Limiter:
-    def __init__(self, n: int):
-        import asyncio as _asyncio
-        self.sem = _asyncio.Semaphore(max(1, n))
-    async def __aenter__(self):
-        await self.sem.acquire()
-        return self
-    async def __aexit__(self, exc_type, exc, tb):
-        self.sem.release()
-
-
 def simple_slug(s: str) -> str:
     s = s.strip().lower()
     s = unicodedata.normalize("NFKD", s)
@@ -89,40 +82,56 @@ def read_species_from_csv(path: str, header: Optional[str], column: Optional[int
     return vals
 
 
-async def fetch_species_name(session: aiohttp.ClientSession, q: str, cfg: Cfg) -> Tuple[int, Optional[str]]:
-    url = f"{BASE}/pokemon-species/{q}/"
-    last = None
-    for attempt in range(cfg.retries + 1):
-        try:
-            async with session.get(url, timeout=cfg.timeout) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    return 200, data.get("name")
-                if resp.status in (429, 500, 502, 503, 504):
-                    ra = resp.headers.get("Retry-After")
-                    if ra:
-                        try:
-                            delay = float(ra)
-                        except ValueError:
-                            delay = cfg.backoff * (2 ** attempt)
-                    else:
-                        delay = cfg.backoff * (2 ** attempt)
-                    await asyncio.sleep(delay)
-                    continue
-                return resp.status, None
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            last = e
-            await asyncio.sleep(cfg.backoff * (2 ** attempt))
-    return 0, None
-
-
-async def one_row(session: aiohttp.ClientSession, original: str, normalized: bool, cfg: Cfg, limiter: Limiter) -> Tuple[str, str]:
+async def fetch_species_name(client: PokeApiClient, q: str) -> Tuple[int, Optional[str]]:
+    status, data = await client.get_status(f"{BASE}/pokemon-species/{q}/")
+    return status, (data.get("name") if data else None)
+
+
+async def one_row(client: PokeApiClient, original: str, normalized: bool) -> Tuple[str, str]:
     q = simple_slug(original) if normalized else original.strip()
-    async with limiter:
-        status, canon = await fetch_species_name(session, q, cfg)
+    status, canon = await fetch_species_name(client, q)
     return original, (canon or "")
 
 
+def resolve_locally(index: NameIndex, rows: List[str], min_score: float,
+                    suggestions_path: Optional[str], limit: int) -> List[Tuple[str, str]]:
+    t0 = time.perf_counter()
+    results: List[Tuple[str, str]] = []
+    review: List[Tuple[str, int, str, float, str]] = []
+    counts = {"exact": 0, "accepted": 0, "unresolved": 0}
+    for original in rows:
+        matches = index.resolve(original, limit=limit)
+        top = matches[0] if matches else None
+        if top is not None and top.score >= min_score:
+            results.append((original, top.name))
+            counts["exact" if top.score >= SCORE_TOKENS else "accepted"] += 1
+        else:
+            results.append((original, ""))
+            counts["unresolved"] += 1
+        if top is None or top.score < SCORE_TOKENS:
+            review.extend((original, rank, m.name, m.score, m.how) for rank, m in enumerate(matches, 1))
+
+    print(f"[info] Résolution locale en {(time.perf_counter() - t0) * 1000:.0f} ms : {counts['exact']} exacts, "
+          f"{counts['accepted']} approchés (score >= {min_score}), {counts['unresolved']} non résolus", file=sys.stderr)
+    if suggestions_path:
+        with open(suggestions_path, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f, delimiter=';')
+            w.writerow(["species", "rank", "candidate", "score", "how"])
+            w.writerows(review)
+        print(f"[ok] Suggestions écrites : {suggestions_path} ({len(review)} lignes)", file=sys.stderr)
+    return results
+
+
+def write_mapping(path: str, results: List[Tuple[str, str]]) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, delimiter=';')
+        w.writerow(["species", "othername"])
+        for species, other in results:
+            w.writerow([species, other])
+
+    print(f"[ok] Écrit : {path} ({len(results)} lignes)", file=sys.stderr)
+
+
 async def main_async(args):
     cfg = Cfg(timeout=args.timeout, retries=args.retries, backoff=args.backoff, concurrency=args.concurrency)
     rows = read_species_from_csv(args.csv_file, args.header, args.column)
@@ -130,18 +139,24 @@ async def main_async(args):
         print("[warn] Aucune espèce trouvée dans le CSV.", file=sys.stderr)
         return
 
-    async with aiohttp.ClientSession(headers={"User-Agent": UA}) as session:
-        limiter = Limiter(cfg.concurrency)
-        tasks = [asyncio.create_task(one_row(session, r, not args.no_normalize, cfg, limiter)) for r in rows]
-        results = await asyncio.gather(*tasks)
+    index = name_index_from_args(args)
+    if index is not None:
+        write_mapping(args.out, resolve_locally(index, rows, args.min_score, args.suggestions, args.limit))
+        return
 
-    with open(args.out, "w", encoding="utf-8", newline="") as f:
-        w = csv.writer(f, delimiter=';')
-        w.writerow(["species", "othername"])
-        for species, other in results:
-            w.writerow([species, other])
+    client_cfg = ClientConfig(
+        timeout=cfg.timeout,
+        max_concurrency=max(1, cfg.concurrency),
+        retry=RetryPolicy(retries=cfg.retries, backoff=cfg.backoff),
+        user_agent=UA,
+        metrics=metrics_from_args(args),
+        **throttle_kwargs(args),
+    )
+    async with PokeApiClient(client_cfg) as client:
+        tasks = [asyncio.create_task(one_row(client, r, not args.no_normalize)) for r in rows]
+        results = await asyncio.gather(*tasks)
 
-    print(f"[ok] Écrit : {args.out} ({len(results)} lignes)", file=sys.stderr)
+    write_mapping(args.out, results)
 
 
 def parse_args():
@@ -155,6 +170,14 @@ def parse_args():
     p.add_argument("--timeout", type=int, default=20, help="Timeout HTTP (s).")
     p.add_argument("--retries", type=int, default=3, help="Retries sur 429/5xx.")
     p.add_argument("--backoff", type=float, default=0.8, help="Backoff initial (exponentiel).")
+    p.add_argument("--min-score", type=float, default=SCORE_TOKENS,
+                   help=f"Index local : score minimal pour remplir 'othername' (1.0 = exact, défaut {SCORE_TOKENS} : "
+                        "correspondances exactes ou par mots seulement, le reste va dans --suggestions).")
+    p.add_argument("--suggestions", help="Index local : CSV des candidats classés pour les lignes non exactes.")
+    p.add_argument("--limit", type=int, default=3, help="Index local : candidats par ligne dans --suggestions (défaut 3).")
+    add_name_index_args(p)
+    add_throttle_args(p)
+    add_metrics_args(p)
     return p.parse_args()
 
 
@@ -16,8 +16,8 @@ Usage:
       [--max-conns 12]
 
 Notes:
-- Uses asyncio + aiohttp for parallel calls.
-- Caches /move/{name} calls to fetch types.
+- Uses the shared async client (pokeapi_client.py): keep-alive pool, adaptive concurrency, retries.
+- Move types come from the move index (pokeapi_moves.idx) when present; /move/{name} calls are cached otherwise.
 - Version-group -> generation and label mapping is defined below.
 """
 
@@ -28,9 +28,14 @@ import sys
 from collections import defaultdict, OrderedDict
 from pathlib import Path
 
-import aiohttp
 import csv
 
+from pokeapi_cache import add_cache_args, cache_from_args
+from pokeapi_client import ClientConfig, PokeApiClient, RetryPolicy, add_throttle_args, throttle_kwargs
+from pokeapi_dump import add_dump_args, dump_from_args
+from pokeapi_metrics import add_metrics_args, metrics_from_args
+from pokeapi_moves import MoveIndex, add_move_index_args, move_index_from_args
+
 POKEAPI_BASE = "https://pokeapi.co/api/v2"
 
 # --- Version-group → (generation, label for tag) ----------------------------
@@ -104,47 +109,36 @@ def dedupe_moves(move_list):
 # --- Async HTTP -------------------------------------------------------------
 
 class PokeClient:
-    def __init__(self, max_conns=12):
-        self._session = None
-        self._sem = asyncio.Semaphore(max_conns)
+    """Thin wrapper over the shared pokeapi_client.PokeApiClient, plus a move-type memo."""
+
+    def __init__(self, cfg: ClientConfig, move_index: MoveIndex | None = None):
+        self._client = PokeApiClient(cfg)
+        self._move_index = move_index
         self._move_type_cache = {}  # move-name(lower) -> type str
 
     async def __aenter__(self):
-        self._session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=90)
-        )
+        await self._client.__aenter__()
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
-        if self._session:
-            await self._session.close()
+        await self._client.__aexit__(exc_type, exc, tb)
 
     async def _get_json(self, url):
-        async with self._sem:
-            for attempt in range(3):
-                try:
-                    async with self._session.get(url) as resp:
-                        if resp.status == 200:
-                            return await resp.json()
-                        # Gentle backoff on rate limits or server hiccups
-                        if resp.status in (429, 500, 502, 503, 504):
-                            await asyncio.sleep(0.5 * (attempt + 1))
-                        else:
-                            txt = await resp.text()
-                            raise RuntimeError(f"GET {url} -> {resp.status}: {txt[:200]}")
-                except aiohttp.ClientError as e:
-                    await asyncio.sleep(0.5 * (attempt + 1))
-            raise RuntimeError(f"GET {url} failed after retries")
+        return await self._client.get_json(url)
 
     async def get_pokemon(self, othername: str) -> dict:
-        url = f"{POKEAPI_BASE}/pokemon/{othername.lower().strip()}"
+        url = f"pokemon/{othername.lower().strip()}"
         return await self._get_json(url)
 
     async def get_move_type(self, move_name: str) -> str:
         key = move_name.lower()
         if key in self._move_type_cache:
             return self._move_type_cache[key]
-        url = f"{POKEAPI_BASE}/move/{key}"
+        info = self._move_index.get(key) if self._move_index is not None else None
+        if info is not None and info.type:
+            self._move_type_cache[key] = info.type.capitalize()
+            return self._move_type_cache[key]
+        url = f"move/{key}"
         data = await self._get_json(url)
         mv_type = (data.get("type") or {}).get("name") or "normal"
         mv_type = mv_type.capitalize()
@@ -275,7 +269,8 @@ async def build_lists_for_species(client: PokeClient, othername: str):
 
 # --- Main -------------------------------------------------------------------
 
-async def main_async(pokedex_path: Path, mapping_path: Path, out_path: Path, max_conns: int):
+async def main_async(pokedex_path: Path, mapping_path: Path, out_path: Path, client_cfg: ClientConfig,
+                     move_index: MoveIndex | None = None):
     # Load data
     with pokedex_path.open(encoding="utf-8") as f:
         pokedex = json.load(f)
@@ -286,7 +281,7 @@ async def main_async(pokedex_path: Path, mapping_path: Path, out_path: Path, max
     # Your pokedex looks like a list of species objects
     species_index = {entry.get("Species"): entry for entry in pokedex if isinstance(entry, dict)}
 
-    async with PokeClient(max_conns=max_conns) as client:
+    async with PokeClient(client_cfg, move_index) as client:
         tasks = []
         order = []
         for species, other in mapping.items():
@@ -320,9 +315,33 @@ def main():
     ap.add_argument("--mapping", required=True, type=Path)
     ap.add_argument("--out", required=True, type=Path)
     ap.add_argument("--max-conns", type=int, default=12)
+    ap.add_argument("--base-url", default=POKEAPI_BASE, help="PokeAPI base URL (default: official; e.g. a pokeapi_standin replay server)")
+    add_throttle_args(ap)
+    add_metrics_args(ap)
+    add_cache_args(ap)
+    add_dump_args(ap)
+    add_move_index_args(ap)
     args = ap.parse_args()
 
-    asyncio.run(main_async(args.pokedex, args.mapping, args.out, args.max_conns))
+    cache = cache_from_args(args)
+    dump = dump_from_args(args)
+    client_cfg = ClientConfig(
+        base_url=args.base_url,
+        timeout=90,
+        max_concurrency=max(1, args.max_conns),
+        retry=RetryPolicy(retries=2, backoff=0.5),
+        cache=cache,
+        dump=dump,
+        metrics=metrics_from_args(args),
+        **throttle_kwargs(args),
+    )
+    try:
+        asyncio.run(main_async(args.pokedex, args.mapping, args.out, client_cfg, move_index_from_args(args)))
+    finally:
+        if cache is not None:
+            cache.close()
+        if dump is not None:
+            dump.close()
 
 
 if __name__ == "__main__":
@@ -4,18 +4,30 @@
 """
 Version optimisée avec appels parallèles vers PokeAPI
 Extraction des moves supprimés entre deux générations (7/8/9).
+
+Mode incrémental (--incremental) : un fichier d'état (--state, défaut <out>.state.json) garde par
+Pokémon l'empreinte de la tranche de learnset comparée (level-up des groupes gauche/droite), les
+validateurs HTTP (ETag / Last-Modified) et les moves supprimés. Au run suivant, chaque Pokémon est
+redemandé en requête conditionnelle (304 = inchangé) ou relu dans le dump (--dump-db) et comparé à
+son empreinte ; seuls les Pokémon modifiés sont recalculés et les CSV sont réécrits à partir de l'état.
 """
 
 import argparse
 import csv
+import hashlib
+import json
+import os
 import sys
 import time
 from collections import Counter
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Set, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import requests
 
+from pokeapi_dump import DumpBackend, add_dump_args, dump_from_args
+from pokeapi_learnsets import level_up_moves
+
 POKEAPI_BASE_POKEMON = "https://pokeapi.co/api/v2/pokemon"
 TIMEOUT = 30
 
@@ -26,7 +38,16 @@ DEFAULT_GROUPS_BY_GEN = {
     9: ["scarlet-violet"],
 }
 
+# backend local optionnel (dump CSV PokeAPI, --dump-db)
+DUMP: Optional[DumpBackend] = None
+
+STATE_VERSION = 1
+
 def fetch_json(url: str) -> dict:
+    if DUMP is not None:
+        local = DUMP.get_json(url)
+        if local is not None:
+            return local
     r = requests.get(url, timeout=TIMEOUT)
     if r.status_code == 404:
         raise ValueError(f"Ressource non trouvée: {url}")
@@ -46,20 +67,44 @@ def fetch_pokemon_data(name: str) -> dict:
     url = f"{POKEAPI_BASE_POKEMON}/{name}"
     return fetch_json(url)
 
-def extract_level_up_moves(data: dict, version_groups: Set[str]) -> Dict[str, int]:
-    """Retourne {move: min_level} pour les moves appris par level-up."""
-    result: Dict[str, int] = {}
-    for move_entry in data.get("moves", []):
-        move_name = move_entry["move"]["name"]
-        for vgd in move_entry.get("version_group_details", []):
-            vg_name = vgd["version_group"]["name"]
-            if vg_name not in version_groups:
-                continue
-            if vgd["move_learn_method"]["name"] != "level-up":
-                continue
-            lvl = vgd.get("level_learned_at", 0)
-            result[move_name] = min(result.get(move_name, lvl), lvl)
-    return result
+def fetch_pokemon_conditional(name: str, validators: Dict[str, str]) -> Tuple[Optional[dict], Dict[str, str]]:
+    """
+    (payload, validateurs) ; payload None si PokeAPI répond 304 (inchangé depuis le dernier run).
+    Avec le dump local, pas de validateurs : le payload est relu et comparé par empreinte.
+    """
+    url = f"{POKEAPI_BASE_POKEMON}/{name}"
+    if DUMP is not None:
+        local = DUMP.get_json(url)
+        if local is not None:
+            return local, {}
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    r = requests.get(url, headers=headers, timeout=TIMEOUT)
+    if r.status_code == 304:
+        return None, validators
+    if r.status_code == 404:
+        raise ValueError(f"Ressource non trouvée: {url}")
+    r.raise_for_status()
+    fresh = {k: v for k, v in (("etag", r.headers.get("ETag")),
+                               ("last_modified", r.headers.get("Last-Modified"))) if v}
+    return r.json(), fresh
+
+def removed_moves(
+    data: dict,
+    include_forms: bool,
+    left_groups: Set[str],
+    right_groups: Set[str]
+) -> Tuple[str, List[Tuple[str, int]]]:
+    """(empreinte, [(move, lvl_left), ...]) pour un payload /pokemon/."""
+    if not include_forms and data.get("is_default") is False:
+        return "skip", []  # ignoré
+    left_map, right_map = level_up_moves(data, left_groups, right_groups)
+    blob = json.dumps([sorted(left_map.items()), sorted(right_map.items())], separators=(",", ":"))
+    fingerprint = hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+    return fingerprint, [(m, lvl) for m, lvl in left_map.items() if m not in right_map]
 
 def compute_removed_moves_for_pokemon(
     name: str, 
@@ -75,17 +120,147 @@ def compute_removed_moves_for_pokemon(
     except Exception as e:
         return name, [("__ERROR__", str(e))]
 
-    if not include_forms and data.get("is_default") is False:
-        return name, []  # ignoré
-
-    left_map = extract_level_up_moves(data, left_groups)
-    right_map = extract_level_up_moves(data, right_groups)
-    removed = [(m, lvl) for m, lvl in left_map.items() if m not in right_map]
+    _, removed = removed_moves(data, include_forms, left_groups, right_groups)
     return data["name"], removed
 
+def check_pokemon_incremental(
+    name: str,
+    prev: Optional[Dict[str, Any]],
+    include_forms: bool,
+    left_groups: Set[str],
+    right_groups: Set[str]
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    ("unchanged" | "changed", entrée d'état) pour un Pokémon.
+    Entrée : {"fp": empreinte, "http": {"etag", "last_modified"}, "removed": [[move, lvl], ...]}.
+    """
+    data, validators = fetch_pokemon_conditional(name, (prev or {}).get("http") or {})
+    if data is None:
+        return "unchanged", prev
+    fingerprint, removed = removed_moves(data, include_forms, left_groups, right_groups)
+    entry = {"fp": fingerprint, "http": validators, "removed": [list(r) for r in removed]}
+    if prev is not None and prev.get("fp") == fingerprint:
+        return "unchanged", entry
+    return "changed", entry
+
+def state_config(left_groups: Set[str], right_groups: Set[str], include_forms: bool) -> Dict[str, Any]:
+    return {"left": sorted(left_groups), "right": sorted(right_groups), "include_forms": include_forms}
+
+def load_state(path: str, config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Entrées par Pokémon du dernier run ; {} si absent, illisible ou calculé avec d'autres groupes."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] État illisible ({path}): {e} — recalcul complet", file=sys.stderr)
+        return {}
+    if doc.get("version") != STATE_VERSION or doc.get("config") != config:
+        print(f"[WARN] État {path} calculé avec d'autres groupes/options — recalcul complet", file=sys.stderr)
+        return {}
+    return doc.get("species") or {}
+
+def save_state(path: str, config: Dict[str, Any], species: Dict[str, Dict[str, Any]]) -> None:
+    doc = {"version": STATE_VERSION, "config": config, "updated_at": int(time.time()), "species": species}
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
 def humanize_move(m: str) -> str:
     return m.replace('-', ' ').title()
 
+def detailed_row(pname: str, m: str, lvl: int, left_groups: Set[str], right_groups: Set[str]) -> Dict[str, Any]:
+    return {
+        "pokemon": pname,
+        "move": m,
+        "move_human": humanize_move(m),
+        "left_min_level": lvl,
+        "left_groups": "|".join(sorted(left_groups)),
+        "right_groups": "|".join(sorted(right_groups)),
+    }
+
+def write_reports(out: str, aggregate_out: Optional[str], detailed_rows: List[Dict[str, Any]], agg_counter: Counter) -> None:
+    # CSV détaillé
+    with open(out, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=[
+            "pokemon", "move", "move_human", "left_min_level", "left_groups", "right_groups"
+        ])
+        writer.writeheader()
+        writer.writerows(detailed_rows)
+    print(f"[OK] CSV détaillé écrit : {out} ({len(detailed_rows)} lignes)")
+
+    # CSV agrégé
+    if aggregate_out:
+        with open(aggregate_out, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["move", "move_human", "pokemon_count"])
+            for m, c in sorted(agg_counter.items(), key=lambda x: (-x[1], x[0])):
+                writer.writerow([m, humanize_move(m), c])
+        print(f"[OK] CSV agrégé écrit : {aggregate_out} ({len(agg_counter)} moves)")
+
+def run_incremental(
+    names: List[str],
+    state_path: str,
+    include_forms: bool,
+    left_groups: Set[str],
+    right_groups: Set[str],
+    workers: int
+) -> Tuple[List[Dict[str, Any]], Counter]:
+    """
+    Ne recalcule que les Pokémon dont la tranche de learnset a changé depuis le dernier run,
+    puis reconstruit les lignes des CSV à partir de l'état (ordre de la liste PokeAPI).
+    """
+    config = state_config(left_groups, right_groups, include_forms)
+    previous = load_state(state_path, config)
+    if previous:
+        print(f"[INFO] État chargé : {len(previous)} Pokémon ({state_path})", file=sys.stderr)
+
+    species: Dict[str, Dict[str, Any]] = {}
+    changed: List[str] = []
+    unchanged = errors = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                check_pokemon_incremental,
+                name, previous.get(name), include_forms, left_groups, right_groups
+            ): name
+            for name in names
+        }
+        for i, fut in enumerate(as_completed(futures), 1):
+            name = futures[fut]
+            try:
+                status, entry = fut.result()
+            except Exception as e:
+                print(f"[WARN] {name}: {e}", file=sys.stderr)
+                errors += 1
+                if name in previous:
+                    species[name] = previous[name]  # on garde le dernier résultat connu
+                continue
+            species[name] = entry
+            if status == "changed":
+                changed.append(name)
+            else:
+                unchanged += 1
+            if i % 50 == 0:
+                print(f"[INFO] {i}/{len(names)} Pokémon vérifiés...", file=sys.stderr)
+
+    vanished = sorted(set(previous) - set(names))
+    save_state(state_path, config, species)
+    print(f"[INFO] Incrémental : {len(changed)} modifiés/nouveaux, {unchanged} inchangés, "
+          f"{len(vanished)} disparus, {errors} erreurs (état: {state_path})")
+    for name in sorted(changed)[:20]:
+        print(f"[INFO]   modifié : {name}", file=sys.stderr)
+
+    detailed_rows = []
+    agg_counter = Counter()
+    for name in names:
+        for m, lvl in (species.get(name) or {}).get("removed") or []:
+            detailed_rows.append(detailed_row(name, m, lvl, left_groups, right_groups))
+            agg_counter[m] += 1
+    return detailed_rows, agg_counter
+
 def main():
     parser = argparse.ArgumentParser(description="Compare toutes les moves supprimées entre deux générations via PokeAPI (parallèle)")
     parser.add_argument("--left-gen", type=int, choices=[7, 8, 9], default=7)
@@ -100,8 +275,17 @@ def main():
     parser.add_argument("--out", default="removed_moves_parallel.csv")
     parser.add_argument("--aggregate-out", default=None)
     parser.add_argument("--workers", type=int, default=10, help="Nombre de threads parallèles (défaut: 10)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Ne recalculer que les Pokémon modifiés depuis le dernier run (requêtes conditionnelles "
+                             "ou comparaison au dump), puis réécrire les CSV depuis l'état.")
+    parser.add_argument("--state", default=None,
+                        help="Fichier d'empreintes du mode incrémental (défaut: <out>.state.json).")
+    add_dump_args(parser)
     args = parser.parse_args()
 
+    global DUMP
+    DUMP = dump_from_args(args)
+
     # config groupes
     groups_by_gen = DEFAULT_GROUPS_BY_GEN.copy()
     if args.gen7_groups: groups_by_gen[7] = args.gen7_groups
@@ -119,6 +303,15 @@ def main():
     names = list_all_pokemon_names(limit=args.max)
     print(f"[INFO] Total Pokémon récupérés : {len(names)}")
 
+    if args.incremental:
+        detailed_rows, agg_counter = run_incremental(
+            names, args.state or f"{args.out}.state.json",
+            args.include_forms, left_groups, right_groups, args.workers
+        )
+        write_reports(args.out, args.aggregate_out, detailed_rows, agg_counter)
+        print("[FIN] Terminé !")
+        return
+
     detailed_rows = []
     agg_counter = Counter()
 
@@ -142,14 +335,7 @@ def main():
                     if m == "__ERROR__":
                         print(f"[WARN] {pname}: {lvl}", file=sys.stderr)
                         continue
-                    detailed_rows.append({
-                        "pokemon": pname,
-                        "move": m,
-                        "move_human": humanize_move(m),
-                        "left_min_level": lvl,
-                        "left_groups": "|".join(sorted(left_groups)),
-                        "right_groups": "|".join(sorted(right_groups)),
-                    })
+                    detailed_rows.append(detailed_row(pname, m, lvl, left_groups, right_groups))
                     agg_counter[m] += 1
             except Exception as e:
                 print(f"[ERREUR] {name}: {e}", file=sys.stderr)
@@ -157,23 +343,7 @@ def main():
             if i % 50 == 0:
                 print(f"[INFO] {i}/{len(names)} Pokémon traités...", file=sys.stderr)
 
-    # CSV détaillé
-    with open(args.out, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            "pokemon", "move", "move_human", "left_min_level", "left_groups", "right_groups"
-        ])
-        writer.writeheader()
-        writer.writerows(detailed_rows)
-    print(f"[OK] CSV détaillé écrit : {args.out} ({len(detailed_rows)} lignes)")
-
-    # CSV agrégé
-    if args.aggregate_out:
-        with open(args.aggregate_out, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["move", "move_human", "pokemon_count"])
-            for m, c in sorted(agg_counter.items(), key=lambda x: (-x[1], x[0])):
-                writer.writerow([m, humanize_move(m), c])
-        print(f"[OK] CSV agrégé écrit : {args.aggregate_out} ({len(agg_counter)} moves)")
+    write_reports(args.out, args.aggregate_out, detailed_rows, agg_counter)
 
     print("[FIN] Terminé !")
 
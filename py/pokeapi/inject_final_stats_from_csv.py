@@ -4,10 +4,11 @@
 import argparse
 import csv
 import json
-import math
 from pathlib import Path
 from collections import defaultdict
 
+from pokeapi_transform import scale_stats
+
 CSV2JSON_STAT = {
     "hp": "HP",
     "att": "Attack",
@@ -35,10 +36,6 @@ def norm_name(s: str) -> str:
     s = s.replace(" ", "-").replace("'", "")
     return SPECIAL_NAME_FIX.get(s, s)
 
-def round_ptu(x: float) -> int:
-    frac = x - math.floor(x)
-    return math.ceil(x) if frac > 0.5 else math.floor(x)
-
 def load_final_stats_from_csv(csv_path: Path):
     """
     Lit le CSV (gen,name,stat,old,new,delta) et garde pour chaque (name,stat)
@@ -79,11 +76,26 @@ def load_final_stats_from_csv(csv_path: Path):
         final_stats[name_key][json_stat_key] = new_val
     return final_stats, csv_names_map
 
+def to_ptu_stats(final_stats: dict) -> dict:
+    """
+    Convertit toutes les stats finales en valeurs PTU (new / 10, arrondi round_ptu) en une seule passe
+    vectorisée, au lieu de recalculer l'arrondi pour chaque entrée de chaque fichier.
+    """
+    keys = [(name_key, stat_key) for name_key, stats in final_stats.items() for stat_key in stats]
+    scaled = scale_stats([final_stats[n][k] for n, k in keys], 10.0, rule="ptu")
+    ptu_stats = defaultdict(dict)
+    for (name_key, stat_key), ptu_val in zip(keys, scaled):
+        ptu_stats[name_key][stat_key] = ptu_val
+    return ptu_stats
+
 def discover_json_files(root: Path):
     return [p for p in root.rglob("*.json") if p.is_file()]
 
 def update_entry(entry: dict, species_map: dict, matched: set) -> int:
-    """Met à jour une entrée (un Pokémon) si le nom matche. Retourne nb de champs modifiés."""
+    """
+    Met à jour une entrée (un Pokémon) si le nom matche. Retourne nb de champs modifiés.
+    species_map contient les valeurs PTU déjà arrondies (to_ptu_stats).
+    """
     if not isinstance(entry, dict):
         return 0
     species = (entry.get("Species") or "").strip()
@@ -102,8 +114,7 @@ def update_entry(entry: dict, species_map: dict, matched: set) -> int:
         return 0
 
     updates = 0
-    for stat_key, final_new in species_map[name_key].items():
-        ptu_val = round_ptu(final_new / 10.0)
+    for stat_key, ptu_val in species_map[name_key].items():
         if base.get(stat_key) != ptu_val:
             base[stat_key] = ptu_val
             updates += 1
@@ -161,6 +172,7 @@ def main():
         print("[warn] Aucune stat finale détectée dans le CSV.")
         return
 
+    species_ptu = to_ptu_stats(species_final)
     files = discover_json_files(Path(args.root))
     scanned = 0
     changed_files = 0
@@ -168,7 +180,7 @@ def main():
     matched_species = set()
 
     for fp in files:
-        s, u, ch = inject_into_file(fp, species_final, matched_species, dry_run=args.dry_run, backup=args.backup)
+        s, u, ch = inject_into_file(fp, species_ptu, matched_species, dry_run=args.dry_run, backup=args.backup)
         scanned += s
         changed_fields += u
         if ch:
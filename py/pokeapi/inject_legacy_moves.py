@@ -24,15 +24,16 @@ Usage:
     --diff-csv learnset_diff.csv \
     --workers 8
 """
-import argparse,json, sys, time, re, threading
+import argparse,json, sys, re
 from typing import Dict, List, Tuple, Optional, Any, Set
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from csv import DictReader, DictWriter
-try:
-    import requests
-except ImportError:
-    print("Requires 'requests' (pip install requests)", file=sys.stderr)
-    raise
+from pokeapi_cache import add_cache_args, cache_from_args
+from pokeapi_client import ClientConfig, fetch_many_sync, add_throttle_args, throttle_kwargs
+from pokeapi_dump import add_dump_args, dump_from_args
+from pokeapi_metrics import add_metrics_args, metrics_from_args
+from pokeapi_moves import MoveIndex, add_move_index_args, move_index_from_args
+
+POKEAPI="https://pokeapi.co/api/v2"
 
 # ---------- Logging ----------
 def log_info(msg: str): sys.stderr.write(f"[INFO] {msg}\n")
@@ -55,29 +56,12 @@ GENS = [9,8,7,6]
 # ---------- Caches ----------
 POKEMON_CACHE: Dict[str, dict] = {}
 MOVE_CACHE: Dict[str, dict] = {}
-LOCK = threading.Lock()
 
 # ---------- HTTP ----------
-def make_session()->requests.Session:
-    s = requests.Session()
-    adapter = requests.adapters.HTTPAdapter(pool_connections=100, pool_maxsize=100, max_retries=0)
-    s.mount("http://", adapter); s.mount("https://", adapter)
-    s.headers.update({"User-Agent":"PTU-Legacy-Moves/SAFE-2.0"})
-    return s
-
-def http_get(session, url, tries=3, backoff=0.8):
-    last=None
-    for i in range(tries):
-        try:
-            r = session.get(url, timeout=25)
-            if r.status_code==200: return r.json()
-            if r.status_code in (429,500,502,503,504): last=f"HTTP {r.status_code}"
-            else: last=f"HTTP {r.status_code}"
-        except Exception as e:
-            last=str(e)
-        time.sleep(backoff*(i+1))
-    log_warn(f"GET failed {url} -> {last}")
-    return None
+def fetch_all(cfg:ClientConfig, urls:Dict[str,str])->Dict[str,Optional[dict]]:
+    """key -> payload (None if missing), fetched concurrently by the shared async client."""
+    got=fetch_many_sync(urls.values(), cfg)
+    return {k: got.get(u) for k,u in urls.items()}
 
 def slugify(name:str)->str:
     s=name.strip().lower().replace("’","").replace("'","")
@@ -86,23 +70,22 @@ def slugify(name:str)->str:
     return s
 
 # ---------- API ----------
-def get_pokemon(session, name:str)->Optional[dict]:
-    key=name.strip().lower()
-    with LOCK:
-        if key in POKEMON_CACHE: return POKEMON_CACHE[key]
-    data=http_get(session, f"https://pokeapi.co/api/v2/pokemon/{key}")
-    if data:
-        with LOCK: POKEMON_CACHE[key]=data
-    return data
-
-def get_move(session, name:str)->Optional[dict]:
-    key=slugify(name)
-    with LOCK:
-        if key in MOVE_CACHE: return MOVE_CACHE[key]
-    data=http_get(session, f"https://pokeapi.co/api/v2/move/{key}")
-    if data:
-        with LOCK: MOVE_CACHE[key]=data
-    return data
+def get_pokemons(cfg:ClientConfig, names:List[str])->Dict[str,Optional[dict]]:
+    todo={n.strip().lower(): f"{POKEAPI}/pokemon/{n.strip().lower()}" for n in names if n.strip().lower() not in POKEMON_CACHE}
+    for key,data in fetch_all(cfg, todo).items():
+        if data: POKEMON_CACHE[key]=data
+    return {n: POKEMON_CACHE.get(n.strip().lower()) for n in names}
+
+def get_moves(cfg:ClientConfig, names:List[str], index:Optional[MoveIndex]=None)->Dict[str,Optional[dict]]:
+    """Move payloads by name; the move index answers first, /move/ only for what it lacks."""
+    if index is not None:
+        for n in names:
+            info=index.get(slugify(n)) if slugify(n) not in MOVE_CACHE else None
+            if info: MOVE_CACHE[slugify(n)]=info.payload()
+    todo={slugify(n): f"{POKEAPI}/move/{slugify(n)}" for n in names if slugify(n) not in MOVE_CACHE}
+    for key,data in fetch_all(cfg, todo).items():
+        if data: MOVE_CACHE[key]=data
+    return {n: MOVE_CACHE.get(slugify(n)) for n in names}
 
 # ---------- Helpers ----------
 def extract_levelup_levels_by_gen(pdata:dict)->Dict[str, Dict[int, List[int]]]:
@@ -215,9 +198,19 @@ def main():
     ap.add_argument("--diff-csv", default=None)
     ap.add_argument("--dedupe-output", action="store_true", help="If set, collapse later-level duplicates per move to the canonical one.")
     ap.add_argument("--dedupe-report", default=None, help="CSV path to write removed entries during dedupe.")
-    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--workers", type=int, default=8, help="Max concurrent PokeAPI requests (adaptive below it).")
+    add_throttle_args(ap)
+    add_metrics_args(ap)
+    add_cache_args(ap)
+    add_dump_args(ap)
+    add_move_index_args(ap)
     args=ap.parse_args()
 
+    http_cache=cache_from_args(args)
+    cfg=ClientConfig(
+        timeout=25, max_concurrency=max(1,args.workers), user_agent="PTU-Legacy-Moves/SAFE-2.0",
+        cache=http_cache, dump=dump_from_args(args), metrics=metrics_from_args(args), **throttle_kwargs(args))
+
     with open(args.pokedex,"r",encoding="utf-8") as f: pokedex=json.load(f)
     # mapping
     mp={}
@@ -239,21 +232,12 @@ def main():
             continue
         pairs.append((sname,oname))
 
-    session=make_session()
-
     # fetch pokemon parallel
-    log_info(f"Fetching PokéAPI for {len(pairs)} species with {args.workers} workers...")
-    def fp(pair):
-        disp,api=pair
-        data=get_pokemon(session, api)
-        if not data: log_warn(f"Missing data for {api}")
-        return (disp,api,data)
+    log_info(f"Fetching PokéAPI for {len(pairs)} species with up to {args.workers} concurrent requests...")
     poke_payloads={}
-    with ThreadPoolExecutor(max_workers=args.workers) as ex:
-        fut={ex.submit(fp,p):p for p in pairs}
-        for f in as_completed(fut):
-            disp,api,data=f.result()
-            if data: poke_payloads[api]=data
+    for api,data in get_pokemons(cfg, [api for _,api in pairs]).items():
+        if data: poke_payloads[api]=data
+        else: log_warn(f"Missing data for {api}")
 
     # extract + collect moves
     log_info("Extracting learnsets...")
@@ -271,12 +255,8 @@ def main():
 
     # fetch move types
     log_info(f"Fetching {len(unique_moves)} move payloads for types...")
-    def fm(m): return (m, get_move(session, m))
-    with ThreadPoolExecutor(max_workers=args.workers) as ex:
-        fut={ex.submit(fm,m):m for m in unique_moves}
-        for f in as_completed(fut):
-            mname,data=f.result()
-            if not data: log_warn(f"Missing move payload: {mname}")
+    for mname,data in get_moves(cfg, sorted(unique_moves), move_index_from_args(args)).items():
+        if not data: log_warn(f"Missing move payload: {mname}")
 
     # inject
 
@@ -484,6 +464,10 @@ def main():
             w=DictWriter(f, fieldnames=["Species","PokeAPIName","Move","Level","Type","Reason","SourceGen"])
             w.writeheader(); w.writerows(diff_rows)
 
+    if http_cache is not None:
+        st=http_cache.stats()
+        log_info(f"HTTP cache: {st['hits']} hits, {st['misses']} misses, {st['revalidations']} revalidations")
+        http_cache.close()
     log_info(f"[DONE] Added {total_added} Level-Up entries across {len(pokedex)} species.")
 if __name__=="__main__":
     main()
@@ -9,6 +9,13 @@ list_all_pokemon_and_varieties.py
     * un mapping species -> varieties (noms `/pokemon/` reliés à cette species)
     * la liste des species introuvables
 - Sauvegarde la liste complète de `/pokemon/` et, si demandé, le mapping et les rapports.
+- Sans CSV, `--map-out` couvre toutes les espèces de `/pokemon-species/`.
+
+Crawl : la première page donne le total, puis toutes les pages sont demandées en parallèle par offset
+(client partagé pokeapi_client : concurrence adaptative, retries). Les requêtes `/pokemon-species/{name}`
+partent dès que leur page (ou le CSV) est disponible, en même temps que la liste `/pokemon/`.
+`all_pokemon.txt` et `species_varieties.json` sont écrits au fil de l'eau, dans l'ordre PokeAPI / CSV,
+dans un fichier .part renommé à la fin : un crawl interrompu ne laisse pas de JSON tronqué.
 
 Dépendances : aiohttp
 
@@ -29,15 +36,13 @@ import argparse
 import asyncio
 import csv
 import json
+import os
 import sys
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, TextIO, Tuple
 
-try:
-    import aiohttp
-except ImportError:
-    print("Ce script requiert 'aiohttp' (pip install aiohttp).", file=sys.stderr)
-    sys.exit(1)
+from pokeapi_client import ClientConfig, PokeApiClient, RetryPolicy, add_throttle_args, throttle_kwargs
+from pokeapi_metrics import add_metrics_args, metrics_from_args
 
 BASE = "https://pokeapi.co/api/v2"
 UA = "list-all-pokemon/1.0 (+https://pokeapi.co)"
@@ -49,56 +54,84 @@ class Cfg:
     retries: int = 3
     backoff: float = 0.8
     concurrency: int = 48
+    page_size: int = 200
+
+
+class OrderedSink:
+    """Émet les éléments dans l'ordre de leur index dès que le préfixe est complet (réponses dans le désordre)."""
+
+    def __init__(self, emit: Callable[[Any], None]):
+        self.emit = emit
+        self.next = 0
+        self.pending: Dict[int, Any] = {}
+
+    def put(self, i: int, item: Any) -> None:
+        self.pending[i] = item
+        while self.next in self.pending:
+            self.emit(self.pending.pop(self.next))
+            self.next += 1
+
+
+class JsonObjectWriter:
+    """
+    Objet JSON écrit clé par clé (même rendu que json.dump(..., indent=2)) ; valide après close().
+    Une clé déjà écrite est ignorée (espèce listée deux fois dans le CSV) : chaque clé apparaît une fois.
+    """
+
+    def __init__(self, f: TextIO):
+        self.f = f
+        self.count = 0
+        self.keys: Set[str] = set()
+        f.write("{")
+
+    def add(self, key: str, value: Any) -> None:
+        if key in self.keys:
+            return
+        self.keys.add(key)
+        body = json.dumps({key: value}, ensure_ascii=False, indent=2)[1:-1].rstrip()
+        self.f.write(("," if self.count else "") + body)
+        self.f.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        self.f.write("\n}" if self.count else "}")
+
+
+async def crawl_pages(client: PokeApiClient, resource: str, page_size: int,
+                      on_page: Callable[[int, List[Dict[str, Any]]], Awaitable[None]]) -> int:
+    """
+    Liste paginée /{resource} : 1re page (donne le total), puis toutes les autres en parallèle.
+    on_page(offset, results) est appelé à l'arrivée de chaque page, dans le désordre. Retourne le total.
+    """
+    first = await client.get_json(f"{resource}?limit={page_size}&offset=0")
+    results = first.get("results") or []
+    count = int(first.get("count") or len(results))
+    await on_page(0, results)
+
+    async def page(offset: int) -> None:
+        data = await client.get_json(f"{resource}?limit={page_size}&offset={offset}")
+        await on_page(offset, data.get("results") or [])
+
+    await asyncio.gather(*(page(off) for off in range(page_size, count, page_size)))
+    return count
+
+
+async def list_all_pokemon(client: PokeApiClient, cfg: Cfg, out: Optional[TextIO] = None) -> List[str]:
+    """Tous les noms /pokemon/ (ordre PokeAPI), écrits dans out au fur et à mesure si fourni."""
+    names: List[str] = []
 
+    def emit(page: List[str]) -> None:
+        names.extend(page)
+        if out is not None:
+            out.write("".join(n + "\n" for n in page))
+            out.flush()
 
-class Limiter:
-    def __init__(self, n: int):
-        import asyncio as _asyncio
-        self.sem = _asyncio.Semaphore(max(1, n))
-    async def __aenter__(self):
-        await self.sem.acquire()
-        return self
-    async def __aexit__(self, exc_type, exc, tb):
-        self.sem.release()
+    sink = OrderedSink(emit)
 
+    async def on_page(offset: int, results: List[Dict[str, Any]]) -> None:
+        sink.put(offset // cfg.page_size, [it["name"] for it in results if it.get("name")])
 
-async def fetch_json(session: aiohttp.ClientSession, url: str, cfg: Cfg):
-    last = None
-    for attempt in range(cfg.retries + 1):
-        try:
-            async with session.get(url, timeout=cfg.timeout) as resp:
-                if resp.status == 200:
-                    return await resp.json()
-                if resp.status in (429, 500, 502, 503, 504):
-                    ra = resp.headers.get("Retry-After")
-                    if ra:
-                        try:
-                            delay = float(ra)
-                        except ValueError:
-                            delay = cfg.backoff * (2 ** attempt)
-                    else:
-                        delay = cfg.backoff * (2 ** attempt)
-                    await asyncio.sleep(delay)
-                    continue
-                text = await resp.text()
-                raise RuntimeError(f"GET {url} -> {resp.status}: {text[:180]}")
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            last = e
-            await asyncio.sleep(cfg.backoff * (2 ** attempt))
-    raise RuntimeError(f"Échec après retries pour {url}: {last}")
-
-
-async def list_all_pokemon(session: aiohttp.ClientSession, cfg: Cfg) -> List[str]:
-    """Paginer /pokemon pour obtenir tous les noms (/pokemon/)"""
-    names: List[str] = []
-    url = f"{BASE}/pokemon?limit=2000&offset=0"
-    while url:
-        data = await fetch_json(session, url, cfg)
-        for it in data.get("results", []):
-            name = it.get("name")
-            if name:
-                names.append(name)
-        url = data.get("next")
+    await crawl_pages(client, "pokemon", cfg.page_size, on_page)
     return names
 
 
@@ -126,14 +159,12 @@ def read_species_from_csv(path: str, header: Optional[str], column: Optional[int
     return vals
 
 
-async def fetch_species_varieties(session: aiohttp.ClientSession, species: str, cfg: Cfg, limiter: Limiter) -> Tuple[str, Optional[List[str]]]:
+async def fetch_species_varieties(client: PokeApiClient, species: str) -> Tuple[str, Optional[List[str]]]:
     """Retourne (species, [variety_names]) ou (species, None) si introuvable."""
-    url = f"{BASE}/pokemon-species/{species}/"
-    async with limiter:
-        try:
-            data = await fetch_json(session, url, cfg)
-        except Exception:
-            return species, None
+    try:
+        data = await client.get_json(f"pokemon-species/{species}/")
+    except Exception:
+        return species, None
     vs = []
     for v in data.get("varieties", []) or []:
         p = v.get("pokemon") or {}
@@ -143,60 +174,153 @@ async def fetch_species_varieties(session: aiohttp.ClientSession, species: str,
     return species, vs
 
 
-async def build_species_varieties(session: aiohttp.ClientSession, csv_species: List[str], cfg: Cfg) -> Tuple[Dict[str, List[str]], List[str]]:
+class VarietiesCollector:
+    """
+    Lance /pokemon-species/{name} dès qu'un lot d'espèces est connu (une page, ou une ligne du CSV) et range
+    les résultats dans l'ordre d'origine : lots dans l'ordre de leur rang, espèces dans l'ordre du lot.
+    Produit le mapping species->varieties (écrit au fil de l'eau si out) et les species introuvables.
+    """
+
+    def __init__(self, client: PokeApiClient, out: Optional[TextIO] = None):
+        self.client = client
+        self.mapping: Dict[str, List[str]] = {}
+        self.not_found: List[str] = []
+        self.writer = JsonObjectWriter(out) if out is not None else None
+        self.sink = OrderedSink(self._emit)
+        self.tasks: List[asyncio.Task] = []
+
+    def _emit(self, items: List[Tuple[str, Optional[List[str]]]]) -> None:
+        for sp, varieties in items:
+            if varieties is None:
+                self.not_found.append(sp)
+                continue
+            self.mapping[sp] = varieties
+            if self.writer is not None:
+                self.writer.add(sp, varieties)
+
+    def submit(self, index: int, species: List[str]) -> None:
+        """index : rang du lot, sans trou (0, 1, 2...), quelle que soit la taille des lots."""
+        async def run() -> None:
+            self.sink.put(index, await asyncio.gather(*(fetch_species_varieties(self.client, sp) for sp in species)))
+        self.tasks.append(asyncio.ensure_future(run()))
+
+    def cancel(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+
+    async def wait(self) -> None:
+        # la liste peut grandir pendant l'attente (pages d'espèces encore en vol)
+        done = 0
+        try:
+            while done < len(self.tasks):
+                batch = self.tasks[done:]
+                await asyncio.gather(*batch)
+                done += len(batch)
+        except BaseException:
+            self.cancel()
+            raise
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def build_species_varieties(client: PokeApiClient, csv_species: List[str],
+                                  out: Optional[TextIO] = None) -> Tuple[Dict[str, List[str]], List[str]]:
     """Pour une liste d'espèces (slugifiées), retourne mapping species->varieties et la liste des species introuvables."""
-    limiter = Limiter(cfg.concurrency)
-    tasks = [asyncio.create_task(fetch_species_varieties(session, sp, cfg, limiter)) for sp in csv_species]
-    results = await asyncio.gather(*tasks)
-    mapping: Dict[str, List[str]] = {}
-    not_found: List[str] = []
-    for sp, varieties in results:
-        if varieties is None:
-            not_found.append(sp)
-        else:
-            mapping[sp] = varieties
-    return mapping, not_found
+    collector = VarietiesCollector(client, out)
+    for i, sp in enumerate(csv_species):
+        collector.submit(i, [sp])
+    await collector.wait()
+    return collector.mapping, collector.not_found
+
+
+async def build_all_species_varieties(client: PokeApiClient, cfg: Cfg,
+                                      out: Optional[TextIO] = None) -> Tuple[Dict[str, List[str]], List[str]]:
+    """Toutes les espèces de /pokemon-species/ : chaque page déclenche aussitôt ses requêtes de variétés."""
+    collector = VarietiesCollector(client, out)
+
+    async def on_page(offset: int, results: List[Dict[str, Any]]) -> None:
+        # rang de page et non offset + j : une page courte ne laisse pas de trou dans l'ordre
+        collector.submit(offset // cfg.page_size, [it["name"] for it in results])
+
+    try:
+        await crawl_pages(client, "pokemon-species", cfg.page_size, on_page)
+    except BaseException:
+        collector.cancel()
+        raise
+    await collector.wait()
+    return collector.mapping, collector.not_found
 
 
 async def main_async(args):
-    cfg = Cfg(timeout=args.timeout, retries=args.retries, backoff=args.backoff, concurrency=args.concurrency)
-    async with aiohttp.ClientSession(headers={"User-Agent": UA}) as session:
-
-        # 1) Liste complète de /pokemon (formes)
-        all_pokemon: Optional[List[str]] = None
-        if args.out_all:
-            all_pokemon = await list_all_pokemon(session, cfg)
-            with open(args.out_all, "w", encoding="utf-8") as f:
-                for name in all_pokemon:
-                    f.write(name + "\n")
-            print(f"[ok] {len(all_pokemon)} entrées /pokemon/ écrites dans {args.out_all}", file=sys.stderr)
-
-        # 2) Optionnel : comparer aux species du CSV -> mapping varieties & not_found
-        if args.csv_file:
-            species_list = read_species_from_csv(args.csv_file, args.header, args.column)
-            mapping, not_found = await build_species_varieties(session, species_list, cfg)
-
-            if args.map_out:
-                with open(args.map_out, "w", encoding="utf-8") as f:
-                    json.dump(mapping, f, ensure_ascii=False, indent=2)
-                print(f"[ok] Mapping species->varieties écrit : {args.map_out}", file=sys.stderr)
-
-            if args.unfound_out:
-                with open(args.unfound_out, "w", encoding="utf-8") as f:
-                    for s in not_found:
-                        f.write(s + "\n")
-                print(f"[ok] {len(not_found)} species introuvables écrites : {args.unfound_out}", file=sys.stderr)
-
-            # Si on a aussi la liste all_pokemon, on peut en plus écrire les variétés *non couvertes* par le CSV
-            if args.extra_forms_out and (all_pokemon is not None):
-                covered = set()
-                for vs in mapping.values():
-                    covered.update(vs)
-                extras = [n for n in all_pokemon if n not in covered]
-                with open(args.extra_forms_out, "w", encoding="utf-8") as f:
-                    for n in extras:
-                        f.write(n + "\n")
-                print(f"[ok] {len(extras)} formes /pokemon/ non couvertes par le CSV -> {args.extra_forms_out}", file=sys.stderr)
+    cfg = Cfg(timeout=args.timeout, retries=args.retries, backoff=args.backoff, concurrency=args.concurrency,
+              page_size=max(1, args.page_size))
+    client_cfg = ClientConfig(
+        base_url=BASE,
+        timeout=cfg.timeout,
+        max_concurrency=max(1, cfg.concurrency),
+        retry=RetryPolicy(retries=cfg.retries, backoff=cfg.backoff),
+        user_agent=UA,
+        metrics=metrics_from_args(args),
+        **throttle_kwargs(args),
+    )
+    species_list = read_species_from_csv(args.csv_file, args.header, args.column) if args.csv_file else None
+    all_out = open(args.out_all + ".part", "w", encoding="utf-8") if args.out_all else None
+    map_out = open(args.map_out + ".part", "w", encoding="utf-8") if args.map_out else None
+    ok = False
+    try:
+        async with PokeApiClient(client_cfg) as client:
+            # 1) Liste complète de /pokemon (formes) et 2) variétés des species, en parallèle
+            jobs: Dict[str, Awaitable[Any]] = {}
+            if all_out is not None:
+                jobs["all"] = list_all_pokemon(client, cfg, all_out)
+            if species_list is not None:
+                jobs["varieties"] = build_species_varieties(client, species_list, map_out)
+            elif map_out is not None:
+                jobs["varieties"] = build_all_species_varieties(client, cfg, map_out)
+            tasks = {k: asyncio.ensure_future(job) for k, job in jobs.items()}
+            try:
+                results = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+            except BaseException:
+                for task in tasks.values():
+                    task.cancel()
+                raise
+        ok = True
+    finally:
+        for f, path in ((all_out, args.out_all), (map_out, args.map_out)):
+            if f is None:
+                continue
+            f.close()
+            if ok:
+                os.replace(f.name, path)
+            else:
+                os.unlink(f.name)
+
+    all_pokemon: Optional[List[str]] = results.get("all")
+    if all_pokemon is not None:
+        print(f"[ok] {len(all_pokemon)} entrées /pokemon/ écrites dans {args.out_all}", file=sys.stderr)
+    if "varieties" not in results:
+        return
+    mapping, not_found = results["varieties"]
+
+    if args.map_out:
+        print(f"[ok] Mapping species->varieties écrit : {args.map_out} ({len(mapping)} espèces)", file=sys.stderr)
+
+    if args.unfound_out:
+        with open(args.unfound_out, "w", encoding="utf-8") as f:
+            for s in not_found:
+                f.write(s + "\n")
+        print(f"[ok] {len(not_found)} species introuvables écrites : {args.unfound_out}", file=sys.stderr)
+
+    # Si on a aussi la liste all_pokemon, on peut en plus écrire les variétés *non couvertes* par le CSV
+    if args.extra_forms_out and (all_pokemon is not None):
+        covered = set()
+        for vs in mapping.values():
+            covered.update(vs)
+        extras = [n for n in all_pokemon if n not in covered]
+        with open(args.extra_forms_out, "w", encoding="utf-8") as f:
+            for n in extras:
+                f.write(n + "\n")
+        print(f"[ok] {len(extras)} formes /pokemon/ non couvertes par le CSV -> {args.extra_forms_out}", file=sys.stderr)
 
 
 def parse_args():
@@ -208,7 +332,7 @@ def parse_args():
 
     # Sorties
     p.add_argument("--out-all", help="Fichier pour écrire la liste complète des noms /pokemon/.")
-    p.add_argument("--map-out", help="JSON species->varieties pour le CSV fourni.")
+    p.add_argument("--map-out", help="JSON species->varieties pour le CSV fourni (sans CSV : toutes les espèces).")
     p.add_argument("--unfound-out", help="Fichier texte des species du CSV introuvables.")
     p.add_argument("--extra-forms-out", help="Fichier des /pokemon/ non couverts par le CSV (nécessite --out-all + CSV).")
 
@@ -217,6 +341,9 @@ def parse_args():
     p.add_argument("--timeout", type=int, default=20, help="Timeout HTTP (s).")
     p.add_argument("--retries", type=int, default=3, help="Retries sur 429/5xx.")
     p.add_argument("--backoff", type=float, default=0.8, help="Backoff initial (exponentiel).")
+    p.add_argument("--page-size", type=int, default=200, help="Taille des pages /pokemon et /pokemon-species (défaut 200).")
+    add_throttle_args(p)
+    add_metrics_args(p)
 
     return p.parse_args()
 
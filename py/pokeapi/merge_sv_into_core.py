@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import argparse, json, re
-from copy import deepcopy
+import argparse, json, os, re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Tuple
 
 def normalize_species(s: str) -> str:
     if not isinstance(s, str):
@@ -225,21 +225,25 @@ def capture_kept_moves(old_moves: dict, deleted_set: set[str], poke_types: list[
     return kept_levelup, kept_tm
 
 def merge_and_apply_rules(core_obj: Dict[str, Any], sv_obj: Dict[str, Any], sv_index: Dict[str, Dict[str, Any]],
-                          log_tm_pruned: bool = False, deleted_set: set[str] | None = None) -> Tuple[int, int]:
+                          log_tm_pruned: bool = False, deleted_set: set[str] | None = None,
+                          log: Callable[[str], None] = print) -> Tuple[int, int]:
+    """
+    Merge one species. sv data is never modified: lists are copied, level-up entries are shared
+    with sv (structural sharing, they are never mutated here), every other entry is rebuilt.
+    """
     if deleted_set is None:
         deleted_set = set()
 
-    old_moves = deepcopy(core_obj.get("Moves") or {})
+    old_moves = core_obj.get("Moves") or {}  # read-only: capture_kept_moves builds new objects
     poke_types = pokemon_types_from_core(core_obj)
 
-    sv_stats = deepcopy(sv_obj.get("Base Stats") or {})
-    if not isinstance(sv_stats, dict):
-        sv_stats = {}
+    sv_stats = sv_obj.get("Base Stats") or {}
+    sv_stats = dict(sv_stats) if isinstance(sv_stats, dict) else {}
     core_obj["Base Stats"] = sv_stats
 
     sv_moves = sv_obj.get("Moves") or {}
-    lvl = deepcopy(sv_moves.get("Level Up Move List") or [])
-    tm  = deepcopy(sv_moves.get("TM/Tutor Moves List") or [])
+    lvl = list(sv_moves.get("Level Up Move List") or [])
+    tm  = list(sv_moves.get("TM/Tutor Moves List") or [])
     core_obj["Moves"] = {"Level Up Move List": lvl, "TM/Tutor Moves List": tm}
 
     evolution = core_obj.get("Evolution") or []
@@ -272,12 +276,12 @@ def merge_and_apply_rules(core_obj: Dict[str, Any], sv_obj: Dict[str, Any], sv_i
             parent_key = normalize_species(parent_species)
             parent_sv = sv_index.get(parent_key)
             if parent_sv:
-                parent_lvl = deepcopy((parent_sv.get("Moves") or {}).get("Level Up Move List") or [])
+                parent_lvl = (parent_sv.get("Moves") or {}).get("Level Up Move List") or []
                 core_obj["Moves"]["Level Up Move List"].extend(parent_lvl)
                 added_from_parent = len(parent_lvl)
-                print(f"[stone] {this_sp}: appended {added_from_parent} level-up moves from parent stage ({parent_species}).")
+                log(f"[stone] {this_sp}: appended {added_from_parent} level-up moves from parent stage ({parent_species}).")
             else:
-                print(f"[stone] {this_sp}: parent stage '{parent_species}' not found in sv_ptu, cannot append.", flush=True)
+                log(f"[stone] {this_sp}: parent stage '{parent_species}' not found in sv_ptu, cannot append.")
         new_level_up: List[Dict[str, Any]] = []
         for m in core_obj["Moves"]["Level Up Move List"]:
             lvl_val = m.get("Level")
@@ -332,31 +336,96 @@ def merge_and_apply_rules(core_obj: Dict[str, Any], sv_obj: Dict[str, Any], sv_i
     tm_objs, removed_names = filter_tm_remove_levelup_objs(tm_objs, core_obj["Moves"]["Level Up Move List"])
     if log_tm_pruned and removed_names:
         spn = core_obj.get("Species") or core_obj.get("species") or "Unknown"
-        print(f"[tm-pruned] {spn}: removed from TM/Tutor because in Level Up -> " + ", ".join(removed_names))
+        log(f"[tm-pruned] {spn}: removed from TM/Tutor because in Level Up -> " + ", ".join(removed_names))
 
     tm_objs = unify_tm_tutor_objects(tm_objs, poke_types)
     core_obj["Moves"]["TM/Tutor Moves List"] = tm_objs
 
     return (added_from_parent, 0)
 
+def family_species(core_obj: Dict[str, Any]) -> List[str]:
+    """Normalized species of the evolution line of core_obj (itself included)."""
+    names = [normalize_species(core_obj.get("Species") or core_obj.get("species") or "")]
+    evolution = core_obj.get("Evolution") or []
+    if isinstance(evolution, list):
+        names += [normalize_species(row.get("Species", "")) for row in evolution if isinstance(row, dict)]
+    return [n for n in dict.fromkeys(names) if n]
+
+def merge_chunk(chunk: Tuple[List[Tuple[int, Dict[str, Any], str]], Dict[str, Dict[str, Any]], bool, set[str]]):
+    """Worker: merge a group of whole evolution families; logs are returned, not printed."""
+    jobs, sv_index, log_tm_pruned, deleted_set = chunk
+    out = []
+    for idx, entry, key in jobs:
+        lines: List[str] = []
+        merge_and_apply_rules(entry, sv_index[key], sv_index, log_tm_pruned=log_tm_pruned,
+                              deleted_set=deleted_set, log=lines.append)
+        out.append((idx, entry, lines))
+    return out
+
+def partition_families(jobs: List[Tuple[int, Dict[str, Any], str]], sv_index: Dict[str, Dict[str, Any]],
+                       n_chunks: int) -> List[Tuple[List[Tuple[int, Dict[str, Any], str]], Dict[str, Dict[str, Any]]]]:
+    """
+    Group jobs by evolution family (stone borrowing only reads the parent stage, which is in the same family),
+    then spread whole families over n_chunks, largest first. Each chunk only carries the sv entries it can read.
+    """
+    families: Dict[str, List[Tuple[int, Dict[str, Any], str]]] = {}
+    members: Dict[str, set[str]] = {}
+    for job in jobs:
+        names = family_species(job[1])
+        fam = min(names) if names else job[2]
+        families.setdefault(fam, []).append(job)
+        members.setdefault(fam, set()).update(names + [job[2]])
+
+    buckets: List[List[str]] = [[] for _ in range(max(1, n_chunks))]
+    sizes = [0] * len(buckets)
+    for fam in sorted(families, key=lambda f: (-len(families[f]), f)):
+        i = sizes.index(min(sizes))
+        buckets[i].append(fam)
+        sizes[i] += len(families[fam])
+
+    chunks = []
+    for fams in buckets:
+        if not fams:
+            continue
+        chunk_jobs = [job for fam in fams for job in families[fam]]
+        chunk_sv = {k: sv_index[k] for fam in fams for k in sorted(members[fam]) if k in sv_index}
+        chunks.append((chunk_jobs, chunk_sv))
+    return chunks
+
 def merge_all(sv_list: List[Dict[str, Any]], core_list: List[Dict[str, Any]], strict: bool = False,
-              log_tm_pruned: bool = False, deleted_set: set[str] | None = None) -> Dict[str, Any]:
+              log_tm_pruned: bool = False, deleted_set: set[str] | None = None, workers: int = 1) -> Dict[str, Any]:
     sv_index = index_sv(sv_list)
-    matched = 0
+    deleted_set = deleted_set or set()
+    jobs: List[Tuple[int, Dict[str, Any], str]] = []
     missing_in_sv: List[str] = []
-    for entry in core_list:
+    for idx, entry in enumerate(core_list):
         sp = entry.get("Species") or entry.get("species")
         key = normalize_species(sp) if sp else None
         if not key or key not in sv_index:
             missing_in_sv.append(sp or "<unknown>")
             continue
-        sv_obj = sv_index[key]
-        merge_and_apply_rules(entry, sv_obj, sv_index, log_tm_pruned=log_tm_pruned, deleted_set=(deleted_set or set()))
-        matched += 1
+        jobs.append((idx, entry, key))
     if strict and missing_in_sv:
         missing_str = ", ".join(missing_in_sv[:10])
         raise RuntimeError(f"{len(missing_in_sv)} Species from core not found in sv: {missing_str}{' ...' if len(missing_in_sv) > 10 else ''}")
-    report = {"core_count": len(core_list), "sv_count": len(sv_list), "matched": matched, "missing_in_sv": missing_in_sv}
+
+    if workers <= 1 or len(jobs) < 2:
+        for idx, entry, key in jobs:
+            merge_and_apply_rules(entry, sv_index[key], sv_index, log_tm_pruned=log_tm_pruned, deleted_set=deleted_set)
+    else:
+        # untouched species (not in sv) never leave this process; merged entries come back in core order
+        chunks = partition_families(jobs, sv_index, workers * 4)
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            for part in ex.map(merge_chunk, [(cj, csv_, log_tm_pruned, deleted_set) for cj, csv_ in chunks]):
+                results.extend(part)
+        results.sort(key=lambda r: r[0])
+        for idx, entry, lines in results:
+            core_list[idx] = entry
+            for line in lines:
+                print(line)
+
+    report = {"core_count": len(core_list), "sv_count": len(sv_list), "matched": len(jobs), "missing_in_sv": missing_in_sv}
     print(json.dumps(report, ensure_ascii=False, indent=2))
     return report
 
@@ -376,6 +445,8 @@ def main():
     ap.add_argument("--out", required=True, help="Output JSON path")
     ap.add_argument("--strict", action="store_true", help="Fail if some core Species are not present in sv")
     ap.add_argument("--log-tm-pruned", action="store_true", help="Log names removed from TM/Tutor because present in Level Up")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Processes merging evolution families in parallel (0 = all cores; default 1, in-process). Output is identical.")
     ap.add_argument("--gen8-deleted", help="Path to gen8_deleted_moves.txt to keep and reinject those moves with {Tags:[\"Kept\"]}")
     args = ap.parse_args()
 
@@ -384,7 +455,9 @@ def main():
     core_list, was_dict = load_core(core_path)
     deleted_set = load_gen8_deleted_moves(args.gen8_deleted) if args.gen8_deleted else set()
 
-    merge_all(sv_list, core_list, strict=args.strict, log_tm_pruned=args.log_tm_pruned, deleted_set=deleted_set)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    merge_all(sv_list, core_list, strict=args.strict, log_tm_pruned=args.log_tm_pruned, deleted_set=deleted_set,
+              workers=workers)
     out_data = restore_shape(core_list, was_dict)
     out_path.write_text(json.dumps(out_data, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"[ok] wrote {out_path}")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pokeapi_bench.py
+----------------
+Banc de mesure reproductible des scripts PokeAPI contre le serveur de substitution (pokeapi_standin).
+
+Pour chaque script (sv_moves_summary, get_gen_lists, update_moves_from_pokeapi) et chaque niveau de
+concurrence demandé, le script est lancé en sous-processus avec --base-url vers le serveur local,
+--no-cache et --metrics-json ; on relève le temps total, les réponses servies et les 429 côté serveur,
+les retries et le backoff côté client (rapport pokeapi_metrics).
+
+    # 1) enregistrer la cassette une fois (réseau), sur les 200 premières lignes du mapping
+    python pokeapi_bench.py --cassette bench.cassette --record --limit 200 --concurrency 16
+
+    # 2) rejouer sous throttling, plusieurs concurrences
+    python pokeapi_bench.py --cassette bench.cassette --limit 200 --concurrency 8 32 64 \\
+        --latency-ms 40 --jitter-ms 20 --p429 0.03 --retry-after 1 --rate-limit 100 --seed 1 --out bench.json
+
+Débit = réponses 200 servies / temps total ; "req/s" compte aussi les 429.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from pokeapi_standin import DEFAULT_PORT, BackgroundStandin, Cassette, StandinServer, add_fault_args, faults_from_args
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_MAPPING = HERE / "mapping.csv"
+DEFAULT_POKEDEX = HERE.parent.parent / "ptu" / "data" / "pokedex" / "community" / "pokedex_core.min.json"
+
+
+class Inputs:
+    """Fichiers d'entrée préparés dans le dossier temporaire (mapping aux deux séparateurs attendus)."""
+
+    def __init__(self, workdir: Path, pairs: List[Tuple[str, str]], pokedex: Path):
+        self.workdir = workdir
+        self.pokedex = pokedex
+        self.mapping_comma = workdir / "mapping.csv"
+        self.mapping_semicolon = workdir / "mapping_sc.csv"
+        for path, delim in ((self.mapping_comma, ","), (self.mapping_semicolon, ";")):
+            with path.open("w", encoding="utf-8", newline="") as f:
+                w = csv.writer(f, delimiter=delim)
+                w.writerow(["species", "othername"])
+                w.writerows(pairs)
+
+
+# script -> arguments propres (entrées, sortie, concurrence) ; --base-url/--no-cache/--metrics-json ajoutés ensuite
+SCRIPTS: Dict[str, Callable[[Inputs, Path, int], List[str]]] = {
+    "sv_moves_summary": lambda inp, out, n: [
+        "--mapping-csv", str(inp.mapping_semicolon), "--out", str(out), "--concurrency", str(n),
+        "--no-move-index", "--no-evo-index"],
+    "get_gen_lists": lambda inp, out, n: [
+        "--pokedex", str(inp.pokedex), "--mapping", str(inp.mapping_comma), "--out", str(out),
+        "--max-conns", str(n), "--no-move-index"],
+    "update_moves_from_pokeapi": lambda inp, out, n: [
+        "--pokedex", str(inp.pokedex), "--mapping", str(inp.mapping_comma), "--out", str(out),
+        "--concurrency", str(n), "--no-move-index"],
+}
+
+
+def read_pairs(path: Path, limit: int | None) -> List[Tuple[str, str]]:
+    with path.open("r", encoding="utf-8", newline="") as f:
+        head = f.readline()
+        f.seek(0)
+        reader = csv.DictReader(f, delimiter=";" if ";" in head else ",")
+        pairs = [((r.get("species") or "").strip(), (r.get("othername") or "").strip()) for r in reader]
+    pairs = [(sp, on) for sp, on in pairs if sp and on]
+    return pairs[:limit] if limit else pairs
+
+
+def run_one(standin: BackgroundStandin, script: str, inputs: Inputs, concurrency: int) -> Dict[str, Any]:
+    tag = f"{script}_c{concurrency}"
+    metrics_path = inputs.workdir / f"{tag}.metrics.json"
+    log_path = inputs.workdir / f"{tag}.log"
+    cmd = [sys.executable, str(HERE / f"{script}.py"),
+           *SCRIPTS[script](inputs, inputs.workdir / f"{tag}.out.json", concurrency),
+           "--base-url", standin.server.base_url, "--no-cache", "--metrics-json", str(metrics_path)]
+
+    standin.reset()
+    t0 = time.perf_counter()
+    with log_path.open("w", encoding="utf-8") as log:
+        code = subprocess.call(cmd, cwd=str(HERE), stdout=log, stderr=subprocess.STDOUT)
+    wall = time.perf_counter() - t0
+    stats = standin.stats()
+
+    metrics: Dict[str, Any] = {}
+    if metrics_path.exists():
+        metrics = json.loads(metrics_path.read_text(encoding="utf-8"))
+    pokemon_ep = (metrics.get("endpoints") or {}).get("pokemon") or {}
+    result = {
+        "script": script,
+        "concurrency": concurrency,
+        "exit_code": code,
+        "wall_seconds": round(wall, 2),
+        "server": stats,
+        "ok_per_s": round(stats["served"] / wall, 1) if wall else None,
+        "req_per_s": round(stats["requests"] / wall, 1) if wall else None,
+        "retries": sum((metrics.get("retries") or {}).values()),
+        "backoff_seconds": metrics.get("backoff_seconds"),
+        "pokemon_p50_ms": pokemon_ep.get("p50_ms"),
+        "pokemon_p99_ms": pokemon_ep.get("p99_ms"),
+    }
+    if code != 0:
+        tail = log_path.read_text(encoding="utf-8", errors="replace").splitlines()[-5:]
+        print(f"[warn] {tag} : code {code}\n  " + "\n  ".join(tail), file=sys.stderr)
+    return result
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    cols = [("script", 26), ("concurrency", 5), ("wall_seconds", 8), ("ok_per_s", 8), ("req_per_s", 8),
+            ("429", 6), ("missing", 7), ("retries", 7), ("backoff_seconds", 8), ("pokemon_p50_ms", 7), ("pokemon_p99_ms", 7)]
+    heads = {"concurrency": "conc", "wall_seconds": "wall s", "ok_per_s": "ok/s", "req_per_s": "req/s",
+             "backoff_seconds": "backoff", "pokemon_p50_ms": "p50 ms", "pokemon_p99_ms": "p99 ms"}
+    print("  ".join(f"{heads.get(c, c):>{w}}" if c != "script" else f"{c:<{w}}" for c, w in cols))
+    for r in results:
+        row = dict(r, **{"429": r["server"]["throttled"], "missing": r["server"]["missing"]})
+        print("  ".join(f"{str(row[c] if row[c] is not None else '-'):>{w}}" if c != "script" else f"{row[c]:<{w}}"
+                        for c, w in cols))
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark des scripts PokeAPI contre une cassette rejouée (pokeapi_standin).")
+    p.add_argument("--cassette", required=True, help="Cassette pokeapi_standin (créée/complétée avec --record).")
+    p.add_argument("--record", action="store_true", help="Compléter la cassette depuis PokeAPI pendant les runs.")
+    p.add_argument("--upstream", default=None, help="Amont à enregistrer avec --record (défaut: PokeAPI officiel).")
+    p.add_argument("--scripts", nargs="+", choices=sorted(SCRIPTS), default=list(SCRIPTS), help="Scripts à mesurer.")
+    p.add_argument("--concurrency", type=int, nargs="+", default=[16], help="Niveaux de concurrence à mesurer (défaut: 16).")
+    p.add_argument("--mapping", default=str(DEFAULT_MAPPING), help=f"Mapping species/othername (défaut: {DEFAULT_MAPPING.name}).")
+    p.add_argument("--pokedex", default=str(DEFAULT_POKEDEX), help="Pokédex PTU pour get_gen_lists / update_moves_from_pokeapi.")
+    p.add_argument("--limit", type=int, default=None, help="Ne garder que les N premières lignes du mapping.")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port du serveur local (défaut: {DEFAULT_PORT}).")
+    p.add_argument("--keep", action="store_true", help="Conserver le dossier de travail (sorties, logs, métriques).")
+    p.add_argument("--out", help="Écrire les résultats en JSON.")
+    add_fault_args(p)
+    args = p.parse_args()
+
+    pairs = read_pairs(Path(args.mapping), args.limit)
+    if not pairs:
+        raise SystemExit(f"[err] Mapping vide : {args.mapping}")
+
+    cassette = Cassette(args.cassette)
+    if args.upstream:
+        cassette.set_upstream(args.upstream)
+    server = StandinServer(cassette, faults_from_args(args), record=args.record, port=args.port)
+    workdir = Path(tempfile.mkdtemp(prefix="pokeapi_bench_"))
+    inputs = Inputs(workdir, pairs, Path(args.pokedex))
+    print(f"[info] {len(pairs)} espèces, cassette {args.cassette} ({len(cassette)} réponses), "
+          f"{'enregistrement' if args.record else 'rejeu'}", file=sys.stderr)
+
+    results: List[Dict[str, Any]] = []
+    try:
+        with BackgroundStandin(server) as standin:
+            for script in args.scripts:
+                for n in args.concurrency:
+                    print(f"[info] {script} (concurrence {n})...", file=sys.stderr)
+                    results.append(run_one(standin, script, inputs, n))
+    finally:
+        cassette.close()
+        if args.keep:
+            print(f"[info] Dossier de travail conservé : {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(results)
+    if args.out:
+        doc = {"generated_at": int(time.time()), "species": len(pairs), "faults": vars(faults_from_args(args)),
+               "record": args.record, "results": results}
+        Path(args.out).write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[ok] Résultats écrits : {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pokeapi_cache.py
+----------------
+Cache disque partagé (SQLite) des réponses HTTP PokeAPI, utilisé par les scripts du dossier.
+
+- Stockage "content-addressed" : le corps de chaque réponse est stocké une seule fois
+  (clé sha256, compressé zlib) et référencé par une ou plusieurs URL.
+- TTL par entrée ; une entrée expirée est revalidée via ETag / Last-Modified
+  (If-None-Match / If-Modified-Since) et rafraîchie sur 304.
+- Taille maximale avec éviction LRU (dernier accès).
+- Mode --offline : ne sert que depuis le cache (même expiré), lève OfflineMiss sinon.
+- Thread-safe (inject_legacy_moves utilise un ThreadPoolExecutor).
+
+Utilisation typique dans un fetcher :
+
+    hit = cache.serve(url)              # JSON si entrée fraîche (ou offline), sinon None
+    if hit is not None:
+        return hit
+    headers = cache.validators(url)     # en-têtes conditionnels si entrée expirée
+    ... requête HTTP ...
+    if status == 304:
+        return cache.revalidated(url, resp_headers)
+    if status == 200:
+        cache.store(url, body_bytes, resp_headers)
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent / "pokeapi_cache.sqlite"
+DEFAULT_TTL = 30 * 24 * 3600          # PokeAPI bouge peu : 30 jours
+DEFAULT_MAX_MB = 512
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash  TEXT PRIMARY KEY,
+    body  BLOB NOT NULL,
+    size  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    url           TEXT PRIMARY KEY,
+    hash          TEXT NOT NULL REFERENCES blobs(hash),
+    etag          TEXT,
+    last_modified TEXT,
+    fetched_at    REAL NOT NULL,
+    expires_at    REAL NOT NULL,
+    last_access   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access);
+CREATE INDEX IF NOT EXISTS idx_entries_hash ON entries(hash);
+"""
+
+
+class OfflineMiss(LookupError):
+    """URL absente du cache alors que le mode offline est actif."""
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    hash: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+    body: bytes
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+def _header(headers: Optional[Mapping[str, str]], name: str) -> Optional[str]:
+    if not headers:
+        return None
+    v = headers.get(name)
+    if v is None:
+        v = headers.get(name.lower())
+    return v
+
+
+class ResponseCache:
+    def __init__(self, path: Path | str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024, offline: bool = False):
+        self.path = Path(path)
+        self.ttl = float(ttl)
+        self.max_bytes = int(max_bytes)
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    # --- lecture -----------------------------------------------------------
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT e.hash, e.etag, e.last_modified, e.expires_at, b.body "
+                "FROM entries e JOIN blobs b ON b.hash = e.hash WHERE e.url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), url))
+        h, etag, lm, exp, body = row
+        return CacheEntry(url=url, hash=h, etag=etag, last_modified=lm, expires_at=exp, body=zlib.decompress(body))
+
+    def serve(self, url: str) -> Any:
+        """JSON de l'entrée si fraîche (ou si offline), None s'il faut aller sur le réseau."""
+        entry = self.lookup(url)
+        hit = entry is not None and (entry.fresh or self.offline)
+        with self._lock:  # compteurs partagés entre threads, comme la connexion
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            return entry.json()
+        if self.offline:
+            raise OfflineMiss(f"Absent du cache (mode offline) : {url}")
+        return None
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """En-têtes conditionnels pour revalider une entrée expirée."""
+        entry = self.lookup(url)
+        headers: Dict[str, str] = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    # --- écriture ----------------------------------------------------------
+
+    def store(self, url: str, body: bytes, headers: Optional[Mapping[str, str]] = None) -> None:
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        h = hashlib.sha256(body).hexdigest()
+        now = time.time()
+        expires = now + self.ttl
+        etag = _header(headers, "ETag")
+        lm = _header(headers, "Last-Modified")
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO blobs(hash, body, size) VALUES (?, ?, ?)",
+                    (h, zlib.compress(body, 6), len(body)),
+                )
+                old = self._db.execute("SELECT hash FROM entries WHERE url = ?", (url,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries(url, hash, etag, last_modified, fetched_at, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, h, etag, lm, now, expires, now),
+                )
+                if old and old[0] != h:
+                    self._drop_orphan(old[0])
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= 200:
+                self._writes_since_evict = 0
+                self._evict_locked()
+
+    def revalidated(self, url: str, headers: Optional[Mapping[str, str]] = None) -> Any:
+        """Réponse 304 : prolonge l'entrée et renvoie son JSON."""
+        now = time.time()
+        expires = now + self.ttl
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET expires_at = ?, last_access = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (expires, now, _header(headers, "ETag"), _header(headers, "Last-Modified"), url),
+            )
+            self.revalidations += 1
+        entry = self.lookup(url)
+        if entry is None:
+            raise KeyError(url)
+        return entry.json()
+
+    def _drop_orphan(self, h: str) -> None:
+        still = self._db.execute("SELECT 1 FROM entries WHERE hash = ? LIMIT 1", (h,)).fetchone()
+        if not still:
+            self._db.execute("DELETE FROM blobs WHERE hash = ?", (h,))
+
+    # --- maintenance -------------------------------------------------------
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return int(self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0])
+
+    def _evict_locked(self) -> int:
+        total = int(self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0])
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        rows = self._db.execute("SELECT url, hash FROM entries ORDER BY last_access ASC").fetchall()
+        self._db.execute("BEGIN")
+        try:
+            for url, h in rows:
+                if total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+                size = self._db.execute("SELECT size FROM blobs WHERE hash = ?", (h,)).fetchone()
+                still = self._db.execute("SELECT 1 FROM entries WHERE hash = ? LIMIT 1", (h,)).fetchone()
+                if size and not still:
+                    self._db.execute("DELETE FROM blobs WHERE hash = ?", (h,))
+                    total -= int(size[0])
+                removed += 1
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return removed
+
+    def evict(self) -> int:
+        """Supprime les entrées les moins récemment utilisées jusqu'à repasser sous max_bytes."""
+        with self._lock:
+            return self._evict_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            n = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "entries": n,
+            "bytes": self.total_bytes(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._evict_locked()
+            self._db.close()
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+# --- Intégration CLI ----------------------------------------------------------
+
+def add_cache_args(p: argparse.ArgumentParser) -> None:
+    g = p.add_argument_group("cache PokeAPI")
+    g.add_argument("--cache-db", default=str(DEFAULT_CACHE_PATH),
+                   help=f"Base SQLite du cache HTTP partagé (défaut: {DEFAULT_CACHE_PATH.name}).")
+    g.add_argument("--no-cache", action="store_true", help="Désactiver le cache disque.")
+    g.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL / 86400,
+                   help="Durée de validité des entrées, en jours (défaut: 30).")
+    g.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_MB,
+                   help=f"Taille max du cache avant éviction LRU (défaut: {DEFAULT_MAX_MB} Mo).")
+    g.add_argument("--offline", action="store_true",
+                   help="Ne rien télécharger : servir uniquement depuis le cache.")
+
+
+def cache_from_args(args: argparse.Namespace) -> Optional[ResponseCache]:
+    if getattr(args, "no_cache", False):
+        if getattr(args, "offline", False):
+            raise SystemExit("[err] --offline nécessite le cache (incompatible avec --no-cache).")
+        return None
+    return ResponseCache(
+        path=args.cache_db,
+        ttl=float(args.cache_ttl) * 86400,
+        max_bytes=int(args.cache_max_mb) * 1024 * 1024,
+        offline=bool(args.offline),
+    )
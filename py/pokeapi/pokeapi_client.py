@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pokeapi_client.py
+-----------------
+Client PokeAPI asynchrone unique, partagé par tous les scripts du dossier.
+
+- Session aiohttp keep-alive (pool de connexions TCP réutilisées, cache DNS).
+- Concurrence adaptative AIMD : +1 slot par "fenêtre" de succès, x0.5 sur 429/503,
+  pause globale sur Retry-After, puis remontée progressive jusqu'à --concurrency.
+- Token bucket optionnel (--rate req/s, --burst) pour lisser le débit.
+- Politique de retry uniforme : 429/5xx/erreurs réseau, backoff exponentiel avec jitter,
+  respect de Retry-After (secondes ou date HTTP).
+- Single-flight : les appels concurrents sur une même URL partagent une seule requête en vol
+  (client.flight.coalesced compte les requêtes dupliquées évitées).
+- Branche le dump local (pokeapi_dump) et le cache disque (pokeapi_cache) avant le réseau.
+- Instrumentation (pokeapi_metrics) : latences par endpoint, retries, backoff, provenance, concurrence.
+
+    cfg = ClientConfig(max_concurrency=64, rate=0, cache=cache, dump=dump)
+    async with PokeApiClient(cfg) as client:
+        data = await client.get_json("pokemon/bulbasaur")
+
+Pour les scripts synchrones (threads + requests jusqu'ici) : fetch_many_sync(urls, cfg).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:
+    print("Ce script requiert le paquet 'aiohttp' (pip install aiohttp).", file=sys.stderr)
+    sys.exit(1)
+
+from pokeapi_cache import ResponseCache
+from pokeapi_dump import DumpBackend
+from pokeapi_metrics import FetchMetrics
+
+POKEAPI = "https://pokeapi.co/api/v2"
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+class PokeApiError(RuntimeError):
+    def __init__(self, status: int, url: str, message: str = ""):
+        super().__init__(f"GET {url} -> {status}: {message}" if message else f"GET {url} -> {status}")
+        self.status = status
+        self.url = url
+
+
+class NotFound(PokeApiError):
+    """404 : ressource inexistante côté PokeAPI (pas de retry)."""
+
+
+@dataclass
+class RetryPolicy:
+    retries: int = 4
+    backoff: float = 0.8
+    max_backoff: float = 30.0
+    statuses: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Backoff exponentiel à jitter "égal" ; Retry-After prioritaire s'il est fourni."""
+        if retry_after is not None:
+            return min(self.max_backoff, retry_after) + random.uniform(0, self.backoff)
+        cap = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return cap / 2 + random.uniform(0, cap / 2)
+
+
+@dataclass
+class ClientConfig:
+    base_url: str = POKEAPI
+    timeout: float = 20
+    max_concurrency: int = 32
+    min_concurrency: int = 2
+    initial_concurrency: Optional[int] = None   # défaut: max_concurrency // 2
+    rate: float = 0.0                            # req/s, 0 = pas de token bucket
+    burst: int = 0                               # défaut: max_concurrency
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    user_agent: str = "ptu-data-pokeapi/2.0 (+https://pokeapi.co)"
+    cache: Optional[ResponseCache] = None
+    dump: Optional[DumpBackend] = None
+    metrics: Optional[FetchMetrics] = None       # partagé entre clients ; rapport via pokeapi_metrics
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = float(rate)
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AIMDLimiter:
+    """Sémaphore à capacité variable (additive increase / multiplicative decrease)."""
+
+    def __init__(self, initial: int, minimum: int, maximum: int, decrease: float = 0.5, cooldown: float = 1.0):
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limit = float(min(self.maximum, max(self.minimum, initial)))
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.inflight = 0
+        self.throttles = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self) -> "AIMDLimiter":
+        while True:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            async with self._cond:
+                if self.inflight < int(self.limit) and self._paused_until <= time.monotonic():
+                    self.inflight += 1
+                    return self
+                await self._cond.wait()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        async with self._cond:
+            self.inflight -= 1
+            self._cond.notify()
+
+    def on_success(self) -> None:
+        before = int(self.limit)
+        self.limit = min(float(self.maximum), self.limit + 1.0 / max(1.0, self.limit))
+        if int(self.limit) > before:
+            asyncio.ensure_future(self._wake())
+
+    def on_throttle(self, retry_after: Optional[float]) -> None:
+        now = time.monotonic()
+        self.throttles += 1
+        if now - self._last_decrease >= self.cooldown:
+            self.limit = max(float(self.minimum), self.limit * self.decrease)
+            self._last_decrease = now
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+
+    async def _wake(self) -> None:
+        async with self._cond:
+            self._cond.notify_all()
+
+
+class SingleFlight:
+    """Coalesce les appels concurrents d'une même clé sur un seul future en vol."""
+
+    def __init__(self, on_coalesce: Optional[Callable[[], None]] = None):
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self.coalesced = 0
+        self._on_coalesce = on_coalesce
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            if self._on_coalesce is not None:
+                self._on_coalesce()
+        else:
+            fut = asyncio.ensure_future(factory())
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda f, k=key: self._forget(k, f))
+        # shield : l'annulation d'un appelant n'annule pas la requête partagée
+        return await asyncio.shield(fut)
+
+    def _forget(self, key: str, fut: "asyncio.Future[Any]") -> None:
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+        if not fut.cancelled():
+            fut.exception()  # évite "exception was never retrieved" si tous les appelants ont abandonné
+
+
+class PokeApiClient:
+    def __init__(self, cfg: Optional[ClientConfig] = None):
+        self.cfg = cfg or ClientConfig()
+        init = self.cfg.initial_concurrency or max(self.cfg.min_concurrency, self.cfg.max_concurrency // 2)
+        self.limiter = AIMDLimiter(init, self.cfg.min_concurrency, self.cfg.max_concurrency)
+        self.bucket = TokenBucket(self.cfg.rate, self.cfg.burst or self.cfg.max_concurrency)
+        self.requests = 0
+        self.retries = 0
+        self.metrics = self.cfg.metrics or FetchMetrics()
+        self.flight = SingleFlight(lambda: self.metrics.source("coalesced"))
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._sampler: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "PokeApiClient":
+        connector = aiohttp.TCPConnector(
+            limit=self.cfg.max_concurrency,
+            keepalive_timeout=60,
+            ttl_dns_cache=600,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.cfg.timeout),
+            headers={"User-Agent": self.cfg.user_agent},
+        )
+        if self.cfg.metrics is not None:
+            self._sampler = asyncio.ensure_future(self._sample_loop())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._sampler is not None:
+            self._sampler.cancel()
+            self._sampler = None
+            self.metrics.sample(self.limiter.inflight, int(self.limiter.limit))
+            self.metrics.end_progress()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _sample_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.metrics.sample_interval)
+            self.metrics.sample(self.limiter.inflight, int(self.limiter.limit))
+
+    def url(self, path_or_url: str) -> str:
+        if path_or_url.startswith(("http://", "https://")):
+            return path_or_url
+        return f"{self.cfg.base_url.rstrip('/')}/{path_or_url.lstrip('/')}"
+
+    async def get_json(self, path_or_url: str) -> Any:
+        """JSON de l'URL ; lève NotFound (404), PokeApiError (autres statuts / retries épuisés), OfflineMiss."""
+        url = self.url(path_or_url)
+        return await self.flight.do(url, lambda: self._fetch_json(url))
+
+    async def _fetch_json(self, url: str) -> Any:
+        cfg = self.cfg
+        m = self.metrics
+        if cfg.dump is not None:
+            local = cfg.dump.get_json(url)
+            if local is not None:
+                m.source("dump")
+                return local
+        cond_headers: Dict[str, str] = {}
+        if cfg.cache is not None:
+            hit = cfg.cache.serve(url)
+            if hit is not None:
+                m.source("cache")
+                return hit
+            m.cache_missed()
+            cond_headers = cfg.cache.validators(url)
+
+        status, body, headers = await self.request(url, cond_headers)
+        if status == 304 and cond_headers:
+            m.source("revalidated")
+            return cfg.cache.revalidated(url, headers)
+        if status == 200:
+            m.source("network")
+            if cfg.cache is not None:
+                cfg.cache.store(url, body, headers)
+            t1 = time.perf_counter()
+            data = json.loads(body)
+            m.decoded(time.perf_counter() - t1)
+            return data
+        err = NotFound if status == 404 else PokeApiError
+        raise err(status, url, body.decode("utf-8", errors="replace")[:200])
+
+    async def request(self, path_or_url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes, Any]:
+        """
+        GET brut avec limiteur, token bucket, retries et métriques, sans cache ni dump :
+        (statut, corps, en-têtes) pour tout statut non retryable (200, 304, 404...) ;
+        lève PokeApiError une fois les retries épuisés.
+        """
+        url = self.url(path_or_url)
+        m = self.metrics
+        policy = self.cfg.retry
+        last: Any = None
+        for attempt in range(policy.retries + 1):
+            delay: Optional[float] = None
+            cause = ""
+            t_wait = time.perf_counter()
+            await self.bucket.acquire()
+            async with self.limiter:
+                self.requests += 1
+                t0 = time.perf_counter()
+                m.waited(t0 - t_wait)
+                try:
+                    async with self._session.get(url, headers=headers or {}) as resp:
+                        status = resp.status
+                        if status not in policy.statuses:
+                            body = await resp.read()
+                            m.response(url, status, time.perf_counter() - t0, len(body) if status == 200 else 0)
+                            if status in (200, 304):
+                                self.limiter.on_success()
+                            return status, body, resp.headers
+                        m.response(url, status, time.perf_counter() - t0)
+                        ra = parse_retry_after(resp.headers.get("Retry-After"))
+                        if status in THROTTLE_STATUSES:
+                            self.limiter.on_throttle(ra)
+                        delay = policy.delay(attempt, ra)
+                        last = f"HTTP {status}"
+                        cause = str(status)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    m.error(url, e, time.perf_counter() - t0)
+                    last = e
+                    delay = policy.delay(attempt)
+                    cause = type(e).__name__
+            if attempt < policy.retries:
+                self.retries += 1
+                m.retry(cause, delay or 0)
+                await asyncio.sleep(delay or 0)
+        raise PokeApiError(0, url, f"échec après {policy.retries} retries (dernier: {last})")
+
+    async def get_json_or_none(self, path_or_url: str) -> Optional[Any]:
+        try:
+            return await self.get_json(path_or_url)
+        except Exception:
+            return None
+
+    async def get_status(self, path_or_url: str) -> Tuple[int, Optional[Any]]:
+        """(statut, JSON) sans lever : 200 si trouvé, 404/autre sinon, 0 si erreur réseau."""
+        try:
+            return 200, await self.get_json(path_or_url)
+        except PokeApiError as e:
+            return e.status, None
+        except LookupError:
+            return 0, None
+
+    async def get_many(self, urls: Iterable[str]) -> Dict[str, Optional[Any]]:
+        urls = list(dict.fromkeys(urls))
+        res = await asyncio.gather(*(self.get_json_or_none(u) for u in urls))
+        return dict(zip(urls, res))
+
+    # Raccourcis
+    async def get_pokemon(self, name: str) -> Any:
+        return await self.get_json(f"pokemon/{name.strip().lower()}/")
+
+    async def get_species(self, name_or_url: str) -> Any:
+        return await self.get_json(name_or_url if "://" in name_or_url else f"pokemon-species/{name_or_url.strip().lower()}/")
+
+    async def get_move(self, name: str) -> Any:
+        return await self.get_json(f"move/{name.strip().lower()}/")
+
+
+def fetch_many_sync(urls: Iterable[str], cfg: Optional[ClientConfig] = None) -> Dict[str, Optional[Any]]:
+    """Version bloquante pour les scripts synchrones : {url: JSON ou None}."""
+    async def run() -> Dict[str, Optional[Any]]:
+        async with PokeApiClient(cfg) as client:
+            return await client.get_many(urls)
+    return asyncio.run(run())
+
+
+def add_throttle_args(p: argparse.ArgumentParser) -> None:
+    g = p.add_argument_group("débit PokeAPI")
+    g.add_argument("--rate", type=float, default=0.0, help="Débit max en requêtes/s (token bucket, 0 = illimité).")
+    g.add_argument("--burst", type=int, default=0, help="Rafale max du token bucket (défaut: concurrence).")
+    g.add_argument("--min-concurrency", type=int, default=2,
+                   help="Plancher de la concurrence adaptative après des 429/503 (défaut: 2).")
+
+
+def throttle_kwargs(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "rate": float(getattr(args, "rate", 0.0) or 0.0),
+        "burst": int(getattr(args, "burst", 0) or 0),
+        "min_concurrency": max(1, int(getattr(args, "min_concurrency", 2) or 2)),
+    }
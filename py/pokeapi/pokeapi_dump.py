@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pokeapi_dump.py
+---------------
+Backend PokeAPI hors-ligne construit à partir du dump CSV officiel
+(https://github.com/PokeAPI/pokeapi/tree/master/data/v2/csv).
+
+1) Construction (une fois, quelques secondes) :
+    python pokeapi_dump.py build --dump-dir /chemin/pokeapi/data/v2/csv --db pokeapi_dump.sqlite
+
+2) Utilisation dans les scripts (sv_moves_summary, update_moves_from_pokeapi, get_gen_lists,
+   inject_legacy_moves, get_missing_moves_gen8to9) :
+    --dump-db pokeapi_dump.sqlite
+
+   Chaque URL PokeAPI (/pokemon, /pokemon-species, /evolution-chain, /move, liste /pokemon)
+   est alors servie par DumpBackend.get_json() à partir de jointures locales, au même format
+   que l'API ; le réseau (et le cache HTTP) n'est utilisé que pour ce que le dump ne couvre pas.
+
+Requêtes directes disponibles : learnset(), evolution_stage(), move_info(), gender_rate().
+
+3) Petites vérifications :
+    python pokeapi_dump.py query --db pokeapi_dump.sqlite --pokemon rotom-wash --vg scarlet-violet
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+POKEAPI = "https://pokeapi.co/api/v2"
+DEFAULT_DUMP_DB = Path(__file__).resolve().parent / "pokeapi_dump.sqlite"
+EN_LANGUAGE_ID = 9
+
+# Fichiers du dump chargés, avec leurs index.
+TABLES: Dict[str, List[str]] = {
+    "pokemon": ["identifier", "species_id"],
+    "pokemon_species": ["identifier", "evolution_chain_id", "evolves_from_species_id"],
+    "pokemon_moves": ["pokemon_id, version_group_id", "move_id"],
+    "pokemon_move_methods": [],
+    "pokemon_stats": ["pokemon_id"],
+    "pokemon_types": ["pokemon_id"],
+    "pokemon_evolution": ["evolved_species_id"],
+    "evolution_chains": [],
+    "evolution_triggers": [],
+    "moves": ["identifier"],
+    "move_names": ["move_id, local_language_id"],
+    "move_damage_classes": [],
+    "pokemon_species_names": ["pokemon_species_id, local_language_id"],
+    "version_groups": ["identifier"],
+    "generations": [],
+    "types": [],
+    "stats": [],
+    "items": [],
+}
+REQUIRED = {"pokemon", "pokemon_species", "pokemon_moves", "pokemon_move_methods", "moves", "version_groups"}
+
+
+def _coerce(v: str) -> Any:
+    if v == "":
+        return None
+    if v.isdigit() or (v[:1] == "-" and v[1:].isdigit()):
+        return int(v)
+    return v
+
+
+def build_dump_db(dump_dir: Path, db_path: Path) -> Dict[str, int]:
+    """Ingère les CSV du dump dans une base SQLite indexée. Retourne {table: nb_lignes}."""
+    dump_dir = Path(dump_dir)
+    db_path = Path(db_path)
+    tmp = db_path.with_suffix(db_path.suffix + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+    db = sqlite3.connect(str(tmp))
+    db.execute("PRAGMA journal_mode=OFF")
+    db.execute("PRAGMA synchronous=OFF")
+    counts: Dict[str, int] = {}
+    for table, indexes in TABLES.items():
+        path = dump_dir / f"{table}.csv"
+        if not path.exists():
+            if table in REQUIRED:
+                db.close()
+                tmp.unlink()
+                raise FileNotFoundError(f"Fichier du dump manquant : {path}")
+            print(f"[warn] {path.name} absent du dump, ignoré.", file=sys.stderr)
+            continue
+        with path.open("r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            cols = ", ".join(f'"{c}"' for c in header)
+            db.execute(f'CREATE TABLE "{table}" ({cols})')
+            marks = ", ".join("?" for _ in header)
+            rows = ([_coerce(v) for v in row] for row in reader if row)
+            db.executemany(f'INSERT INTO "{table}" VALUES ({marks})', rows)
+        for i, idx_cols in enumerate(indexes):
+            db.execute(f'CREATE INDEX "idx_{table}_{i}" ON "{table}" ({idx_cols})')
+        if "id" in header:
+            db.execute(f'CREATE INDEX "idx_{table}_id" ON "{table}" (id)')
+        counts[table] = db.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+    db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+    db.execute("INSERT INTO meta VALUES ('built_at', ?), ('source', ?)", (str(int(time.time())), str(dump_dir)))
+    db.commit()
+    db.close()
+    tmp.replace(db_path)
+    return counts
+
+
+def _ref(resource: str, name: Optional[str], rid: Optional[int]) -> Optional[Dict[str, str]]:
+    if name is None:
+        return None
+    return {"name": name, "url": f"{POKEAPI}/{resource}/{rid}/"}
+
+
+class DumpBackend:
+    """Répond aux requêtes PokeAPI usuelles à partir de la base construite par build_dump_db()."""
+
+    def __init__(self, db_path: Path | str = DEFAULT_DUMP_DB):
+        self.path = Path(db_path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Base du dump introuvable : {self.path} (lancer 'pokeapi_dump.py build')")
+        self._db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.served = 0
+        self._tables = {r[0] for r in self._q("SELECT name FROM sqlite_master WHERE type='table'")}
+
+    def _q(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _one(self, sql: str, params: Tuple = ()) -> Optional[Tuple]:
+        rows = self._q(sql, params)
+        return rows[0] if rows else None
+
+    def _resolve_id(self, table: str, key: Any) -> Optional[Tuple[int, str]]:
+        key = str(key).strip().lower()
+        if key.isdigit():
+            row = self._one(f'SELECT id, identifier FROM "{table}" WHERE id = ?', (int(key),))
+        else:
+            row = self._one(f'SELECT id, identifier FROM "{table}" WHERE identifier = ?', (key,))
+        return (row[0], row[1]) if row else None
+
+    # --- requêtes directes ---------------------------------------------------
+
+    def learnset(self, pokemon: str, version_group: str) -> List[Dict[str, Any]]:
+        """[{name, method, level}] pour un /pokemon et un version_group, dans l'ordre du dump."""
+        rows = self._q(
+            "SELECT m.identifier, mm.identifier, pm.level "
+            "FROM pokemon p "
+            "JOIN pokemon_moves pm ON pm.pokemon_id = p.id "
+            "JOIN version_groups vg ON vg.id = pm.version_group_id "
+            "JOIN moves m ON m.id = pm.move_id "
+            "JOIN pokemon_move_methods mm ON mm.id = pm.pokemon_move_method_id "
+            "WHERE p.identifier = ? AND vg.identifier = ? "
+            "ORDER BY pm.rowid",
+            (pokemon.strip().lower(), version_group),
+        )
+        return [{"name": n, "method": meth, "level": lvl or 0} for n, meth, lvl in rows]
+
+    def evolution_stage(self, species: str) -> int:
+        """Stade 0-based dans la chaîne (même convention que compute_stage_from_chain), -1 si inconnu."""
+        ident = self._resolve_id("pokemon_species", species)
+        if ident is None:
+            return -1
+        depth, sid = 0, ident[0]
+        while True:
+            row = self._one("SELECT evolves_from_species_id FROM pokemon_species WHERE id = ?", (sid,))
+            if not row or row[0] is None:
+                return depth
+            sid = row[0]
+            depth += 1
+
+    def species_ids(self) -> List[int]:
+        return [r[0] for r in self._q("SELECT id FROM pokemon_species ORDER BY id")]
+
+    def species_numbers(self) -> Dict[str, int]:
+        """{species: numéro national (id)} pour toutes les espèces."""
+        return {n: i for i, n in self._q("SELECT id, identifier FROM pokemon_species ORDER BY id")}
+
+    def species_flags(self) -> Dict[str, Dict[str, bool]]:
+        """{species: {is_legendary, is_mythical}} pour toutes les espèces, en une requête."""
+        rows = self._q("SELECT identifier, is_legendary, is_mythical FROM pokemon_species ORDER BY id")
+        return {n: {"is_legendary": bool(leg), "is_mythical": bool(myth)} for n, leg, myth in rows}
+
+    def pokemon_names(self) -> List[Dict[str, Any]]:
+        """Tous les /pokemon/ par id : {name, species, is_default, species_en} (construction de pokeapi_names)."""
+        en = ("(SELECT name FROM pokemon_species_names WHERE pokemon_species_id = s.id AND local_language_id = ?)"
+              if "pokemon_species_names" in self._tables else "NULL")
+        rows = self._q(
+            f"SELECT p.identifier, s.identifier, p.is_default, {en} FROM pokemon p "
+            f"JOIN pokemon_species s ON s.id = p.species_id ORDER BY p.id",
+            (EN_LANGUAGE_ID,) if en != "NULL" else (),
+        )
+        return [{"name": r[0], "species": r[1], "is_default": bool(r[2]), "species_en": r[3]} for r in rows]
+
+    def gender_rate(self, species: str) -> Optional[int]:
+        row = self._one("SELECT gender_rate FROM pokemon_species WHERE identifier = ?", (species.strip().lower(),))
+        return row[0] if row else None
+
+    def move_info(self, move: Any) -> Optional[Dict[str, Any]]:
+        """{name, type, name_en, damage_class, generation} pour un slug ou un id de move."""
+        ident = self._resolve_id("moves", move)
+        if ident is None:
+            return None
+        mid = ident[0]
+        row = self._one(
+            "SELECT m.identifier, t.identifier, dc.identifier, m.generation_id, "
+            "(SELECT name FROM move_names WHERE move_id = m.id AND local_language_id = ?) "
+            "FROM moves m LEFT JOIN types t ON t.id = m.type_id "
+            "LEFT JOIN move_damage_classes dc ON dc.id = m.damage_class_id WHERE m.id = ?",
+            (EN_LANGUAGE_ID, mid),
+        )
+        if row is None:
+            return None
+        return {"name": row[0], "type": row[1], "damage_class": row[2], "generation": row[3], "name_en": row[4]}
+
+    def move_infos(self) -> List[Dict[str, Any]]:
+        """move_info() de tous les moves du dump, en une requête (construction de pokeapi_moves)."""
+        rows = self._q(
+            "SELECT m.id, m.identifier, t.identifier, dc.identifier, m.generation_id, "
+            "(SELECT name FROM move_names WHERE move_id = m.id AND local_language_id = ?) "
+            "FROM moves m LEFT JOIN types t ON t.id = m.type_id "
+            "LEFT JOIN move_damage_classes dc ON dc.id = m.damage_class_id ORDER BY m.id",
+            (EN_LANGUAGE_ID,),
+        )
+        return [
+            {"id": r[0], "name": r[1], "type": r[2], "damage_class": r[3], "generation": r[4], "name_en": r[5]}
+            for r in rows
+        ]
+
+    # --- payloads au format PokeAPI -----------------------------------------
+
+    def pokemon_json(self, key: Any) -> Optional[Dict[str, Any]]:
+        ident = self._resolve_id("pokemon", key)
+        if ident is None:
+            return None
+        pid, name = ident
+        prow = self._one(
+            "SELECT p.is_default, p.height, p.weight, p.base_experience, p.\"order\", s.id, s.identifier "
+            "FROM pokemon p JOIN pokemon_species s ON s.id = p.species_id WHERE p.id = ?",
+            (pid,),
+        )
+        is_default, height, weight, base_xp, order, sid, sname = prow
+        stats = [
+            {"base_stat": bs, "effort": eff, "stat": _ref("stat", st, stid)}
+            for bs, eff, st, stid in self._q(
+                "SELECT ps.base_stat, ps.effort, s.identifier, s.id FROM pokemon_stats ps "
+                "JOIN stats s ON s.id = ps.stat_id WHERE ps.pokemon_id = ? ORDER BY s.id", (pid,))
+        ] if "pokemon_stats" in self._tables else []
+        types = [
+            {"slot": slot, "type": _ref("type", t, tid)}
+            for slot, t, tid in self._q(
+                "SELECT pt.slot, t.identifier, t.id FROM pokemon_types pt "
+                "JOIN types t ON t.id = pt.type_id WHERE pt.pokemon_id = ? ORDER BY pt.slot", (pid,))
+        ] if "pokemon_types" in self._tables else []
+
+        moves: Dict[int, Dict[str, Any]] = {}
+        for mid, mname, vgid, vgname, mmid, mmname, level, order_ in self._q(
+            "SELECT m.id, m.identifier, vg.id, vg.identifier, mm.id, mm.identifier, pm.level, pm.\"order\" "
+            "FROM pokemon_moves pm JOIN moves m ON m.id = pm.move_id "
+            "JOIN version_groups vg ON vg.id = pm.version_group_id "
+            "JOIN pokemon_move_methods mm ON mm.id = pm.pokemon_move_method_id "
+            "WHERE pm.pokemon_id = ? ORDER BY pm.rowid", (pid,)
+        ):
+            entry = moves.get(mid)
+            if entry is None:
+                entry = moves[mid] = {"move": _ref("move", mname, mid), "version_group_details": []}
+            entry["version_group_details"].append({
+                "level_learned_at": level or 0,
+                "move_learn_method": _ref("move-learn-method", mmname, mmid),
+                "order": order_,
+                "version_group": _ref("version-group", vgname, vgid),
+            })
+        return {
+            "id": pid,
+            "name": name,
+            "is_default": bool(is_default),
+            "height": height,
+            "weight": weight,
+            "base_experience": base_xp,
+            "order": order,
+            "species": _ref("pokemon-species", sname, sid),
+            "stats": stats,
+            "types": types,
+            "moves": list(moves.values()),
+        }
+
+    def species_json(self, key: Any) -> Optional[Dict[str, Any]]:
+        ident = self._resolve_id("pokemon_species", key)
+        if ident is None:
+            return None
+        sid, name = ident
+        row = self._one(
+            "SELECT s.gender_rate, s.evolution_chain_id, s.evolves_from_species_id, p.identifier, "
+            "s.is_legendary, s.is_mythical, s.is_baby, s.generation_id, s.\"order\", s.capture_rate "
+            "FROM pokemon_species s LEFT JOIN pokemon_species p ON p.id = s.evolves_from_species_id "
+            "WHERE s.id = ?", (sid,))
+        gr, chain_id, from_id, from_name, legendary, mythical, baby, gen_id, order, capture = row
+        varieties = [
+            {"is_default": bool(d), "pokemon": _ref("pokemon", n, pid)}
+            for pid, n, d in self._q(
+                "SELECT id, identifier, is_default FROM pokemon WHERE species_id = ? ORDER BY is_default DESC, id", (sid,))
+        ]
+        names: List[Dict[str, Any]] = []
+        if "pokemon_species_names" in self._tables:
+            r = self._one("SELECT name FROM pokemon_species_names WHERE pokemon_species_id = ? AND local_language_id = ?",
+                          (sid, EN_LANGUAGE_ID))
+            if r:
+                names.append({"language": {"name": "en", "url": f"{POKEAPI}/language/{EN_LANGUAGE_ID}/"}, "name": r[0]})
+        gen = self._one("SELECT identifier FROM generations WHERE id = ?", (gen_id,)) if "generations" in self._tables else None
+        return {
+            "id": sid,
+            "name": name,
+            "order": order,
+            "gender_rate": gr,
+            "capture_rate": capture,
+            "is_baby": bool(baby),
+            "is_legendary": bool(legendary),
+            "is_mythical": bool(mythical),
+            "generation": _ref("generation", gen[0], gen_id) if gen else None,
+            "evolves_from_species": _ref("pokemon-species", from_name, from_id),
+            "evolution_chain": {"url": f"{POKEAPI}/evolution-chain/{chain_id}/"} if chain_id else None,
+            "varieties": varieties,
+            "names": names,
+        }
+
+    def evolution_chain_json(self, chain_id: Any) -> Optional[Dict[str, Any]]:
+        try:
+            cid = int(chain_id)
+        except (TypeError, ValueError):
+            return None
+        members = self._q(
+            "SELECT id, identifier, evolves_from_species_id, is_baby FROM pokemon_species "
+            "WHERE evolution_chain_id = ? ORDER BY \"order\", id", (cid,))
+        if not members:
+            return None
+        details: Dict[int, List[Dict[str, Any]]] = {}
+        if "pokemon_evolution" in self._tables:
+            trig = "LEFT JOIN evolution_triggers t ON t.id = e.evolution_trigger_id" if "evolution_triggers" in self._tables else ""
+            trig_col = "t.identifier" if trig else "NULL"
+            item = "LEFT JOIN items i ON i.id = e.trigger_item_id" if "items" in self._tables else ""
+            item_col = "i.identifier" if item else "NULL"
+            for sid, tname, min_level, iname in self._q(
+                f"SELECT e.evolved_species_id, {trig_col}, e.minimum_level, {item_col} "
+                f"FROM pokemon_evolution e {trig} {item} "
+                f"WHERE e.evolved_species_id IN (SELECT id FROM pokemon_species WHERE evolution_chain_id = ?) "
+                f"ORDER BY e.id", (cid,)
+            ):
+                details.setdefault(sid, []).append({
+                    "trigger": {"name": tname} if tname else None,
+                    "min_level": min_level,
+                    "item": {"name": iname} if iname else None,
+                })
+        children: Dict[Optional[int], List[Tuple[int, str, Any]]] = {}
+        for sid, ident, from_id, baby in members:
+            children.setdefault(from_id, []).append((sid, ident, baby))
+
+        def node(sid: int, ident: str, baby: Any) -> Dict[str, Any]:
+            return {
+                "is_baby": bool(baby),
+                "species": _ref("pokemon-species", ident, sid),
+                "evolution_details": details.get(sid, []),
+                "evolves_to": [node(*c) for c in children.get(sid, [])],
+            }
+
+        member_ids = {m[0] for m in members}
+        roots = [m for m in members if m[2] is None or m[2] not in member_ids]
+        if not roots:
+            return None
+        return {"id": cid, "chain": node(roots[0][0], roots[0][1], roots[0][3])}
+
+    def move_json(self, key: Any) -> Optional[Dict[str, Any]]:
+        ident = self._resolve_id("moves", key)
+        if ident is None:
+            return None
+        mid, name = ident
+        row = self._one(
+            "SELECT m.power, m.pp, m.accuracy, m.priority, m.generation_id, t.id, t.identifier, dc.id, dc.identifier "
+            "FROM moves m LEFT JOIN types t ON t.id = m.type_id "
+            "LEFT JOIN move_damage_classes dc ON dc.id = m.damage_class_id WHERE m.id = ?", (mid,))
+        power, pp, acc, prio, gen_id, tid, tname, dcid, dcname = row
+        names = [
+            {"language": {"name": "en", "url": f"{POKEAPI}/language/{EN_LANGUAGE_ID}/"}, "name": n}
+            for (n,) in self._q("SELECT name FROM move_names WHERE move_id = ? AND local_language_id = ?",
+                                (mid, EN_LANGUAGE_ID))
+        ]
+        gen = self._one("SELECT identifier FROM generations WHERE id = ?", (gen_id,)) if "generations" in self._tables else None
+        return {
+            "id": mid,
+            "name": name,
+            "power": power,
+            "pp": pp,
+            "accuracy": acc,
+            "priority": prio,
+            "type": _ref("type", tname, tid),
+            "damage_class": _ref("move-damage-class", dcname, dcid),
+            "generation": _ref("generation", gen[0], gen_id) if gen else None,
+            "names": names,
+        }
+
+    def pokemon_list_json(self) -> Dict[str, Any]:
+        rows = self._q("SELECT id, identifier FROM pokemon ORDER BY id")
+        return {
+            "count": len(rows),
+            "next": None,
+            "previous": None,
+            "results": [{"name": n, "url": f"{POKEAPI}/pokemon/{pid}/"} for pid, n in rows],
+        }
+
+    def get_json(self, url: str) -> Optional[Dict[str, Any]]:
+        """Payload PokeAPI pour une URL (quelle que soit la base), ou None si non couvert par le dump."""
+        path = url.split("?", 1)[0].rstrip("/")
+        parts = path.split("/")
+        if len(parts) < 2:
+            return None
+        resource, key = parts[-2], parts[-1]
+        if key == "pokemon":
+            data = self.pokemon_list_json()
+            query = url.split("?", 1)[1] if "?" in url else ""
+            q = dict(kv.split("=", 1) for kv in query.split("&") if "=" in kv)
+            try:
+                off = int(q.get("offset", 0))
+                lim = int(q.get("limit", 20))
+            except ValueError:
+                off, lim = 0, 20
+            data["results"] = data["results"][off:off + lim]
+        elif resource == "pokemon":
+            data = self.pokemon_json(key)
+        elif resource == "pokemon-species":
+            data = self.species_json(key)
+        elif resource == "evolution-chain":
+            data = self.evolution_chain_json(key)
+        elif resource == "move":
+            data = self.move_json(key)
+        else:
+            return None
+        if data is not None:
+            self.served += 1
+        return data
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+# --- Intégration CLI ----------------------------------------------------------
+
+def add_dump_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--dump-db", default=None,
+                   help="Base SQLite construite depuis le dump CSV PokeAPI (pokeapi_dump.py build) : "
+                        "répond localement au lieu d'interroger l'API.")
+
+
+def dump_from_args(args: argparse.Namespace) -> Optional[DumpBackend]:
+    if not getattr(args, "dump_db", None):
+        return None
+    return DumpBackend(args.dump_db)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Construit/interroge la base locale issue du dump CSV PokeAPI.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("build", help="Ingérer le dump CSV dans une base SQLite indexée.")
+    b.add_argument("--dump-dir", required=True, help="Dossier data/v2/csv du dépôt PokeAPI.")
+    b.add_argument("--db", default=str(DEFAULT_DUMP_DB), help=f"Base de sortie (défaut: {DEFAULT_DUMP_DB.name}).")
+
+    q = sub.add_parser("query", help="Afficher un learnset / stade / move depuis la base.")
+    q.add_argument("--db", default=str(DEFAULT_DUMP_DB))
+    q.add_argument("--pokemon", help="Nom /pokemon/ (ex: rotom-wash).")
+    q.add_argument("--vg", default="scarlet-violet", help="Version group (défaut: scarlet-violet).")
+    q.add_argument("--species", help="Nom /pokemon-species/ pour stade et gender_rate.")
+    q.add_argument("--move", help="Slug de move.")
+
+    args = p.parse_args()
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        counts = build_dump_db(Path(args.dump_dir), Path(args.db))
+        for t, n in counts.items():
+            print(f"  {t:<24} {n:>8}", file=sys.stderr)
+        print(f"[ok] Base écrite : {args.db} ({time.perf_counter() - t0:.1f}s)", file=sys.stderr)
+        return
+
+    be = DumpBackend(args.db)
+    out: Dict[str, Any] = {}
+    if args.pokemon:
+        out["learnset"] = be.learnset(args.pokemon, args.vg)
+    if args.species:
+        out["stage"] = be.evolution_stage(args.species)
+        out["gender_rate"] = be.gender_rate(args.species)
+    if args.move:
+        out["move"] = be.move_info(args.move)
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pokeapi_evolutions.py
+---------------------
+Index aplati des chaînes d'évolution PokeAPI : espèce -> (chaîne, stade, parent, enfants,
+déclencheur, niveau min, objet, gender_rate). Construit une fois ; ensuite le stade et le
+prédécesseur d'une espèce sont un simple accès dictionnaire, sans /pokemon-species ni /evolution-chain.
+
+1) Construction :
+    python pokeapi_evolutions.py build --dump-db pokeapi_dump.sqlite    # depuis le dump local
+    python pokeapi_evolutions.py build --from-api                       # ~1000 species + ~550 chaînes
+
+2) Utilisation : sv_moves_summary charge pokeapi_evolutions.json (à côté des scripts) s'il existe ;
+   --evo-index <fichier> pour un autre chemin, --no-evo-index pour l'ignorer.
+
+3) Vérification :
+    python pokeapi_evolutions.py query ivysaur eevee
+
+Stade 0-based (même convention que sv_moves_summary.compute_stage_from_chain).
+Fichier JSON versionné : {"format": 1, "built_at": ..., "columns": [...], "species": {slug: [valeurs]}}.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from pokeapi_cache import add_cache_args, cache_from_args
+
+POKEAPI = "https://pokeapi.co/api/v2"
+DEFAULT_EVO_INDEX = Path(__file__).resolve().parent / "pokeapi_evolutions.json"
+FORMAT_VERSION = 1
+
+
+class EvoNode(NamedTuple):
+    species: str
+    chain_id: int
+    stage: int
+    parent: Optional[str]
+    children: Tuple[str, ...]
+    trigger: Optional[str]
+    min_level: Optional[int]
+    item: Optional[str]
+    gender_rate: Optional[int] = None
+
+
+COLUMNS = list(EvoNode._fields[1:])
+
+
+def _url_id(url: str) -> Optional[int]:
+    tail = (url or "").rstrip("/").rsplit("/", 1)[-1]
+    return int(tail) if tail.isdigit() else None
+
+
+def flatten_chain(chain_json: Dict[str, Any]) -> List[EvoNode]:
+    """Parcourt une fois un payload /evolution-chain/ et renvoie un EvoNode par espèce."""
+    chain_id = int(chain_json.get("id") or 0)
+    out: List[EvoNode] = []
+
+    def walk(node: Dict[str, Any], depth: int, parent: Optional[str]) -> None:
+        name = (node.get("species") or {}).get("name")
+        if not name:
+            return
+        nxt = node.get("evolves_to") or []
+        det = (node.get("evolution_details") or [{}])[0] or {}
+        out.append(EvoNode(
+            species=name,
+            chain_id=chain_id,
+            stage=depth,
+            parent=parent,
+            children=tuple((c.get("species") or {}).get("name") for c in nxt if (c.get("species") or {}).get("name")),
+            trigger=(det.get("trigger") or {}).get("name"),
+            min_level=det.get("min_level"),
+            item=(det.get("item") or {}).get("name"),
+        ))
+        for c in nxt:
+            walk(c, depth + 1, name)
+
+    walk(chain_json.get("chain") or {}, 0, None)
+    return out
+
+
+class EvolutionIndex:
+    def __init__(self, nodes: Iterable[EvoNode], built_at: Optional[int] = None):
+        self.built_at = int(built_at if built_at is not None else time.time())
+        self._nodes: Dict[str, EvoNode] = {n.species: n for n in nodes}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def get(self, species: str) -> Optional[EvoNode]:
+        node = self._nodes.get((species or "").strip().lower())
+        if node is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return node
+
+    def stage(self, species: str) -> int:
+        node = self.get(species)
+        return node.stage if node else -1
+
+    def parent(self, species: str) -> Optional[str]:
+        node = self.get(species)
+        return node.parent if node else None
+
+    def save(self, path: Path | str) -> None:
+        doc = {
+            "format": FORMAT_VERSION,
+            "built_at": self.built_at,
+            "columns": COLUMNS,
+            "species": {n.species: [list(v) if isinstance(v, tuple) else v for v in n[1:]]
+                        for n in sorted(self._nodes.values(), key=lambda n: (n.chain_id, n.stage, n.species))},
+        }
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(doc, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path | str) -> "EvolutionIndex":
+        doc = json.loads(Path(path).read_text(encoding="utf-8"))
+        if doc.get("format") != FORMAT_VERSION or doc.get("columns") != COLUMNS:
+            raise ValueError(f"{path}: format {doc.get('format')}, attendu {FORMAT_VERSION} (reconstruire l'index)")
+        ci = COLUMNS.index("children")
+        nodes = []
+        for sp, row in (doc.get("species") or {}).items():
+            row[ci] = tuple(row[ci])
+            nodes.append(EvoNode(sp, *row))
+        return cls(nodes, built_at=doc.get("built_at"))
+
+
+# --- Construction ----------------------------------------------------------------
+
+def build_index(species_urls: List[str], fetch: Callable[[List[str]], Dict[str, Optional[Dict[str, Any]]]]) -> EvolutionIndex:
+    """
+    fetch(urls) -> {url: payload|None} : dump local ou client HTTP.
+    1) /pokemon-species/ de chaque espèce (gender_rate, URL de chaîne) ; 2) chaque chaîne une seule fois.
+    """
+    species = [sp for sp in fetch(species_urls).values() if sp]
+    chain_urls = sorted({(sp.get("evolution_chain") or {}).get("url") for sp in species} - {None})
+    chains = [c for c in fetch(chain_urls).values() if c]
+
+    nodes: Dict[str, EvoNode] = {}
+    for c in chains:
+        for n in flatten_chain(c):
+            nodes[n.species] = n
+    for sp in species:
+        name = sp.get("name")
+        node = nodes.get(name)
+        if node is None:
+            # espèce absente de sa chaîne (donnée incomplète) : nœud isolé, stade 0
+            cid = _url_id((sp.get("evolution_chain") or {}).get("url")) or 0
+            node = EvoNode(name, cid, 0, None, (), None, None, None)
+        nodes[name] = node._replace(gender_rate=sp.get("gender_rate"))
+    return EvolutionIndex(nodes.values())
+
+
+def build_from_dump(dump: Any) -> EvolutionIndex:
+    """Depuis pokeapi_dump.DumpBackend (aucune requête réseau)."""
+    urls = [f"{POKEAPI}/pokemon-species/{sid}/" for sid in dump.species_ids()]
+    return build_index(urls, lambda us: {u: dump.get_json(u) for u in us})
+
+
+def build_from_api(cfg: Any) -> EvolutionIndex:
+    """Depuis PokeAPI via le client partagé (cfg: ClientConfig)."""
+    from pokeapi_client import fetch_many_sync
+
+    base = cfg.base_url.rstrip("/")
+    listing = fetch_many_sync([f"{base}/pokemon-species?limit=100000&offset=0"], cfg)
+    results = (next(iter(listing.values())) or {}).get("results") or []
+    if not results:
+        raise RuntimeError("Liste /pokemon-species vide ou inaccessible")
+    return build_index([r["url"] for r in results], lambda us: fetch_many_sync(us, cfg))
+
+
+# --- Intégration CLI ---------------------------------------------------------------
+
+def add_evo_index_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--evo-index", default=str(DEFAULT_EVO_INDEX),
+                   help=f"Index des évolutions (pokeapi_evolutions.py build) : stade et genre sans "
+                        f"/pokemon-species ni /evolution-chain (défaut: {DEFAULT_EVO_INDEX.name} s'il existe).")
+    p.add_argument("--no-evo-index", action="store_true", help="Ignorer l'index des évolutions.")
+
+
+def evo_index_from_args(args: argparse.Namespace) -> Optional[EvolutionIndex]:
+    if getattr(args, "no_evo_index", False) or not getattr(args, "evo_index", None):
+        return None
+    path = Path(args.evo_index)
+    if not path.exists():
+        if path != DEFAULT_EVO_INDEX:
+            print(f"[warn] Index des évolutions introuvable : {path}", file=sys.stderr)
+        return None
+    try:
+        index = EvolutionIndex.load(path)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"[warn] Index des évolutions ignoré : {e}", file=sys.stderr)
+        return None
+    print(f"[info] Index des évolutions : {len(index)} espèces ({path.name})", file=sys.stderr)
+    return index
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Construit/interroge l'index aplati des chaînes d'évolution PokeAPI.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("build", help="Construire l'index depuis le dump local ou PokeAPI.")
+    src = b.add_mutually_exclusive_group(required=True)
+    src.add_argument("--dump-db", help="Base construite par pokeapi_dump.py build.")
+    src.add_argument("--from-api", action="store_true", help="Interroger PokeAPI (species + chaînes).")
+    b.add_argument("--out", default=str(DEFAULT_EVO_INDEX), help=f"Fichier de sortie (défaut: {DEFAULT_EVO_INDEX.name}).")
+    b.add_argument("--base-url", default=POKEAPI, help="Base URL PokeAPI (défaut: officiel).")
+    b.add_argument("--concurrency", type=int, default=16, help="Requêtes simultanées max avec --from-api (défaut: 16).")
+
+    q = sub.add_parser("query", help="Afficher des espèces de l'index.")
+    q.add_argument("species", nargs="+", help="Slugs /pokemon-species/.")
+    q.add_argument("--index", default=str(DEFAULT_EVO_INDEX))
+
+    from pokeapi_client import add_throttle_args
+    add_cache_args(b)
+    add_throttle_args(b)
+
+    args = p.parse_args()
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        if args.dump_db:
+            from pokeapi_dump import DumpBackend
+            dump = DumpBackend(args.dump_db)
+            index = build_from_dump(dump)
+            dump.close()
+        else:
+            from pokeapi_client import ClientConfig, throttle_kwargs
+            cache = cache_from_args(args)
+            index = build_from_api(ClientConfig(base_url=args.base_url, max_concurrency=max(1, args.concurrency),
+                                                cache=cache, **throttle_kwargs(args)))
+            if cache is not None:
+                cache.close()
+        index.save(args.out)
+        print(f"[ok] Index écrit : {args.out} ({len(index)} espèces, {time.perf_counter() - t0:.1f}s)", file=sys.stderr)
+        return
+
+    index = EvolutionIndex.load(args.index)
+    for sp in args.species:
+        node = index.get(sp)
+        print(f"{sp}: {node._asdict() if node else None}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pokeapi_learnsets.py
+--------------------
+Extraction des learnsets d'un payload /pokemon/ en une seule passe sur moves × version_group_details.
+
+Le payload porte les détails de toutes les versions : plutôt que de le rescanner pour chaque
+version group (SV puis chaque fallback, ou côté gauche puis côté droit), on range chaque détail
+dans le seau de son version group, puis on sert autant de version groups que nécessaire.
+
+    buckets = bucket_by_version_group(pokemon_json)                 # {vg: [LearnRow, ...]}
+    vg, rows = first_learnset(buckets, ["scarlet-violet", *FALLBACK_VGS])
+    left, right = level_up_moves(pokemon_json, {"sword-shield"}, {"scarlet-violet"})
+
+Utilisé par sv_moves_summary, compare_gen7_8 et get_missing_moves_gen8to9.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Collection, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+class LearnRow(NamedTuple):
+    name: str
+    url: str
+    method: Optional[str]
+    level: int
+
+
+def bucket_by_version_group(pokemon_json: Dict[str, Any],
+                            version_groups: Optional[Collection[str]] = None) -> Dict[str, List[LearnRow]]:
+    """
+    {version_group: [LearnRow, ...]} en une passe, ordre PokeAPI conservé (move puis détail).
+    version_groups : ne garder que ces seaux (None = tous).
+    """
+    wanted: Optional[Set[str]] = set(version_groups) if version_groups is not None else None
+    buckets: Dict[str, List[LearnRow]] = {}
+    for m in pokemon_json.get("moves") or []:
+        mv = m.get("move") or {}
+        name, url = mv.get("name"), mv.get("url")
+        if not name or not url:
+            continue
+        for det in m.get("version_group_details") or []:
+            vg = (det.get("version_group") or {}).get("name")
+            if not vg or (wanted is not None and vg not in wanted):
+                continue
+            level = det.get("level_learned_at") or 0
+            buckets.setdefault(vg, []).append(
+                LearnRow(name, url, (det.get("move_learn_method") or {}).get("name"), level)
+            )
+    return buckets
+
+
+def first_learnset(buckets: Dict[str, List[LearnRow]], order: Iterable[str]) -> Tuple[Optional[str], List[LearnRow]]:
+    """Premier version group non vide dans l'ordre donné (cible puis fallbacks) : (vg, lignes)."""
+    for vg in order:
+        rows = buckets.get(vg)
+        if rows:
+            return vg, rows
+    return None, []
+
+
+def level_up_moves(pokemon_json: Dict[str, Any], *group_sets: Collection[str]) -> List[Dict[str, int]]:
+    """
+    Pour chaque ensemble de version groups, {move: niveau min en level-up}, le tout en une passe
+    (ordre d'insertion = ordre PokeAPI des moves, comme un scan par côté).
+    Ex. level_up_moves(data, {"ultra-sun-ultra-moon"}, {"sword-shield"}) -> [gauche, droite]
+    """
+    sides_by_vg: Dict[str, List[int]] = {}
+    for i, groups in enumerate(group_sets):
+        for vg in groups:
+            sides_by_vg.setdefault(vg, []).append(i)
+    out: List[Dict[str, int]] = [{} for _ in group_sets]
+    for m in pokemon_json.get("moves") or []:
+        name = (m.get("move") or {}).get("name")
+        if not name:
+            continue
+        for det in m.get("version_group_details") or []:
+            sides = sides_by_vg.get((det.get("version_group") or {}).get("name"))
+            if not sides or (det.get("move_learn_method") or {}).get("name") != "level-up":
+                continue
+            level = det.get("level_learned_at", 0)
+            for i in sides:
+                prev = out[i].get(name)
+                out[i][name] = level if prev is None else min(prev, level)
+    return out
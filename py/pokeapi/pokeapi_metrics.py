@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pokeapi_metrics.py
+------------------
+Instrumentation des appels PokeAPI faits par pokeapi_client (tous les scripts du dossier).
+
+- Latence réseau par endpoint (/pokemon, /move, ...) : p50 / p90 / p99 / max.
+- Octets reçus, statuts HTTP, retries par cause (statut ou exception) et temps passé en backoff.
+- Attente d'un slot (token bucket + limiteur AIMD), temps de décodage JSON.
+- Provenance des réponses : dump local, cache frais, revalidation 304, réseau, single-flight.
+- Concurrence au fil du temps (en vol / limite AIMD, échantillonnée chaque seconde).
+- Phases applicatives optionnelles (with metrics.phase("summarize"): ...) pour isoler notre post-traitement.
+
+Côté script :
+    add_metrics_args(p)                      # --metrics-json FICHIER, --progress
+    metrics = metrics_from_args(args)        # None si rien demandé
+    cfg = ClientConfig(..., metrics=metrics)
+
+Le rapport JSON est écrit à la sortie du process (atexit), même après une erreur.
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+SOURCES = ("dump", "cache", "revalidated", "network", "coalesced")
+
+
+def endpoint_of(url: str) -> str:
+    """'https://pokeapi.co/api/v2/pokemon-species/25/' -> 'pokemon-species'."""
+    path = url.split("?", 1)[0].split("://", 1)[-1]
+    parts = [p for p in path.split("/")[1:] if p]
+    if "v2" in parts:
+        parts = parts[parts.index("v2") + 1:]
+    return parts[0] if parts else "?"
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    s = sorted(values)
+
+    def pct(p: float) -> float:
+        return round(s[min(len(s) - 1, int(p * len(s)))] * 1000, 1)
+
+    return {"p50_ms": pct(0.50), "p90_ms": pct(0.90), "p99_ms": pct(0.99), "max_ms": round(s[-1] * 1000, 1)}
+
+
+class FetchMetrics:
+    def __init__(self, progress: bool = False, sample_interval: float = 1.0):
+        self.started = time.monotonic()
+        self.progress = progress
+        self.sample_interval = sample_interval
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.bytes: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.sources: Counter = Counter()
+        self.cache_misses = 0
+        self.retries: Counter = Counter()
+        self.backoff_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.decode_seconds = 0.0
+        self.phases: Dict[str, float] = defaultdict(float)
+        self.concurrency: List[Tuple[float, int, int]] = []   # (t, en vol, limite)
+        self._progress_len = 0
+
+    # --- enregistrement (appelé par PokeApiClient) ---------------------------
+
+    def source(self, kind: str) -> None:
+        self.sources[kind] += 1
+
+    def cache_missed(self) -> None:
+        self.cache_misses += 1
+
+    def response(self, url: str, status: int, seconds: float, nbytes: int = 0) -> None:
+        ep = endpoint_of(url)
+        self.latencies[ep].append(seconds)
+        self.bytes[ep] += nbytes
+        self.statuses[ep][str(status)] += 1
+
+    def error(self, url: str, exc: BaseException, seconds: float) -> None:
+        ep = endpoint_of(url)
+        self.latencies[ep].append(seconds)
+        self.statuses[ep][type(exc).__name__] += 1
+
+    def retry(self, cause: str, delay: float) -> None:
+        self.retries[cause] += 1
+        self.backoff_seconds += delay
+
+    def waited(self, seconds: float) -> None:
+        self.wait_seconds += seconds
+
+    def decoded(self, seconds: float) -> None:
+        self.decode_seconds += seconds
+
+    def sample(self, inflight: int, limit: int) -> None:
+        self.concurrency.append((round(time.monotonic() - self.started, 1), inflight, limit))
+        if self.progress:
+            self.print_progress(inflight, limit)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - t0
+
+    # --- restitution -------------------------------------------------------------
+
+    def network_requests(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+    def cache_hit_ratio(self) -> Optional[float]:
+        lookups = self.sources["cache"] + self.cache_misses
+        return round(self.sources["cache"] / lookups, 4) if lookups else None
+
+    def progress_line(self, inflight: int, limit: int) -> str:
+        elapsed = max(1e-6, time.monotonic() - self.started)
+        n = self.network_requests()
+        served = sum(self.sources.values())
+        ratio = self.cache_hit_ratio()
+        return (f"[progress] {elapsed:6.0f}s | {served} réponses ({n} HTTP, {n / elapsed:.1f}/s) | "
+                f"retries {sum(self.retries.values())} | backoff {self.backoff_seconds:.0f}s | "
+                f"cache {'-' if ratio is None else f'{ratio:.0%}'} | en vol {inflight}/{limit}")
+
+    def print_progress(self, inflight: int, limit: int) -> None:
+        line = self.progress_line(inflight, limit)
+        pad = max(0, self._progress_len - len(line))
+        sys.stderr.write("\r" + line + " " * pad)
+        sys.stderr.flush()
+        self._progress_len = len(line)
+
+    def end_progress(self) -> None:
+        if self._progress_len:
+            sys.stderr.write("\n")
+            self._progress_len = 0
+
+    def report(self) -> Dict[str, Any]:
+        endpoints = {}
+        for ep in sorted(self.latencies):
+            endpoints[ep] = {
+                "requests": len(self.latencies[ep]),
+                "bytes": self.bytes[ep],
+                "statuses": dict(self.statuses[ep]),
+                **percentiles(self.latencies[ep]),
+            }
+        wall = time.monotonic() - self.started
+        return {
+            "generated_at": int(time.time()),
+            "wall_seconds": round(wall, 2),
+            "network_requests": self.network_requests(),
+            "bytes_received": sum(self.bytes.values()),
+            "sources": {k: self.sources[k] for k in SOURCES},
+            "cache_misses": self.cache_misses,
+            "cache_hit_ratio": self.cache_hit_ratio(),
+            "retries": dict(self.retries),
+            "backoff_seconds": round(self.backoff_seconds, 2),
+            "slot_wait_seconds": round(self.wait_seconds, 2),
+            "json_decode_seconds": round(self.decode_seconds, 3),
+            "phases_seconds": {k: round(v, 3) for k, v in self.phases.items()},
+            "endpoints": endpoints,
+            "concurrency": [{"t": t, "inflight": i, "limit": lim} for t, i, lim in self.concurrency],
+        }
+
+    def write(self, path: Path | str) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+# --- Intégration CLI ----------------------------------------------------------
+
+def add_metrics_args(p: argparse.ArgumentParser) -> None:
+    g = p.add_argument_group("métriques PokeAPI")
+    g.add_argument("--metrics-json", default=None,
+                   help="Écrire à la sortie un rapport JSON (latences par endpoint, retries, backoff, cache, concurrence).")
+    g.add_argument("--progress", action="store_true", help="Ligne de progression en direct sur stderr.")
+
+
+def metrics_from_args(args: argparse.Namespace) -> Optional[FetchMetrics]:
+    path = getattr(args, "metrics_json", None)
+    progress = bool(getattr(args, "progress", False))
+    if not path and not progress:
+        return None
+    metrics = FetchMetrics(progress=progress)
+
+    def finish() -> None:
+        metrics.end_progress()
+        if path:
+            try:
+                metrics.write(path)
+                print(f"[info] Métriques PokeAPI: {path}", file=sys.stderr)
+            except OSError as e:
+                print(f"[warn] Impossible d'écrire les métriques: {e}", file=sys.stderr)
+
+    atexit.register(finish)
+    return metrics
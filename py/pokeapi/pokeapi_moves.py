@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pokeapi_moves.py
+----------------
+Index compact des métadonnées de moves (slug -> type, nom anglais, classe de dégâts, génération),
+construit une fois et consulté par tous les scripts avant toute requête /move.
+
+1) Construction :
+    python pokeapi_moves.py build --dump-db pokeapi_dump.sqlite       # depuis le dump local
+    python pokeapi_moves.py build --from-api [--rate 10]              # ou via PokeAPI (~950 /move)
+
+2) Utilisation : les scripts chargent pokeapi_moves.idx (à côté des scripts) s'il existe ;
+   --move-index <fichier> pour un autre chemin, --no-move-index pour l'ignorer.
+   Seuls les moves absents de l'index partent sur le réseau.
+
+3) Vérification :
+    python pokeapi_moves.py query flamethrower "King's Shield" 53
+
+Format binaire versionné (petit-boutiste), lu d'un bloc en quelques millisecondes :
+    en-tête   "<8sHII"  : magic, version du format, built_at, nombre de moves
+    chaînes   "<I" + blob UTF-8 séparé par \\0 (types et classes dédupliqués)
+    moves     "<HHHHHB" par move : id, slug, name_en, type, damage_class (index de chaîne), génération
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from pokeapi_cache import add_cache_args, cache_from_args
+
+POKEAPI = "https://pokeapi.co/api/v2"
+DEFAULT_MOVE_INDEX = Path(__file__).resolve().parent / "pokeapi_moves.idx"
+
+MAGIC = b"PTUMOVES"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sHII")
+_RECORD = struct.Struct("<HHHHHB")
+_NONE = 0xFFFF
+
+_ROMAN = {"i": 1, "ii": 2, "iii": 3, "iv": 4, "v": 5, "vi": 6, "vii": 7, "viii": 8, "ix": 9, "x": 10}
+
+
+class MoveInfo(NamedTuple):
+    id: int
+    slug: str
+    name_en: Optional[str]
+    type: Optional[str]
+    damage_class: Optional[str]
+    generation: int
+
+    def payload(self) -> Dict[str, Any]:
+        """Sous-ensemble d'un payload /move/ (name, type, damage_class, names) pour le code existant."""
+        return {
+            "id": self.id,
+            "name": self.slug,
+            "type": {"name": self.type} if self.type else None,
+            "damage_class": {"name": self.damage_class} if self.damage_class else None,
+            "generation": {"name": f"generation-{_gen_roman(self.generation)}"} if self.generation else None,
+            "names": [{"language": {"name": "en"}, "name": self.name_en}] if self.name_en else [],
+        }
+
+
+def _gen_roman(gen: int) -> str:
+    for k, v in _ROMAN.items():
+        if v == gen:
+            return k
+    return str(gen)
+
+
+def move_slug(name: str) -> str:
+    """'King's Shield' / 'king_s shield' / 'Double Edge' -> slug PokeAPI ('kings-shield', 'double-edge')."""
+    s = name.strip().lower().replace("’", "").replace("'", "").replace("_", " ")
+    s = re.sub(r"\s+", "-", s)
+    return re.sub(r"[^a-z0-9\-]+", "", s)
+
+
+def move_info_from_payload(j: Dict[str, Any]) -> Optional[MoveInfo]:
+    """MoveInfo à partir d'un payload /move/ complet (API ou dump)."""
+    if not j or not j.get("name"):
+        return None
+    name_en = None
+    for nm in j.get("names") or []:
+        if (nm.get("language") or {}).get("name") == "en":
+            name_en = nm.get("name")
+            break
+    gen_name = ((j.get("generation") or {}).get("name") or "").rsplit("-", 1)[-1]
+    return MoveInfo(
+        id=int(j.get("id") or 0),
+        slug=j["name"],
+        name_en=name_en,
+        type=(j.get("type") or {}).get("name"),
+        damage_class=(j.get("damage_class") or {}).get("name"),
+        generation=_ROMAN.get(gen_name, 0),
+    )
+
+
+class MoveIndex:
+    def __init__(self, moves: Iterable[MoveInfo], built_at: Optional[int] = None):
+        self.built_at = int(built_at if built_at is not None else time.time())
+        self._by_slug: Dict[str, MoveInfo] = {}
+        self._by_id: Dict[int, MoveInfo] = {}
+        for m in moves:
+            self._by_slug[m.slug] = m
+            if m.id:
+                self._by_id[m.id] = m
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._by_slug)
+
+    def __iter__(self):
+        return iter(self._by_slug.values())
+
+    def get(self, key: Any) -> Optional[MoveInfo]:
+        """Recherche par slug, nom affiché, id, ou URL /move/<id|slug>/ (quelle que soit la base)."""
+        if isinstance(key, int):
+            info = self._by_id.get(key)
+        else:
+            k = str(key).strip()
+            if "/" in k:
+                k = k.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+            info = self._by_id.get(int(k)) if k.isdigit() else self._by_slug.get(move_slug(k))
+        if info is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return info
+
+    # --- (dé)sérialisation ---------------------------------------------------
+
+    def save(self, path: Path | str) -> None:
+        strings: List[str] = []
+        pos: Dict[str, int] = {}
+
+        def sid(s: Optional[str]) -> int:
+            if s is None:
+                return _NONE
+            if s not in pos:
+                pos[s] = len(strings)
+                strings.append(s)
+            return pos[s]
+
+        records = [
+            _RECORD.pack(m.id, sid(m.slug), sid(m.name_en), sid(m.type), sid(m.damage_class), m.generation)
+            for m in sorted(self._by_slug.values(), key=lambda m: (m.id, m.slug))
+        ]
+        if len(strings) >= _NONE:
+            raise ValueError("Trop de chaînes pour le format d'index v1")
+        blob = "\0".join(strings).encode("utf-8")
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with tmp.open("wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, self.built_at, len(records)))
+            f.write(struct.pack("<I", len(blob)))
+            f.write(blob)
+            f.write(b"".join(records))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path | str) -> "MoveIndex":
+        data = Path(path).read_bytes()
+        magic, version, built_at, count = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: pas un index de moves")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path}: format v{version}, attendu v{FORMAT_VERSION} (reconstruire l'index)")
+        off = _HEADER.size
+        (blob_len,) = struct.unpack_from("<I", data, off)
+        off += 4
+        strings = data[off:off + blob_len].decode("utf-8").split("\0")
+        off += blob_len
+        if len(data) - off != count * _RECORD.size:
+            raise ValueError(f"{path}: fichier tronqué")
+
+        def s(i: int) -> Optional[str]:
+            return None if i == _NONE else strings[i]
+
+        moves = [
+            MoveInfo(mid, strings[slug], s(name), s(typ), s(dc), gen)
+            for mid, slug, name, typ, dc, gen in _RECORD.iter_unpack(data[off:])
+        ]
+        return cls(moves, built_at=built_at)
+
+
+# --- Construction ----------------------------------------------------------------
+
+def build_from_dump(dump: Any) -> MoveIndex:
+    """Depuis pokeapi_dump.DumpBackend (aucune requête réseau)."""
+    return MoveIndex(
+        MoveInfo(
+            id=int(r["id"]),
+            slug=r["name"],
+            name_en=r["name_en"],
+            type=r["type"],
+            damage_class=r["damage_class"],
+            generation=int(r["generation"] or 0),
+        )
+        for r in dump.move_infos()
+    )
+
+
+def build_from_api(cfg: Any) -> MoveIndex:
+    """Depuis PokeAPI : liste /move puis chaque /move/<id>/ via le client partagé (cfg: ClientConfig)."""
+    from pokeapi_client import fetch_many_sync
+
+    base = cfg.base_url.rstrip("/")
+    listing = fetch_many_sync([f"{base}/move?limit=100000&offset=0"], cfg)
+    results = (next(iter(listing.values())) or {}).get("results") or []
+    if not results:
+        raise RuntimeError("Liste /move vide ou inaccessible")
+    payloads = fetch_many_sync([r["url"] for r in results], cfg)
+    moves = [info for info in map(move_info_from_payload, payloads.values()) if info is not None]
+    missing = len(results) - len(moves)
+    if missing:
+        print(f"[warn] {missing} moves non récupérés, absents de l'index", file=sys.stderr)
+    return MoveIndex(moves)
+
+
+# --- Intégration CLI ---------------------------------------------------------------
+
+def add_move_index_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--move-index", default=str(DEFAULT_MOVE_INDEX),
+                   help=f"Index des moves (pokeapi_moves.py build), utilisé avant /move "
+                        f"(défaut: {DEFAULT_MOVE_INDEX.name} s'il existe).")
+    p.add_argument("--no-move-index", action="store_true", help="Ignorer l'index des moves.")
+
+
+def move_index_from_args(args: argparse.Namespace) -> Optional[MoveIndex]:
+    if getattr(args, "no_move_index", False) or not getattr(args, "move_index", None):
+        return None
+    path = Path(args.move_index)
+    if not path.exists():
+        if path != DEFAULT_MOVE_INDEX:
+            print(f"[warn] Index des moves introuvable : {path}", file=sys.stderr)
+        return None
+    try:
+        index = MoveIndex.load(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"[warn] Index des moves ignoré : {e}", file=sys.stderr)
+        return None
+    print(f"[info] Index des moves : {len(index)} moves ({path.name})", file=sys.stderr)
+    return index
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Construit/interroge l'index compact des moves PokeAPI.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("build", help="Construire l'index depuis le dump local ou PokeAPI.")
+    src = b.add_mutually_exclusive_group(required=True)
+    src.add_argument("--dump-db", help="Base construite par pokeapi_dump.py build.")
+    src.add_argument("--from-api", action="store_true", help="Interroger PokeAPI (liste /move + chaque move).")
+    b.add_argument("--out", default=str(DEFAULT_MOVE_INDEX), help=f"Fichier de sortie (défaut: {DEFAULT_MOVE_INDEX.name}).")
+    b.add_argument("--base-url", default=POKEAPI, help="Base URL PokeAPI (défaut: officiel).")
+    b.add_argument("--concurrency", type=int, default=16, help="Requêtes simultanées max avec --from-api (défaut: 16).")
+
+    q = sub.add_parser("query", help="Afficher des moves de l'index.")
+    q.add_argument("moves", nargs="+", help="Slugs, noms affichés, ids ou URLs /move/.")
+    q.add_argument("--index", default=str(DEFAULT_MOVE_INDEX))
+
+    from pokeapi_client import add_throttle_args
+    add_cache_args(b)
+    add_throttle_args(b)
+
+    args = p.parse_args()
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        if args.dump_db:
+            from pokeapi_dump import DumpBackend
+            dump = DumpBackend(args.dump_db)
+            index = build_from_dump(dump)
+            dump.close()
+        else:
+            from pokeapi_client import ClientConfig, throttle_kwargs
+            cache = cache_from_args(args)
+            index = build_from_api(ClientConfig(base_url=args.base_url, max_concurrency=max(1, args.concurrency),
+                                                cache=cache, **throttle_kwargs(args)))
+            if cache is not None:
+                cache.close()
+        index.save(args.out)
+        print(f"[ok] Index écrit : {args.out} ({len(index)} moves, {time.perf_counter() - t0:.1f}s)", file=sys.stderr)
+        return
+
+    t0 = time.perf_counter()
+    index = MoveIndex.load(args.index)
+    print(f"[info] {len(index)} moves chargés en {(time.perf_counter() - t0) * 1000:.1f} ms", file=sys.stderr)
+    for key in args.moves:
+        info = index.get(key)
+        print(f"{key}: {info._asdict() if info else None}")
+
+
+if __name__ == "__main__":
+    main()
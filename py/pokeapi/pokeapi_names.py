@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pokeapi_names.py
+----------------
+Résolution locale de noms d'espèces/formes vers les noms /pokemon/ de PokeAPI, sans réseau.
+
+L'index est construit une fois à partir des noms connus (/pokemon/ et leur espèce) puis chargé
+par generate_species_mapping_csv et check_species_validity. Pour chaque nom recherché :
+    1) hash exact sur la forme normalisée (accents, ponctuation, ♀/♂, "Forme"/"Form", "Alolan" -> "alola"...),
+       puis sur l'ensemble des mots ("Paldean Wooper" -> wooper-paldea) ;
+    2) formes contenant tous les mots recherchés ("Darmanitan Galar" -> darmanitan-galar-standard) ;
+    3) n-grammes de 3 lettres (index inversé, coefficient de Dice) pour les fautes et variantes ;
+    4) en dernier recours, le nom tronqué de ses derniers mots ("Rotom Normal Form" -> rotom).
+Les suggestions sont classées par score (1.0 = exact) ; à score égal, la forme par défaut (id le plus bas) d'abord.
+
+1) Construction :
+    python pokeapi_names.py build --dump-db pokeapi_dump.sqlite
+    python pokeapi_names.py build --from-api                     # 2 requêtes (listes /pokemon et /pokemon-species)
+    python pokeapi_names.py build --pokemon-list all_pokemon.txt [--varieties species_varieties.json]
+
+2) Utilisation : les scripts chargent pokeapi_names.json (à côté des scripts) s'il existe ;
+   --name-index <fichier> pour un autre chemin, --no-name-index pour revenir aux requêtes HTTP.
+
+3) Vérification :
+    python pokeapi_names.py query "Mr. Mime Galar" "Wishiwashi Schooling" "Nidoran (F)"
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+POKEAPI = "https://pokeapi.co/api/v2"
+DEFAULT_NAME_INDEX = Path(__file__).resolve().parent / "pokeapi_names.json"
+FORMAT_VERSION = 1
+
+# mots ignorés dans les noms recherchés ("Deoxys Attack Forme", "Darmanitan, Zen Mode", "Eiscue Ice Face")
+NOISE = {"form", "forme", "cloak", "mode", "face", "rider"}
+REGIONAL = {"alolan": "alola", "galarian": "galar", "hisuian": "hisui", "paldean": "paldea"}
+
+# scores par type de correspondance
+SCORE_EXACT = 1.0
+SCORE_SPECIES = 0.98
+SCORE_TOKENS = 0.95
+FUZZY_CAP = 0.94
+SCORE_SUBSET = 0.9
+SCORE_TRUNCATED = 0.8
+MIN_FUZZY = 0.3
+
+
+class NameEntry(NamedTuple):
+    name: str
+    species: str
+    is_default: bool
+
+
+class Match(NamedTuple):
+    name: str
+    species: str
+    score: float
+    how: str
+
+
+def name_tokens(s: str, drop_noise: bool = False) -> List[str]:
+    """'Mr. Mime Galar' -> ['mr', 'mime', 'galar'] ; 'Nidoran♀' -> ['nidoran', 'f'] ; 'Alolan Vulpix' -> ['alola', 'vulpix']."""
+    s = s.replace("♀", " f ").replace("♂", " m ").lower()
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = re.sub(r"['’`´\".:%]", "", s)
+    toks = [REGIONAL.get(t, t) for t in re.split(r"[^a-z0-9]+", s) if t]
+    if drop_noise:
+        toks = [t for t in toks if t not in NOISE]
+    return toks
+
+
+def _trigrams(compact: str) -> set:
+    padded = f"${compact}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def infer_species(pokemon: List[str], species: Iterable[str]) -> List[NameEntry]:
+    """
+    Sans lien /pokemon/ -> espèce (listes seules) : espèce = plus long nom d'espèce préfixe du nom,
+    forme par défaut = première forme de l'espèce dans la liste (ordre des ids).
+    """
+    known = set(species)
+    seen: set = set()
+    out: List[NameEntry] = []
+    for name in pokemon:
+        parts = name.split("-")
+        sp = next(("-".join(parts[:k]) for k in range(len(parts), 0, -1) if "-".join(parts[:k]) in known), name)
+        out.append(NameEntry(name, sp, sp not in seen))
+        seen.add(sp)
+    return out
+
+
+class NameIndex:
+    def __init__(self, entries: Iterable[NameEntry], aliases: Optional[Dict[str, str]] = None,
+                 built_at: Optional[int] = None):
+        self.built_at = int(built_at if built_at is not None else time.time())
+        self.entries: List[NameEntry] = list(entries)
+        self.aliases: Dict[str, str] = dict(aliases or {})
+        self._names = {e.name for e in self.entries}
+        self._exact: Dict[str, List[Tuple[int, float, str]]] = {}
+        self._by_set: Dict[str, List[int]] = {}
+        self._by_token: Dict[str, set] = {}
+        self._by_trigram: Dict[str, List[int]] = {}
+        self._ntok: List[int] = []
+        self._ntri: List[int] = []
+
+        default_of: Dict[str, int] = {}
+        for i, e in enumerate(self.entries):
+            toks = name_tokens(e.name)
+            tris = _trigrams("".join(toks))
+            self._exact.setdefault("-".join(toks), []).append((i, SCORE_EXACT, "exact"))
+            self._by_set.setdefault(" ".join(sorted(toks)), []).append(i)
+            for t in set(toks):
+                self._by_token.setdefault(t, set()).add(i)
+            for g in tris:
+                self._by_trigram.setdefault(g, []).append(i)
+            self._ntok.append(len(set(toks)))
+            self._ntri.append(len(tris))
+            if e.is_default:
+                default_of[e.species] = i
+            else:
+                default_of.setdefault(e.species, i)
+        # espèce -> forme par défaut ("shaymin" -> shaymin-land), noms affichés ("Nidoran♀" -> nidoran-f)
+        for sp, i in default_of.items():
+            key = "-".join(name_tokens(sp))
+            if not any(how == "exact" for _, _, how in self._exact.get(key, ())):
+                self._exact.setdefault(key, []).append((i, SCORE_SPECIES, "species"))
+        for display, sp in self.aliases.items():
+            i = default_of.get(sp)
+            key = "-".join(name_tokens(display))
+            if i is not None and key not in self._exact:
+                self._exact[key] = [(i, SCORE_SPECIES, "alias")]
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, name: str) -> bool:
+        """Nom /pokemon/ exact (comme un GET /pokemon/{name}/ qui répond 200)."""
+        return name in self._names
+
+    def resolve(self, query: str, limit: int = 5) -> List[Match]:
+        """Suggestions classées (score décroissant, forme par défaut d'abord) pour un nom libre."""
+        q = name_tokens(query, drop_noise=True)
+        if not q:
+            return []
+        best: Dict[int, Tuple[float, str]] = {}
+
+        def offer(i: int, score: float, how: str) -> None:
+            if i not in best or score > best[i][0]:
+                best[i] = (round(score, 3), how)
+
+        for i, score, how in self._exact.get("-".join(q), ()):
+            offer(i, score, how)
+        for i in self._by_set.get(" ".join(sorted(q)), ()):
+            offer(i, SCORE_TOKENS, "tokens")
+
+        qset = set(q)
+        postings = [self._by_token.get(t) for t in qset]
+        if all(postings):
+            for i in set.intersection(*postings):
+                offer(i, SCORE_SUBSET - 0.04 * (self._ntok[i] - len(qset)), "subset")
+
+        qtri = _trigrams("".join(q))
+        shared: Counter = Counter()
+        for g in qtri:
+            shared.update(self._by_trigram.get(g, ()))
+        for i, n in shared.items():
+            dice = 2 * n / (len(qtri) + self._ntri[i])
+            if dice >= MIN_FUZZY:
+                offer(i, min(FUZZY_CAP, dice), "fuzzy")
+
+        for k in range(len(q) - 1, 0, -1):
+            hits = self._exact.get("-".join(q[:k]))
+            if hits:
+                for i, _, _ in hits:
+                    offer(i, SCORE_TRUNCATED - 0.05 * (len(q) - k - 1), "truncated")
+                break
+
+        ranked = sorted(best.items(), key=lambda kv: (-kv[1][0], kv[0]))[:limit]
+        if ranked and ranked[0][1][0] >= SCORE_TOKENS:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return [Match(self.entries[i].name, self.entries[i].species, score, how) for i, (score, how) in ranked]
+
+    def best(self, query: str, min_score: float = 0.0) -> Optional[Match]:
+        found = self.resolve(query, limit=1)
+        return found[0] if found and found[0].score >= min_score else None
+
+    def save(self, path: Path | str) -> None:
+        doc = {
+            "format": FORMAT_VERSION,
+            "built_at": self.built_at,
+            "pokemon": [[e.name, e.species, e.is_default] for e in self.entries],
+            "aliases": self.aliases,
+        }
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(doc, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path | str) -> "NameIndex":
+        doc = json.loads(Path(path).read_text(encoding="utf-8"))
+        if doc.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: format {doc.get('format')}, attendu {FORMAT_VERSION} (reconstruire l'index)")
+        entries = [NameEntry(n, sp, bool(d)) for n, sp, d in doc.get("pokemon") or []]
+        return cls(entries, doc.get("aliases"), built_at=doc.get("built_at"))
+
+
+# --- Construction ----------------------------------------------------------------
+
+def build_from_dump(dump: Any) -> NameIndex:
+    """Depuis pokeapi_dump.DumpBackend : formes, espèces et noms anglais des espèces."""
+    rows = dump.pokemon_names()
+    entries = [NameEntry(r["name"], r["species"], r["is_default"]) for r in rows]
+    aliases = {r["species_en"]: r["species"] for r in rows if r["species_en"]}
+    return NameIndex(entries, aliases)
+
+
+def build_from_api(cfg: Any) -> NameIndex:
+    """Depuis PokeAPI : listes /pokemon et /pokemon-species (2 requêtes, cfg: ClientConfig)."""
+    from pokeapi_client import fetch_many_sync
+
+    base = cfg.base_url.rstrip("/")
+    urls = [f"{base}/pokemon?limit=100000&offset=0", f"{base}/pokemon-species?limit=100000&offset=0"]
+    listings = fetch_many_sync(urls, cfg)
+    pokemon = [r["name"] for r in (listings.get(urls[0]) or {}).get("results") or []]
+    species = [r["name"] for r in (listings.get(urls[1]) or {}).get("results") or []]
+    if not pokemon or not species:
+        raise RuntimeError("Listes /pokemon ou /pokemon-species vides ou inaccessibles")
+    return NameIndex(infer_species(pokemon, species))
+
+
+def build_from_files(pokemon_list: Path, varieties: Optional[Path] = None) -> NameIndex:
+    """
+    Depuis les sorties de list_all_pokemon_and_varieties.py : all_pokemon.txt (un nom par ligne)
+    et, si fourni, species_varieties.json ({espèce: [formes, défaut en premier]}).
+    """
+    pokemon = [ln.strip() for ln in Path(pokemon_list).read_text(encoding="utf-8").splitlines() if ln.strip()]
+    if varieties is None:
+        return NameIndex(infer_species(pokemon, pokemon))
+    mapping: Dict[str, List[str]] = json.loads(Path(varieties).read_text(encoding="utf-8"))
+    species_of = {v: sp for sp, vs in mapping.items() for v in vs}
+    default = {vs[0] for vs in mapping.values() if vs}
+    guessed = {e.name: e for e in infer_species(pokemon, list(mapping))}
+    entries = [
+        NameEntry(n, species_of[n], n in default) if n in species_of else guessed[n]
+        for n in pokemon
+    ]
+    return NameIndex(entries)
+
+
+# --- Intégration CLI ---------------------------------------------------------------
+
+def add_name_index_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--name-index", default=str(DEFAULT_NAME_INDEX),
+                   help=f"Index local des noms (pokeapi_names.py build) : résolution sans requête HTTP "
+                        f"(défaut: {DEFAULT_NAME_INDEX.name} s'il existe).")
+    p.add_argument("--no-name-index", action="store_true", help="Ignorer l'index et interroger PokeAPI.")
+
+
+def name_index_from_args(args: argparse.Namespace) -> Optional[NameIndex]:
+    if getattr(args, "no_name_index", False) or not getattr(args, "name_index", None):
+        return None
+    path = Path(args.name_index)
+    if not path.exists():
+        if path != DEFAULT_NAME_INDEX:
+            print(f"[warn] Index des noms introuvable : {path}", file=sys.stderr)
+        return None
+    try:
+        index = NameIndex.load(path)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"[warn] Index des noms ignoré : {e}", file=sys.stderr)
+        return None
+    print(f"[info] Index des noms : {len(index)} formes ({path.name})", file=sys.stderr)
+    return index
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Construit/interroge l'index local des noms PokeAPI (/pokemon/ et espèces).")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("build", help="Construire l'index depuis le dump local, PokeAPI ou all_pokemon.txt.")
+    src = b.add_mutually_exclusive_group(required=True)
+    src.add_argument("--dump-db", help="Base construite par pokeapi_dump.py build.")
+    src.add_argument("--from-api", action="store_true", help="Interroger PokeAPI (listes /pokemon et /pokemon-species).")
+    src.add_argument("--pokemon-list", help="all_pokemon.txt (list_all_pokemon_and_varieties.py --out-all).")
+    b.add_argument("--varieties", help="species_varieties.json (--map-out) pour relier formes et espèces.")
+    b.add_argument("--out", default=str(DEFAULT_NAME_INDEX), help=f"Fichier de sortie (défaut: {DEFAULT_NAME_INDEX.name}).")
+    b.add_argument("--base-url", default=POKEAPI, help="Base URL PokeAPI (défaut: officiel).")
+
+    q = sub.add_parser("query", help="Afficher les suggestions pour des noms.")
+    q.add_argument("names", nargs="+", help="Noms libres ('Mr. Mime Galar', 'Rotom Wash Form'...).")
+    q.add_argument("--limit", type=int, default=5, help="Nombre de suggestions (défaut: 5).")
+    q.add_argument("--index", default=str(DEFAULT_NAME_INDEX))
+
+    from pokeapi_cache import add_cache_args, cache_from_args
+    from pokeapi_client import add_throttle_args
+    add_cache_args(b)
+    add_throttle_args(b)
+
+    args = p.parse_args()
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        if args.dump_db:
+            from pokeapi_dump import DumpBackend
+            dump = DumpBackend(args.dump_db)
+            index = build_from_dump(dump)
+            dump.close()
+        elif args.pokemon_list:
+            index = build_from_files(Path(args.pokemon_list), Path(args.varieties) if args.varieties else None)
+        else:
+            from pokeapi_client import ClientConfig, throttle_kwargs
+            cache = cache_from_args(args)
+            index = build_from_api(ClientConfig(base_url=args.base_url, cache=cache, **throttle_kwargs(args)))
+            if cache is not None:
+                cache.close()
+        index.save(args.out)
+        print(f"[ok] Index écrit : {args.out} ({len(index)} formes, {time.perf_counter() - t0:.1f}s)", file=sys.stderr)
+        return
+
+    t0 = time.perf_counter()
+    index = NameIndex.load(args.index)
+    print(f"[info] {len(index)} formes chargées en {(time.perf_counter() - t0) * 1000:.1f} ms", file=sys.stderr)
+    for name in args.names:
+        print(f"{name}:")
+        for m in index.resolve(name, limit=args.limit):
+            print(f"  {m.score:.3f}  {m.name:<32} ({m.how}, espèce {m.species})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pokeapi_numbers.py
+------------------
+Index persistant des numéros du Pokédex national : nom (espèce, forme ou nom PTU) -> numéro
+(= id de /pokemon-species/). Les noms déjà résolus ne repassent jamais par le réseau.
+
+Résolution d'un nom absent de l'index, concurrente pour tout un lot :
+  1) index des noms (pokeapi_names.json) s'il existe : nom PTU -> espèce, puis numéro de l'espèce ;
+  2) sinon /pokemon-species/<slug>/ ;
+  3) sinon /pokemon/<slug>/ (forme) et son lien variété -> espèce (l'id est dans species.url).
+Seul un 404 vaut "introuvable" : ces noms sont mémorisés (null) et --retry-missing les redemande.
+Une erreur réseau, un 5xx ou une absence du dump hors ligne ne sont pas mémorisés : le nom est
+signalé en erreur et redemandé au run suivant.
+
+1) Pré-remplissage (optionnel, toutes les espèces d'un coup) :
+    python pokeapi_numbers.py build --dump-db pokeapi_dump.sqlite    # depuis le dump local
+    python pokeapi_numbers.py build --from-api                       # une seule requête (liste des espèces)
+
+2) Utilisation : pokedex/get_number_api.py et pokedex/pokedex_sort_by_number.py lisent
+   pokeapi_numbers.json (à côté des scripts) ; --number-index <fichier> pour un autre chemin.
+
+3) Vérification :
+    python pokeapi_numbers.py query "Rotom Wash" Salandit "Mr. Mime"
+
+Fichier JSON versionné : {"format": 1, "built_at": ..., "numbers": {clé: numéro | null}}.
+Clé = tokens de pokeapi_names.name_tokens joints par "-" ("Mr. Mime" -> mr-mime, "Nidoran♀" -> nidoran-f).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from pokeapi_cache import add_cache_args, cache_from_args
+from pokeapi_names import NameIndex, name_tokens
+
+POKEAPI = "https://pokeapi.co/api/v2"
+DEFAULT_NUMBER_INDEX = Path(__file__).resolve().parent / "pokeapi_numbers.json"
+FORMAT_VERSION = 1
+MIN_NAME_SCORE = 0.9  # seuil de l'index des noms pour accepter l'espèce proposée
+
+
+def number_key(name: str) -> str:
+    return "-".join(name_tokens(name or ""))
+
+
+def _url_id(url: str) -> Optional[int]:
+    tail = (url or "").rstrip("/").rsplit("/", 1)[-1]
+    return int(tail) if tail.isdigit() else None
+
+
+class LookupFailed(RuntimeError):
+    """Réponse non concluante (erreur réseau, 5xx, absent du dump) : rien n'est mémorisé."""
+
+
+class NumberIndex:
+    def __init__(self, numbers: Optional[Dict[str, Optional[int]]] = None, built_at: Optional[int] = None):
+        self.built_at = int(built_at if built_at is not None else time.time())
+        self.numbers: Dict[str, Optional[int]] = dict(numbers or {})
+        self.added = 0
+        self.errors: Dict[str, str] = {}  # nom -> erreur du run courant (jamais sauvegardé)
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def __contains__(self, name: str) -> bool:
+        """Nom déjà tranché (numéro connu ou introuvable mémorisé)."""
+        return number_key(name) in self.numbers
+
+    def get(self, name: str) -> Optional[int]:
+        return self.numbers.get(number_key(name))
+
+    def set(self, name: str, number: Optional[int]) -> None:
+        key = number_key(name)
+        if key and (self.numbers.get(key) != number or key not in self.numbers):
+            self.numbers[key] = number
+            self.added += 1
+
+    def save(self, path: Path | str) -> None:
+        doc = {"format": FORMAT_VERSION, "built_at": self.built_at, "numbers": dict(sorted(self.numbers.items()))}
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(doc, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path | str) -> "NumberIndex":
+        doc = json.loads(Path(path).read_text(encoding="utf-8"))
+        if doc.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: format {doc.get('format')}, attendu {FORMAT_VERSION} (reconstruire l'index)")
+        return cls(doc.get("numbers") or {}, built_at=doc.get("built_at"))
+
+
+# --- Résolution ------------------------------------------------------------------
+
+async def _get_found(client: Any, path: str) -> Optional[Any]:
+    """JSON si 200, None si 404 ; LookupFailed pour toute autre issue (0 = réseau / dump, 5xx...)."""
+    status, data = await client.get_status(path)
+    if status == 200:
+        return data
+    if status == 404:
+        return None
+    raise LookupFailed(f"GET {path} -> {status or 'erreur réseau / absent du dump'}")
+
+
+async def _species_number(client: Any, slug: str) -> Optional[int]:
+    sp = await _get_found(client, f"pokemon-species/{slug}/")
+    return sp.get("id") if sp else None
+
+
+async def _variety_number(client: Any, slug: str) -> Optional[int]:
+    """Forme /pokemon/<slug>/ -> numéro de son espèce (lien variété -> espèce, id lu dans l'URL)."""
+    pk = await _get_found(client, f"pokemon/{slug}/")
+    species = (pk or {}).get("species") or {}
+    return _url_id(species.get("url", ""))
+
+
+async def resolve_number(client: Any, name: str, index: NumberIndex, names: Optional[NameIndex] = None) -> Optional[int]:
+    """
+    Numéro national d'un nom libre (ordre de l'en-tête) ; mémorise le nom et les slugs résolus.
+    LookupFailed si une requête n'est pas concluante : le nom n'est alors pas mémorisé.
+    """
+    slug = number_key(name)
+    steps: List[tuple] = []  # (slug candidat, essayer aussi /pokemon/)
+    if names is not None:
+        m = names.best(name, MIN_NAME_SCORE)
+        if m is not None:
+            steps.append((m.species, False))
+    steps.append((slug, True))
+
+    number = None
+    seen = set()
+    for cand, variety in steps:
+        if not cand or cand in seen:
+            continue
+        seen.add(cand)
+        number = index.numbers.get(cand)
+        if number is None:
+            number = await _species_number(client, cand)
+        if number is None and variety:
+            number = await _variety_number(client, cand)
+        if number is not None:
+            index.set(cand, number)
+            break
+    index.set(name, number)
+    return number
+
+
+async def resolve_many(cfg: Any, names: Iterable[str], index: NumberIndex, name_index: Optional[NameIndex] = None,
+                       retry_missing: bool = False) -> Dict[str, Optional[int]]:
+    """Résout en parallèle tous les noms non encore tranchés ; renvoie nom -> numéro pour tous les noms."""
+    from pokeapi_client import PokeApiClient
+
+    wanted = list(dict.fromkeys(n for n in names if n))
+    todo = [n for n in wanted if n not in index or (retry_missing and index.get(n) is None)]
+
+    async def resolve(client: Any, name: str) -> None:
+        try:
+            await resolve_number(client, name, index, name_index)
+        except LookupFailed as e:
+            index.errors[name] = str(e)
+
+    if todo:
+        print(f"[info] {len(todo)} noms à résoudre ({len(wanted) - len(todo)} déjà dans l'index)", file=sys.stderr)
+        async with PokeApiClient(cfg) as client:
+            await asyncio.gather(*(resolve(client, n) for n in todo))
+    for name, err in index.errors.items():
+        print(f"[warn] {name} : non résolu, non mémorisé ({err})", file=sys.stderr)
+    return {n: index.get(n) for n in wanted}
+
+
+# --- Construction ----------------------------------------------------------------
+
+def build_from_dump(dump: Any) -> NumberIndex:
+    numbers = dump.species_numbers()
+    index = NumberIndex(numbers)
+    for row in dump.pokemon_names():
+        index.set(row["name"], numbers.get(row["species"]))
+        if row.get("species_en"):
+            index.set(row["species_en"], numbers.get(row["species"]))
+    return index
+
+
+def build_from_api(cfg: Any) -> NumberIndex:
+    from pokeapi_client import PokeApiClient
+
+    async def run() -> Dict[str, Any]:
+        async with PokeApiClient(cfg) as client:
+            return await client.get_json("pokemon-species/?limit=100000")
+
+    index = NumberIndex()
+    for r in asyncio.run(run()).get("results", []):
+        index.set(r["name"], _url_id(r.get("url", "")))
+    return index
+
+
+def add_number_index_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--number-index", default=str(DEFAULT_NUMBER_INDEX),
+                   help=f"Index persistant des numéros nationaux (défaut: {DEFAULT_NUMBER_INDEX.name}, créé au besoin).")
+
+
+def number_index_from_args(args: argparse.Namespace) -> NumberIndex:
+    path = Path(args.number_index)
+    if not path.exists():
+        return NumberIndex()
+    try:
+        index = NumberIndex.load(path)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"[warn] Index des numéros ignoré : {e}", file=sys.stderr)
+        return NumberIndex()
+    print(f"[info] Index des numéros : {len(index)} noms ({path.name})", file=sys.stderr)
+    return index
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Construit/interroge l'index persistant des numéros du Pokédex national.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("build", help="Pré-remplir l'index avec toutes les espèces (dump local ou PokeAPI).")
+    src = b.add_mutually_exclusive_group(required=True)
+    src.add_argument("--dump-db", help="Base construite par pokeapi_dump.py build.")
+    src.add_argument("--from-api", action="store_true", help="Interroger PokeAPI (liste des espèces).")
+    b.add_argument("--out", default=str(DEFAULT_NUMBER_INDEX), help=f"Fichier de sortie (défaut: {DEFAULT_NUMBER_INDEX.name}).")
+    b.add_argument("--base-url", default=POKEAPI, help="Base URL PokeAPI (défaut: officiel).")
+
+    q = sub.add_parser("query", help="Afficher les numéros de l'index (sans requête).")
+    q.add_argument("names", nargs="+", help="Noms libres (espèces, formes, noms PTU).")
+    q.add_argument("--index", default=str(DEFAULT_NUMBER_INDEX))
+
+    add_cache_args(b)
+
+    args = p.parse_args()
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        if args.dump_db:
+            from pokeapi_dump import DumpBackend
+            dump = DumpBackend(args.dump_db)
+            index = build_from_dump(dump)
+            dump.close()
+        else:
+            from pokeapi_client import ClientConfig
+            cache = cache_from_args(args)
+            index = build_from_api(ClientConfig(base_url=args.base_url, cache=cache))
+            if cache is not None:
+                cache.close()
+        path = Path(args.out)
+        if path.exists():  # garder les noms PTU déjà résolus
+            try:
+                old = NumberIndex.load(path)
+                index = NumberIndex({**old.numbers, **index.numbers})
+            except (OSError, ValueError, TypeError):
+                pass
+        index.save(path)
+        print(f"[ok] Index écrit : {args.out} ({len(index)} noms, {time.perf_counter() - t0:.1f}s)", file=sys.stderr)
+        return
+
+    index = NumberIndex.load(args.index) if Path(args.index).exists() else NumberIndex()
+    for name in args.names:
+        number = index.get(name) if name in index else "(absent de l'index)"
+        print(f"{name}: {number}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pokeapi_standin.py
+------------------
+Serveur HTTP local qui se fait passer pour PokeAPI : rejoue des réponses enregistrées ("cassette")
+et injecte latence et throttling de façon reproductible. Sert aux benchmarks (pokeapi_bench.py)
+et aux essais de concurrence/retry sans toucher https://pokeapi.co.
+
+1) Enregistrer une cassette (proxy : ce qui manque est demandé à PokeAPI puis conservé) :
+    python pokeapi_standin.py serve --cassette bench.cassette --record
+    python sv_moves_summary.py --mapping-csv mapping.csv --out /tmp/x.json --no-cache \\
+        --base-url http://127.0.0.1:8770/api/v2
+   ou l'amorcer depuis le cache HTTP déjà rempli :
+    python pokeapi_standin.py import-cache --cassette bench.cassette --cache-db pokeapi_cache.sqlite
+
+2) Rejouer avec des pannes simulées :
+    python pokeapi_standin.py serve --cassette bench.cassette --latency-ms 40 --jitter-ms 30 \\
+        --p429 0.05 --retry-after 1 --rate-limit 50 --seed 1
+
+   --p429       probabilité de répondre 429 à une requête (tirage déterministe avec --seed)
+   --rate-limit débit max (req/s, token bucket de --burst) au-delà duquel le serveur répond 429
+   --retry-after valeur de l'en-tête Retry-After des 429 (absent si non fourni)
+
+Les URLs PokeAPI contenues dans les corps sont réécrites vers le serveur local, pour que les
+requêtes suivantes (species.url, evolution_chain.url...) y passent aussi. Une requête absente de
+la cassette en rejeu reçoit 404 et est comptée dans les statistiques (GET /_standin/stats ;
+POST /_standin/reset les remet à zéro).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+try:
+    from aiohttp import ClientSession, ClientTimeout, web
+except ImportError:
+    print("Ce script requiert le paquet 'aiohttp' (pip install aiohttp).", file=sys.stderr)
+    sys.exit(1)
+
+POKEAPI = "https://pokeapi.co/api/v2"
+API_PREFIX = "/api/v2"
+DEFAULT_PORT = 8770
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS responses (
+    key          TEXT PRIMARY KEY,
+    status       INTEGER NOT NULL,
+    content_type TEXT NOT NULL,
+    body         BLOB NOT NULL,
+    recorded_at  REAL NOT NULL
+);
+"""
+
+
+def request_key(path: str, query: str = "") -> str:
+    """'/api/v2/pokemon/25/' + 'offset=0&limit=5' -> 'pokemon/25?limit=5&offset=0' (indépendant de la base)."""
+    if path.startswith(API_PREFIX):
+        path = path[len(API_PREFIX):]
+    key = path.strip("/")
+    if query:
+        key += "?" + urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return key
+
+
+class Cassette:
+    """Réponses enregistrées (SQLite, corps compressés zlib), indexées par request_key()."""
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    @property
+    def upstream(self) -> str:
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'upstream'").fetchone()
+        return row[0] if row else POKEAPI
+
+    def set_upstream(self, base: str) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('upstream', ?)", (base.rstrip("/"),))
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Tuple[int, str, bytes]]:
+        with self._lock:
+            row = self._db.execute("SELECT status, content_type, body FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], zlib.decompress(row[2])
+
+    def put(self, key: str, status: int, content_type: str, body: bytes) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                             (key, status, content_type, zlib.compress(body, 6), time.time()))
+            self._db.commit()
+
+    def import_cache(self, cache_db: Path | str) -> int:
+        """Copie les entrées d'un pokeapi_cache.sqlite (mêmes URLs de base que l'amont de la cassette)."""
+        src = sqlite3.connect(f"file:{Path(cache_db)}?mode=ro", uri=True)
+        upstream = urlsplit(self.upstream)
+        n = 0
+        try:
+            rows = src.execute("SELECT e.url, b.body FROM entries e JOIN blobs b ON b.hash = e.hash")
+            with self._lock:
+                for url, body in rows:
+                    parts = urlsplit(url)
+                    if parts.netloc != upstream.netloc or not parts.path.startswith(upstream.path):
+                        continue
+                    key = request_key(parts.path[len(upstream.path):], parts.query)
+                    self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, 200, 'application/json', ?, ?)",
+                                     (key, body, time.time()))
+                    n += 1
+                self._db.commit()
+        finally:
+            src.close()
+        return n
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+@dataclass
+class Faults:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    p429: float = 0.0
+    retry_after: Optional[str] = None
+    rate_limit: float = 0.0          # req/s, 0 = pas de limite
+    burst: int = 0                   # défaut: rate_limit
+    seed: Optional[int] = None
+
+
+class _Bucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class StandinServer:
+    """Application aiohttp de rejeu/enregistrement ; start() renvoie la base URL à passer en --base-url."""
+
+    def __init__(self, cassette: Cassette, faults: Optional[Faults] = None, record: bool = False,
+                 host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        self.cassette = cassette
+        self.faults = faults or Faults()
+        self.record = record
+        self.host = host
+        self.port = port
+        self.base_url = f"http://{host}:{port}{API_PREFIX}"
+        self._rng = random.Random(self.faults.seed)
+        self._bucket = _Bucket(self.faults.rate_limit, self.faults.burst) if self.faults.rate_limit > 0 else None
+        self._runner: Optional[web.AppRunner] = None
+        self._upstream: Optional[ClientSession] = None
+        self.stats: Dict[str, int] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        self.stats = {"requests": 0, "served": 0, "throttled": 0, "missing": 0, "recorded": 0, "bytes": 0}
+
+    def _rewrite(self, body: bytes) -> bytes:
+        return body.replace(self.cassette.upstream.encode(), self.base_url.encode())
+
+    def _throttle(self) -> bool:
+        if self._bucket is not None and not self._bucket.take():
+            return True
+        return self.faults.p429 > 0 and self._rng.random() < self.faults.p429
+
+    async def _fetch_upstream(self, key: str) -> Tuple[int, str, bytes]:
+        if self._upstream is None:
+            self._upstream = ClientSession(timeout=ClientTimeout(total=60))
+        path, _, query = key.partition("?")
+        url = f"{self.cassette.upstream}/{path}/" + (f"?{query}" if query else "")
+        async with self._upstream.get(url) as resp:
+            body = await resp.read()
+            return resp.status, resp.headers.get("Content-Type", "application/json"), body
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.stats["requests"] += 1
+        f = self.faults
+        if f.latency_ms or f.jitter_ms:
+            await asyncio.sleep((f.latency_ms + self._rng.uniform(0, f.jitter_ms)) / 1000)
+        if self._throttle():
+            self.stats["throttled"] += 1
+            headers = {"Retry-After": f.retry_after} if f.retry_after else {}
+            return web.Response(status=429, text="Too Many Requests", headers=headers)
+
+        key = request_key(request.path, request.query_string)
+        hit = self.cassette.get(key)
+        if hit is None and self.record:
+            status, ctype, body = await self._fetch_upstream(key)
+            if status in (200, 404):
+                self.cassette.put(key, status, ctype, body)
+                self.stats["recorded"] += 1
+            hit = (status, ctype, body)
+        if hit is None:
+            self.stats["missing"] += 1
+            return web.Response(status=404, text="Not Found (absent de la cassette)")
+        status, ctype, body = hit
+        body = self._rewrite(body)
+        self.stats["served"] += 1
+        self.stats["bytes"] += len(body)
+        return web.Response(status=status, body=body, content_type=ctype.split(";", 1)[0])
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    async def _reset(self, request: web.Request) -> web.Response:
+        self.reset()
+        return web.json_response(self.stats)
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/_standin/stats", self._stats)
+        app.router.add_post("/_standin/reset", self._reset)
+        app.router.add_get(API_PREFIX + "/{tail:.*}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._upstream is not None:
+            await self._upstream.close()
+            self._upstream = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class BackgroundStandin:
+    """StandinServer dans un thread dédié (sa propre boucle asyncio), pour piloter des sous-processus."""
+
+    def __init__(self, server: StandinServer):
+        self.server = server
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def __enter__(self) -> "BackgroundStandin":
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self._loop).result(timeout=10)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+
+    def reset(self) -> None:
+        self._loop.call_soon_threadsafe(self.server.reset)
+
+    def stats(self) -> Dict[str, int]:
+        async def snap() -> Dict[str, int]:
+            return dict(self.server.stats)
+        return asyncio.run_coroutine_threadsafe(snap(), self._loop).result(timeout=10)
+
+
+# --- Intégration CLI ---------------------------------------------------------------
+
+def add_fault_args(p: argparse.ArgumentParser) -> None:
+    g = p.add_argument_group("pannes simulées")
+    g.add_argument("--latency-ms", type=float, default=0.0, help="Latence ajoutée à chaque réponse (ms).")
+    g.add_argument("--jitter-ms", type=float, default=0.0, help="Latence aléatoire supplémentaire, uniforme [0, N] ms.")
+    g.add_argument("--p429", type=float, default=0.0, help="Probabilité de répondre 429 (0-1).")
+    g.add_argument("--retry-after", default=None, help="En-tête Retry-After des 429 (secondes ; absent par défaut).")
+    g.add_argument("--rate-limit", type=float, default=0.0, help="Débit max accepté (req/s) avant 429 (0 = illimité).")
+    g.add_argument("--burst", type=int, default=0, help="Rafale du --rate-limit (défaut: le débit).")
+    g.add_argument("--seed", type=int, default=None, help="Graine des tirages (latence, 429) pour des runs reproductibles.")
+
+
+def faults_from_args(args: argparse.Namespace) -> Faults:
+    return Faults(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        p429=args.p429,
+        retry_after=args.retry_after,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+        seed=args.seed,
+    )
+
+
+async def _serve_forever(server: StandinServer) -> None:
+    url = await server.start()
+    mode = "enregistrement" if server.record else "rejeu"
+    print(f"[info] PokeAPI de substitution ({mode}, {len(server.cassette)} réponses) : --base-url {url}", file=sys.stderr)
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.stop()
+        print(f"[info] Statistiques : {json.dumps(server.stats)}", file=sys.stderr)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="PokeAPI locale de substitution : rejeu de cassettes, latence et 429 injectés.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    s = sub.add_parser("serve", help="Servir une cassette (rejeu, ou --record pour compléter depuis PokeAPI).")
+    s.add_argument("--cassette", required=True, help="Fichier cassette (SQLite, créé si absent).")
+    s.add_argument("--record", action="store_true", help="Proxy : demander à l'amont ce qui manque et l'enregistrer.")
+    s.add_argument("--upstream", default=None, help=f"Amont à enregistrer (défaut: {POKEAPI}).")
+    s.add_argument("--host", default="127.0.0.1")
+    s.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port d'écoute (défaut: {DEFAULT_PORT}).")
+    add_fault_args(s)
+
+    i = sub.add_parser("import-cache", help="Amorcer une cassette depuis le cache HTTP (pokeapi_cache.sqlite).")
+    i.add_argument("--cassette", required=True)
+    i.add_argument("--cache-db", default=str(Path(__file__).resolve().parent / "pokeapi_cache.sqlite"))
+
+    args = p.parse_args()
+    cassette = Cassette(args.cassette)
+    try:
+        if args.cmd == "import-cache":
+            n = cassette.import_cache(args.cache_db)
+            print(f"[ok] {n} réponses importées dans {args.cassette} ({len(cassette)} au total)", file=sys.stderr)
+            return
+        if args.upstream:
+            cassette.set_upstream(args.upstream)
+        server = StandinServer(cassette, faults_from_args(args), record=args.record, host=args.host, port=args.port)
+        try:
+            asyncio.run(_serve_forever(server))
+        except KeyboardInterrupt:
+            pass
+    finally:
+        cassette.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pokeapi_transform.py
+--------------------
+Transformation en lot des sorties sv_moves_summary (sv_all.json / .jsonl) vers le format PTU.
+
+Au lieu de traiter une espèce à la fois, toutes les espèces sont chargées en colonnes :
+  - stats : matrice (espèces x 6) NumPy, NaN pour une stat absente ;
+  - moves : une table à plat (espèce, position, nom, type, méthode, niveau) pour tout le dex.
+Mise à l'échelle des stats, détection des niveaux "Evo", déplacement des moves niveau 1 en "(N)"
+et tris sont faits en passes vectorisées ; le JSON PTU n'est construit qu'à la fin.
+
+Le résultat est identique à transform_sv_to_destination.transform_species (mêmes règles d'arrondi,
+même ordre, mêmes champs). NumPy est optionnel : sans lui, has_numpy() est faux et les scripts
+retombent sur la version espèce par espèce.
+
+Règles d'arrondi (les deux existent dans le dépôt, ne pas les confondre) :
+  - round_half_up : 0.5 arrondi vers le haut (6.5 -> 7), transform_sv_to_destination ;
+  - round_ptu     : 0.5 arrondi vers le bas, seul > 0.5 monte (6.5 -> 6), inject_final_stats_from_csv.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # optionnel
+    np = None
+
+SCALE_DIVISOR = 10  # set to 100 if you truly want /100; /10 matches the sample provided
+
+STAT_KEY_MAP = {
+    "hp": "HP",
+    "attack": "Attack",
+    "defense": "Defense",
+    "special-attack": "Special Attack",
+    "special-defense": "Special Defense",
+    "speed": "Speed",
+}
+
+NO_LEVEL = -1      # move level-up sans niveau entier -> "Evo"
+EVO_SORT_LEVEL = 9999
+
+
+def has_numpy() -> bool:
+    return np is not None
+
+
+def _numpy():
+    if np is None:
+        raise SystemExit("[err] Le moteur vectorisé nécessite numpy (pip install numpy).")
+    return np
+
+
+# ---------- arrondis ----------
+
+def round_half_up(x: float) -> int:
+    i = int(x)
+    frac = x - i
+    return i + (1 if frac >= 0.5 else 0)
+
+
+def round_ptu(x: float) -> int:
+    frac = x - math.floor(x)
+    return math.ceil(x) if frac > 0.5 else math.floor(x)
+
+
+ROUNDING = {"half_up": round_half_up, "ptu": round_ptu}
+
+
+def _round_array(x, rule: str):
+    """Version vectorisée de ROUNDING[rule], mêmes opérations flottantes que la version scalaire."""
+    if rule == "half_up":
+        i = np.trunc(x)
+        return i + ((x - i) >= 0.5)
+    if rule == "ptu":
+        f = np.floor(x)
+        return f + ((x - f) > 0.5)
+    raise ValueError(f"Règle d'arrondi inconnue : {rule}")
+
+
+def scale_stats(values: Sequence[float], divisor: float = SCALE_DIVISOR, rule: str = "half_up") -> List[int]:
+    """values / divisor arrondi selon rule, pour toute une colonne de stats d'un coup."""
+    if rule not in ROUNDING:
+        raise ValueError(f"Règle d'arrondi inconnue : {rule}")
+    if np is None or not values:
+        fn = ROUNDING[rule]
+        return [int(fn(v / divisor)) for v in values]
+    arr = np.asarray(values, dtype=np.float64) / divisor
+    return _round_array(arr, rule).astype(np.int64).tolist()
+
+
+# ---------- chargement en colonnes ----------
+
+def normalize_type(t: str | None) -> str | None:
+    if t is None:
+        return None
+    return t[:1].upper() + t[1:].lower()
+
+
+def genders_string(gd: Any) -> str:
+    genders_str = "Genderless"
+    try:
+        if isinstance(gd, dict):
+            male = gd.get("male")
+            female = gd.get("female")
+            genderless = gd.get("genderless")
+            if isinstance(genderless, (int, float)) and float(genderless) >= 1.0:
+                genders_str = "Genderless"
+            elif isinstance(male, (int, float)) and isinstance(female, (int, float)):
+                m_pct = round(float(male) * 100.0, 1)
+                f_pct = round(float(female) * 100.0, 1)
+                genders_str = f"{m_pct}% Male / {f_pct}% Female"
+    except Exception:
+        genders_str = "Genderless"
+    return genders_str
+
+
+class SpeciesBatch:
+    """
+    Toutes les espèces d'une ou plusieurs sorties sv_moves_summary, en colonnes.
+    Noms, types et méthodes des moves sont encodés en dictionnaire (codes entiers + valeurs distinctes).
+    """
+
+    def __init__(self, species_list: Sequence[Dict[str, Any]]):
+        _numpy()
+        n = len(species_list)
+        self.names: List[str] = [obj.get("species") or obj.get("Species") or "" for obj in species_list]
+        self.genders: List[Any] = [obj.get("gender_distribution") for obj in species_list]
+        self.stages = np.fromiter((1 if obj.get("stage", 0) else 0 for obj in species_list), dtype=np.int64, count=n)
+
+        stats = np.full((n, len(STAT_KEY_MAP)), np.nan)
+        for i, obj in enumerate(species_list):
+            stats_in = obj.get("stats", {}) or {}
+            for j, key in enumerate(STAT_KEY_MAP):
+                val = stats_in.get(key)
+                if isinstance(val, (int, float)):
+                    stats[i, j] = val
+        self.stats = stats
+
+        per_species = [obj.get("moves", []) for obj in species_list]
+        flat = [m for moves in per_species for m in moves]
+        self.owner = np.repeat(np.arange(n, dtype=np.int64), [len(moves) for moves in per_species])
+        self.position = np.arange(len(flat), dtype=np.int64)
+        # niveaux factorisés avec leur type : 1, 1.0 et True ne se confondent pas (1.0 -> "Evo", mais == 1)
+        level_values, self.level_code = _factorize([m.get("level") for m in flat], typed=True)
+        self.level_out = [lvl if isinstance(lvl, int) else "Evo" for lvl in level_values]
+        level_of = np.array([lvl if isinstance(lvl, int) else NO_LEVEL for lvl in level_values], dtype=np.int64)
+        self.level = level_of[self.level_code]
+        level_one = np.array([lvl == 1 for lvl in level_values], dtype=bool)
+        self.level_one = level_one[self.level_code]
+        self.move_values, self.move_code = _factorize([m.get("name_en") or m.get("name") for m in flat])
+        self.type_values, self.type_code = _factorize([m.get("type") for m in flat])
+        self.method_values, self.method_code = _factorize([m.get("method") for m in flat])
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+def _factorize(values: List[Any], typed: bool = False):
+    """(valeurs distinctes, codes). typed=True distingue les valeurs égales de types différents (1, 1.0, True)."""
+    keys = [(type(v), v) for v in values] if typed else values
+    uniques = {v: i for i, v in enumerate(dict.fromkeys(keys))}
+    codes = np.array(list(map(uniques.__getitem__, keys)), dtype=np.int64)
+    return ([k[1] for k in uniques] if typed else list(uniques)), codes
+
+
+def _sort_rank(values: List[str]):
+    """Rang de v.lower() pour chaque valeur distincte (égalité -> même rang), pour trier sur des entiers."""
+    if not values:
+        return np.zeros(0, dtype=np.int64)
+    _, rank = np.unique(np.array([v.lower() for v in values], dtype=str), return_inverse=True)
+    return rank.astype(np.int64)
+
+
+# ---------- passes vectorisées ----------
+
+def scaled_base_stats(batch: SpeciesBatch, divisor: float = SCALE_DIVISOR, rule: str = "half_up"):
+    """(valeurs entières, masque présent) pour la matrice de stats entière."""
+    present = ~np.isnan(batch.stats)
+    scaled = _round_array(np.where(present, batch.stats, 0.0) / divisor, rule).astype(np.int64)
+    return scaled, present
+
+
+def split_learnsets(batch: SpeciesBatch):
+    """
+    Répartit les moves en deux tables ordonnées (indices de lignes) :
+      - level-up restants, triés par espèce puis Evo d'abord puis niveau ;
+      - TM/Tutor (non level-up + level-up niveau 1 d'un stade > 0, tag N), triés par espèce puis nom.
+    Les tris sont stables sur la position d'origine, comme les sorted() de transform_species.
+    Retourne (lu_rows, tm_rows, tag_n).
+    """
+    levelup_code = batch.method_values.index("level-up") if "level-up" in batch.method_values else -1
+    is_levelup = batch.method_code == levelup_code
+    tag_n = is_levelup & batch.level_one & (batch.stages[batch.owner] > 0)
+    keep_lu = is_levelup & ~tag_n
+
+    lu_rows = np.flatnonzero(keep_lu)
+    lu_level = batch.level[lu_rows]
+    is_evo = lu_level == NO_LEVEL
+    order = np.lexsort((
+        batch.position[lu_rows],
+        np.where(is_evo, EVO_SORT_LEVEL, lu_level),
+        np.where(is_evo, 0, 1),
+        batch.owner[lu_rows],
+    ))
+    lu_rows = lu_rows[order]
+
+    tm_rows = np.flatnonzero(~keep_lu)
+    name_rank = _sort_rank(batch.move_values)
+    order = np.lexsort((batch.position[tm_rows], name_rank[batch.move_code[tm_rows]], batch.owner[tm_rows]))
+    tm_rows = tm_rows[order]
+    return lu_rows, tm_rows, tag_n
+
+
+def _group_bounds(owner_sorted, n: int) -> List[int]:
+    """Début/fin de chaque espèce dans une table triée par espèce."""
+    return np.searchsorted(owner_sorted, np.arange(n + 1), side="left").tolist()
+
+
+def _take(values: List[Any], codes) -> List[Any]:
+    """Décode une colonne encodée en dictionnaire."""
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr[codes].tolist()
+
+
+# ---------- matérialisation ----------
+
+def transform_batch(species_list: Sequence[Dict[str, Any]], divisor: float = SCALE_DIVISOR) -> List[Dict[str, Any]]:
+    """Équivalent de [transform_species(sp) for sp in species_list], en passes vectorisées."""
+    batch = SpeciesBatch(species_list)
+    n = len(batch)
+    scaled, present = scaled_base_stats(batch, divisor, "half_up")
+    lu_rows, tm_rows, tag_n = split_learnsets(batch)
+
+    types = [normalize_type(t) for t in batch.type_values]
+    methods = [m.capitalize() if m and m != "level-up" else "Level-Up" for m in batch.method_values]
+
+    # level-up : toutes les entrées du dex d'un coup, puis découpage par espèce
+    lu_entries = [
+        {"Level": lvl, "Move": mv, "Type": t} if t is not None else {"Level": lvl, "Move": mv}
+        for lvl, mv, t in zip(_take(batch.level_out, batch.level_code[lu_rows]),
+                              _take(batch.move_values, batch.move_code[lu_rows]),
+                              _take(types, batch.type_code[lu_rows]))
+    ]
+
+    tm_n = tag_n[tm_rows]
+    tm_method = np.array(_take(methods, batch.method_code[tm_rows]), dtype=object)
+    tm_method[tm_n] = "Level-Up"
+    tm_entries = [
+        {"Move": mv, "Type": t, "Method": meth, "Tags": ["N"] if tagged else []}
+        for mv, t, meth, tagged in zip(_take(batch.move_values, batch.move_code[tm_rows]),
+                                       _take(types, batch.type_code[tm_rows]),
+                                       tm_method.tolist(), tm_n.tolist())
+    ]
+
+    lu_bounds = _group_bounds(batch.owner[lu_rows], n)
+    tm_bounds = _group_bounds(batch.owner[tm_rows], n)
+    stat_names = list(STAT_KEY_MAP.values())
+    scaled = scaled.tolist()
+    present = present.tolist()
+
+    out: List[Dict[str, Any]] = []
+    for i, name in enumerate(batch.names):
+        out.append({
+            "Species": name[:1].upper() + name[1:],
+            "Base Stats": {k: v for k, v, ok in zip(stat_names, scaled[i], present[i]) if ok},
+            "Other Information": {"Genders": genders_string(batch.genders[i])},
+            "Moves": {
+                "Level Up Move List": lu_entries[lu_bounds[i]:lu_bounds[i + 1]],
+                "TM/Tutor Moves List": tm_entries[tm_bounds[i]:tm_bounds[i + 1]],
+            },
+        })
+    return out
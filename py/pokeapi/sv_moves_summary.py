@@ -9,18 +9,22 @@ import csv
 import json
 import sys
 import time
+from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
 
-try:
-    import aiohttp
-except ImportError:
-    print("Ce script requiert le paquet 'aiohttp' (pip install aiohttp).", file=sys.stderr)
-    sys.exit(1)
+from pokeapi_cache import ResponseCache, add_cache_args, cache_from_args
+from pokeapi_client import ClientConfig, PokeApiClient, RetryPolicy, add_throttle_args, throttle_kwargs
+from pokeapi_dump import DumpBackend, add_dump_args, dump_from_args
+from pokeapi_evolutions import EvolutionIndex, EvoNode, add_evo_index_args, evo_index_from_args
+from pokeapi_learnsets import bucket_by_version_group, first_learnset
+from pokeapi_metrics import FetchMetrics, add_metrics_args, metrics_from_args
+from pokeapi_moves import MoveIndex, add_move_index_args, move_index_from_args
 
 POKEAPI = "https://pokeapi.co/api/v2"
 SV_GROUP_NAME = "scarlet-violet"
+DEFAULT_WINDOW = 64  # espèces en vol max en mode streaming (borne la mémoire)
 FALLBACK_VGS = [
     "sword-shield",
     "isle-of-armor",
@@ -54,50 +58,33 @@ class FetcherConfig:
     retries: int = 4
     retry_backoff: float = 0.8
     user_agent: str = "sv-moves-summary/1.5 (+https://pokeapi.co)"
-
-
-class RateLimiter:
-    def __init__(self, concurrency: int):
-        self.sem = asyncio.Semaphore(concurrency)
-
-    async def __aenter__(self):
-        await self.sem.acquire()
-        return self
-
-    async def __aexit__(self, exc_type, exc, tb):
-        self.sem.release()
-
-
-async def fetch_json(session: aiohttp.ClientSession, url: str, cfg: FetcherConfig) -> Any:
-    last_exc = None
-    for attempt in range(cfg.retries + 1):
-        try:
-            async with session.get(url, timeout=cfg.timeout) as resp:
-                if resp.status == 200:
-                    return await resp.json()
-                if resp.status in (429, 500, 502, 503, 504):
-                    retry_after = resp.headers.get("Retry-After")
-                    if retry_after is not None:
-                        try:
-                            delay = float(retry_after)
-                        except ValueError:
-                            delay = cfg.retry_backoff * (2 ** attempt)
-                    else:
-                        delay = cfg.retry_backoff * (2 ** attempt)
-                    await asyncio.sleep(delay)
-                    continue
-                text = await resp.text()
-                raise aiohttp.ClientResponseError(
-                    status=resp.status,
-                    history=resp.history,
-                    request_info=resp.request_info,
-                    message=f"GET {url} -> {resp.status}: {text[:200]}",
-                )
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            last_exc = e
-            delay = cfg.retry_backoff * (2 ** attempt)
-            await asyncio.sleep(delay)
-    raise RuntimeError(f"Échec après retries pour URL: {url} (dernier: {last_exc})")
+    rate: float = 0.0
+    burst: int = 0
+    min_concurrency: int = 2
+    cache: Optional[ResponseCache] = None
+    dump: Optional[DumpBackend] = None
+    moves: Optional[MoveIndex] = None
+    evolutions: Optional[EvolutionIndex] = None
+    metrics: Optional[FetchMetrics] = None
+
+    def client_config(self) -> ClientConfig:
+        return ClientConfig(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            max_concurrency=self.concurrency,
+            min_concurrency=self.min_concurrency,
+            rate=self.rate,
+            burst=self.burst,
+            retry=RetryPolicy(retries=self.retries, backoff=self.retry_backoff),
+            user_agent=self.user_agent,
+            cache=self.cache,
+            dump=self.dump,
+            metrics=self.metrics,
+        )
+
+
+async def fetch_json(client: PokeApiClient, url: str) -> Any:
+    return await client.get_json(url)
 
 
 def normalize_species_name(s: str) -> str:
@@ -118,47 +105,26 @@ def summarize_sv_moves_from_pokemon_json(
         or pokemon_json.get("name")
         or (pokemon_json.get("species") or {}).get("name")
     )
-    moves = pokemon_json.get("moves", []) or []
-
-    def collect_for_vg(vg_name: str) -> Tuple[List[Dict[str, Any]], Dict[str, Optional[str]]]:
-        items: List[Dict[str, Any]] = []
-        need_types: Dict[str, Optional[str]] = {}
-        for m in moves:
-            move_name = (m.get("move") or {}).get("name")
-            move_url = (m.get("move") or {}).get("url")
-            if not move_name or not move_url:
-                continue
-            for det in (m.get("version_group_details") or []):
-                vg = (det.get("version_group") or {})
-                if vg.get("name") != vg_name:
-                    continue
-                method = (det.get("move_learn_method") or {}).get("name")
-                level = det.get("level_learned_at") or 0
-                row: Dict[str, Any] = {"name": move_name, "method": method, "move_url": move_url}
-                if isinstance(level, int) and level > 0:
-                    row["level"] = level
-                items.append(row)
-                if include_types:
-                    need_types[move_url] = None
-        return items, need_types
-
-    # 1) Essayer la version cible (SV)
-    items, need_types = collect_for_vg(SV_GROUP_NAME)
-    used_vg = SV_GROUP_NAME
-
-    # 2) Si vide, parcourir la liste de fallback (défaut ou override CLI)
+    # Une seule passe sur moves × version_group_details pour SV et tous les fallbacks
     try:
         fb_list = fallback_list if isinstance(fallback_list, list) else FALLBACK_VGS
     except NameError:
         fb_list = FALLBACK_VGS
-
-    if not items:
-        for vg in fb_list:
-            cand_items, cand_need = collect_for_vg(vg)
-            if cand_items:
-                items, need_types = cand_items, cand_need
-                used_vg = vg
-                break
+    order = [SV_GROUP_NAME, *fb_list]
+    buckets = bucket_by_version_group(pokemon_json, order)
+    used_vg, rows = first_learnset(buckets, order)
+    if used_vg is None:
+        used_vg = SV_GROUP_NAME
+
+    items: List[Dict[str, Any]] = []
+    need_types: Dict[str, Optional[str]] = {}
+    for r in rows:
+        row: Dict[str, Any] = {"name": r.name, "method": r.method, "move_url": r.url}
+        if isinstance(r.level, int) and r.level > 0:
+            row["level"] = r.level
+        items.append(row)
+        if include_types:
+            need_types[r.url] = None
 
     result = {
         "species": species_name,
@@ -168,45 +134,44 @@ def summarize_sv_moves_from_pokemon_json(
     return result, need_types
 
 
-async def resolve_move_types(session: aiohttp.ClientSession, move_urls: List[str], cfg: FetcherConfig,
-                             cache: Dict[str, Optional[str]], limiter: RateLimiter) -> None:
+async def resolve_move_types(client: PokeApiClient, move_urls: List[str],
+                             cache: Dict[str, Optional[str]], index: Optional[MoveIndex] = None) -> None:
     async def worker(url: str):
         if url in cache:
             return
-        async with limiter:
-            try:
-                data = await fetch_json(session, url, cfg)
-                t = (data.get("type") or {}).get("name")
-                name_en = None
-                for nm in (data.get("names") or []):
-                    lang = (nm.get("language") or {}).get("name")
-                    if lang == "en":
-                        name_en = nm.get("name")
-                        break
-            except Exception:
-                t = None
-                name_en = None
-            cache[url] = {"type": t, "name_en": name_en}
+        info = index.get(url) if index is not None else None
+        if info is not None:
+            cache[url] = {"type": info.type, "name_en": info.name_en}
+            return
+        try:
+            data = await fetch_json(client, url)
+            t = (data.get("type") or {}).get("name")
+            name_en = None
+            for nm in (data.get("names") or []):
+                lang = (nm.get("language") or {}).get("name")
+                if lang == "en":
+                    name_en = nm.get("name")
+                    break
+        except Exception:
+            t = None
+            name_en = None
+        cache[url] = {"type": t, "name_en": name_en}
 
     tasks = [asyncio.create_task(worker(url)) for url in move_urls if url not in cache]
     if tasks:
         await asyncio.gather(*tasks)
 
 
-async def fetch_pokemon_json(session: aiohttp.ClientSession, fetch_key: str, cfg: FetcherConfig, limiter: RateLimiter) -> Dict[str, Any]:
-    url = f"{cfg.base_url}/pokemon/{normalize_species_name(fetch_key)}/"
-    async with limiter:
-        return await fetch_json(session, url, cfg)
+async def fetch_pokemon_json(client: PokeApiClient, fetch_key: str) -> Dict[str, Any]:
+    return await fetch_json(client, f"pokemon/{normalize_species_name(fetch_key)}/")
 
 
-async def fetch_species_json(session: aiohttp.ClientSession, species_url: str, cfg: FetcherConfig, limiter: RateLimiter) -> Dict[str, Any]:
-    async with limiter:
-        return await fetch_json(session, species_url, cfg)
+async def fetch_species_json(client: PokeApiClient, species_url: str) -> Dict[str, Any]:
+    return await fetch_json(client, species_url)
 
 
-async def fetch_evolution_chain_json(session: aiohttp.ClientSession, evo_url: str, cfg: FetcherConfig, limiter: RateLimiter) -> Dict[str, Any]:
-    async with limiter:
-        return await fetch_json(session, evo_url, cfg)
+async def fetch_evolution_chain_json(client: PokeApiClient, evo_url: str) -> Dict[str, Any]:
+    return await fetch_json(client, evo_url)
 
 
 def compute_stage_from_chain(chain: Dict[str, Any], target_species: str) -> int:
@@ -225,127 +190,217 @@ def compute_stage_from_chain(chain: Dict[str, Any], target_species: str) -> int:
     return dfs(chain or {}, 0)
 
 
-async def process_pairs(pairs: List[Tuple[str, str]], include_types: bool, cfg: FetcherConfig,
-                        move_cache: Dict[str, Optional[str]]) -> List[Dict[str, Any]]:
-    results: List[Dict[str, Any]] = []
-    async with aiohttp.ClientSession(headers={"User-Agent": cfg.user_agent}) as session:
-        limiter = RateLimiter(cfg.concurrency)
+class SpeciesEnricher:
+    """
+    Stage d'évolution, répartition des genres et types des moves pour un /pokemon/.
+    L'index des évolutions répond directement ; sinon on ne garde en mémoire que l'utile
+    des réponses species / evolution-chain (partagées entre formes).
+    """
 
-        pokemons = await asyncio.gather(*[
-            fetch_pokemon_json(session, fetch_key, cfg, limiter) for fetch_key, _ in pairs
-        ], return_exceptions=True)
+    def __init__(self, client: PokeApiClient, include_types: bool, move_cache: Dict[str, Optional[str]],
+                 move_index: Optional[MoveIndex] = None, evo_index: Optional[EvolutionIndex] = None):
+        self.client = client
+        self.include_types = include_types
+        self.move_cache = move_cache
+        self.move_index = move_index
+        self.evo_index = evo_index
+        self.species: Dict[str, Dict[str, Any]] = {}   # url -> {"gender_rate", "evolution_chain"}
+        self.chains: Dict[str, Dict[str, Any]] = {}    # url -> chain
+
+    async def species_info(self, sp_url: str) -> Dict[str, Any]:
+        if sp_url not in self.species:
+            spj = await fetch_species_json(self.client, sp_url)
+            self.species[sp_url] = {
+                "gender_rate": spj.get("gender_rate", -1),
+                "evolution_chain": (spj.get("evolution_chain") or {}).get("url"),
+            }
+        return self.species[sp_url]
 
-        species_json_cache: Dict[str, Dict[str, Any]] = {}
-        evo_json_cache: Dict[str, Dict[str, Any]] = {}
+    def evo_node(self, poke_json: Dict[str, Any]) -> Optional[EvoNode]:
+        if self.evo_index is None:
+            return None
+        return self.evo_index.get((poke_json.get("species") or {}).get("name") or poke_json.get("name") or "")
 
-        async def get_stage_for_pokemon(poke_json: Dict[str, Any]) -> int:
-            try:
-                sp_url = (poke_json.get("species") or {}).get("url")
-                if not sp_url:
-                    return -1
-                if sp_url not in species_json_cache:
-                    species_json_cache[sp_url] = await fetch_species_json(session, sp_url, cfg, limiter)
-                spj = species_json_cache[sp_url]
-                evo = (spj.get("evolution_chain") or {}).get("url")
-                if not evo:
-                    return -1
-                if evo not in evo_json_cache:
-                    evo_json_cache[evo] = await fetch_evolution_chain_json(session, evo, cfg, limiter)
-                evj = evo_json_cache[evo]
-                chain = evj.get("chain") or {}
-                target = (poke_json.get("species") or {}).get("name") or poke_json.get("name")
-                if not target:
-                    return -1
-                return compute_stage_from_chain(chain, target)
-            except Exception:
+    async def stage(self, poke_json: Dict[str, Any]) -> int:
+        node = self.evo_node(poke_json)
+        if node is not None:
+            return node.stage
+        try:
+            sp_url = (poke_json.get("species") or {}).get("url")
+            if not sp_url:
                 return -1
+            evo = (await self.species_info(sp_url)).get("evolution_chain")
+            if not evo:
+                return -1
+            if evo not in self.chains:
+                self.chains[evo] = (await fetch_evolution_chain_json(self.client, evo)).get("chain") or {}
+            target = (poke_json.get("species") or {}).get("name") or poke_json.get("name")
+            if not target:
+                return -1
+            return compute_stage_from_chain(self.chains[evo], target)
+        except Exception:
+            return -1
 
-        needed_urls: Dict[str, Optional[str]] = {}
-        summaries: List[Dict[str, Any]] = []
-
-        stage_tasks = []
-        for data in pokemons:
-            if isinstance(data, Exception):
-                stage_tasks.append(asyncio.create_task(asyncio.sleep(0, result=-1)))
+    async def gender_distribution(self, poke_json: Dict[str, Any]) -> Dict[str, float]:
+        gender_dist = {"male": 0.0, "female": 0.0, "genderless": 0.0}
+        try:
+            node = self.evo_node(poke_json)
+            sp_url = (poke_json.get("species") or {}).get("url")
+            if node is not None and node.gender_rate is not None:
+                gr = node.gender_rate
+            elif sp_url:
+                gr = (await self.species_info(sp_url)).get("gender_rate", -1)
             else:
-                stage_tasks.append(asyncio.create_task(get_stage_for_pokemon(data)))
-
-        for (fetch_key, display_species), data, st_fut in zip(pairs, pokemons, stage_tasks):
-            if isinstance(data, Exception):
-                print(f"[warn] Échec /pokemon/{fetch_key}: {data}", file=sys.stderr)
-                continue
-
-            stage_val = await st_fut
+                gr = None
+            if gr is not None:
+                if gr == -1:
+                    gender_dist = {"male": 0.0, "female": 0.0, "genderless": 1.0}
+                else:
+                    female = float(gr) / 8.0
+                    male = 1.0 - female
+                    gender_dist = {"male": male, "female": female, "genderless": 0.0}
+        except Exception:
+            pass
+        return gender_dist
+
+    async def summarize(self, data: Dict[str, Any], display_species: str) -> Dict[str, Any]:
+        with self.client.metrics.phase("summarize"):
             stats_map = {s["stat"]["name"]: s["base_stat"] for s in data.get("stats", []) if s.get("stat")}
-
             ms, need_types = summarize_sv_moves_from_pokemon_json(
-                data, include_types, override_species_name=display_species
+                data, self.include_types, override_species_name=display_species
             )
+        stage_val, gender_dist = await asyncio.gather(self.stage(data), self.gender_distribution(data))
 
-            # Compute gender distribution using species_json_cache (or fetch if missing)
-            gender_dist = {"male": 0.0, "female": 0.0, "genderless": 0.0}
-            try:
-                sp_url = (data.get("species") or {}).get("url")
-                if sp_url:
-                    if sp_url not in species_json_cache:
-                        species_json_cache[sp_url] = await fetch_species_json(session, sp_url, cfg, limiter)
-                    spj = species_json_cache.get(sp_url, {})
-                    gr = spj.get("gender_rate", -1)
-                    if gr == -1:
-                        gender_dist = {"male": 0.0, "female": 0.0, "genderless": 1.0}
-                    else:
-                        female = float(gr) / 8.0
-                        male = 1.0 - female
-                        gender_dist = {"male": male, "female": female, "genderless": 0.0}
-            except Exception:
-                pass
-
-            summary = {
-                "Species": display_species,
-                "species": ms.get("species"),
-                "stage": stage_val,
-                "stats": stats_map,
-                "version_group": ms.get("version_group"),
-                "moves": ms.get("moves"),
-                "gender_distribution": gender_dist,
-            }
-
-            summaries.append(summary)
-            for url in need_types.keys():
-                needed_urls[url] = None
-
-        if include_types and summaries:
-            to_resolve = [u for u in needed_urls.keys() if u not in move_cache]
+        if self.include_types:
+            to_resolve = [u for u in need_types.keys() if u not in self.move_cache]
             if to_resolve:
-                await resolve_move_types(session, to_resolve, cfg, move_cache, limiter)
-
-            for s in summaries:
-                for m in s["moves"]:
-                    url = m.pop("move_url", None)
-                    info = move_cache.get(url) if url else None
-                    if isinstance(info, dict):
-                        m["type"] = info.get("type")
-                        if info.get("name_en") is not None:
-                            m["name_en"] = info.get("name_en")
-                    else:
-                        m["type"] = info
-
-        results.extend(summaries)
+                await resolve_move_types(self.client, to_resolve, self.move_cache, self.move_index)
+            for m in ms["moves"]:
+                url = m.pop("move_url", None)
+                info = self.move_cache.get(url) if url else None
+                if isinstance(info, dict):
+                    m["type"] = info.get("type")
+                    if info.get("name_en") is not None:
+                        m["name_en"] = info.get("name_en")
+                else:
+                    m["type"] = info
+
+        return {
+            "Species": display_species,
+            "species": ms.get("species"),
+            "stage": stage_val,
+            "stats": stats_map,
+            "version_group": ms.get("version_group"),
+            "moves": ms.get("moves"),
+            "gender_distribution": gender_dist,
+        }
+
+
+async def stream_in_order(items: Iterable[Any], job: Callable[[Any], Awaitable[Optional[Dict[str, Any]]]],
+                          emit: Callable[[Dict[str, Any]], None], window: int) -> int:
+    """
+    Lance job(item) avec au plus `window` items en vol et émet les résultats dans l'ordre d'entrée
+    dès qu'ils sont prêts. Le producteur attend la tête de file quand la fenêtre est pleine
+    (backpressure) : la mémoire ne dépend que de `window`, pas du nombre d'espèces.
+    """
+    pending: Deque[asyncio.Future] = deque()
+    emitted = 0
+
+    async def drain_one() -> None:
+        nonlocal emitted
+        summary = await pending.popleft()
+        if summary is not None:
+            emit(summary)
+            emitted += 1
+
+    for item in items:
+        pending.append(asyncio.ensure_future(job(item)))
+        if len(pending) >= window:
+            await drain_one()
+    while pending:
+        await drain_one()
+    return emitted
+
+
+def _report_coalesced(client: PokeApiClient) -> None:
+    if client.flight.coalesced:
+        print(f"[info] Single-flight: {client.flight.coalesced} requêtes dupliquées évitées", file=sys.stderr)
+
+
+async def stream_pairs(pairs: List[Tuple[str, str]], include_types: bool, cfg: FetcherConfig,
+                       move_cache: Dict[str, Optional[str]], emit: Callable[[Dict[str, Any]], None],
+                       window: int = DEFAULT_WINDOW) -> int:
+    async with PokeApiClient(cfg.client_config()) as client:
+        enricher = SpeciesEnricher(client, include_types, move_cache, cfg.moves, cfg.evolutions)
+
+        async def job(pair: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+            fetch_key, display_species = pair
+            try:
+                data = await fetch_pokemon_json(client, fetch_key)
+            except Exception as e:
+                print(f"[warn] Échec /pokemon/{fetch_key}: {e}", file=sys.stderr)
+                return None
+            return await enricher.summarize(data, display_species)
 
-    return results
+        n = await stream_in_order(pairs, job, emit, window)
+        _report_coalesced(client)
+    return n
 
 
-def load_pokemon_jsons_from_dir_with_names(dir_path: str) -> List[Tuple[Dict[str, Any], str]]:
-    out = []
-    for p in sorted(Path(dir_path).glob("*.json")):
-        try:
-            with p.open("r", encoding="utf-8") as f:
-                pj = json.load(f)
-                disp = pj.get("name") or (pj.get("species") or {}).get("name") or p.stem
-                out.append((pj, disp))
-        except Exception as e:
-            print(f"[warn] Échec lecture {p}: {e}", file=sys.stderr)
-    return out
+def load_pokemon_json_with_name(p: Path) -> Optional[Tuple[Dict[str, Any], str]]:
+    try:
+        with p.open("r", encoding="utf-8") as f:
+            pj = json.load(f)
+        disp = pj.get("name") or (pj.get("species") or {}).get("name") or p.stem
+        return pj, disp
+    except Exception as e:
+        print(f"[warn] Échec lecture {p}: {e}", file=sys.stderr)
+        return None
+
+
+async def stream_dir(dir_path: str, include_types: bool, cfg: FetcherConfig,
+                     move_cache: Dict[str, Optional[str]], emit: Callable[[Dict[str, Any]], None],
+                     window: int = DEFAULT_WINDOW, skip: Optional[Set[str]] = None) -> int:
+    skip = skip or set()
+    async with PokeApiClient(cfg.client_config()) as client:
+        enricher = SpeciesEnricher(client, include_types, move_cache, cfg.moves, cfg.evolutions)
+
+        async def job(p: Path) -> Optional[Dict[str, Any]]:
+            loaded = load_pokemon_json_with_name(p)
+            if loaded is None or loaded[1] in skip:
+                return None
+            return await enricher.summarize(*loaded)
+
+        n = await stream_in_order(sorted(Path(dir_path).glob("*.json")), job, emit, window)
+        _report_coalesced(client)
+    return n
+
+
+def read_done_species(path: Path) -> Set[str]:
+    """
+    Espèces ("Species") déjà présentes dans un JSONL existant, pour --resume.
+    Une dernière ligne tronquée (arrêt brutal pendant l'écriture) est retirée du fichier.
+    """
+    done: Set[str] = set()
+    if not path.exists():
+        return done
+    good_size = 0
+    with path.open("rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            good_size += len(raw)
+            try:
+                obj = json.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(obj, dict) and obj.get("Species"):
+                done.add(obj["Species"])
+    if good_size < path.stat().st_size:
+        print(f"[warn] {path}: dernière ligne incomplète supprimée", file=sys.stderr)
+        with path.open("r+b") as f:
+            f.truncate(good_size)
+    return done
 
 
 def build_document(results: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -371,8 +426,19 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--base-url", default=POKEAPI, help="Base URL PokeAPI (défaut: officiel).")
     p.add_argument("--timeout", type=int, default=20, help="Timeout HTTP en secondes (défaut: 20).")
     p.add_argument("--out", required=True, help="Chemin de sortie du JSON (ou JSONL si --jsonl).")
-    p.add_argument("--jsonl", action="store_true", help="Émettre en JSON Lines (une ligne par espèce).")
+    p.add_argument("--jsonl", action="store_true",
+                   help="Émettre en JSON Lines (une ligne par espèce), écrite au fil de l'eau.")
+    p.add_argument("--resume", action="store_true",
+                   help="Avec --jsonl : compléter le fichier existant en sautant les espèces déjà présentes.")
+    p.add_argument("--window", type=int, default=DEFAULT_WINDOW,
+                   help=f"Nombre max d'espèces traitées en parallèle, borne la mémoire (défaut: {DEFAULT_WINDOW}).")
     p.add_argument("--fallback-vgs", help="Liste de version_groups de fallback séparés par des virgules (par défaut: ordre décroissant des générations).")
+    add_throttle_args(p)
+    add_metrics_args(p)
+    add_cache_args(p)
+    add_dump_args(p)
+    add_move_index_args(p)
+    add_evo_index_args(p)
 
     return p.parse_args()
 
@@ -408,6 +474,12 @@ def main() -> None:
         base_url=args.base_url,
         timeout=args.timeout,
         concurrency=max(1, int(args.concurrency)),
+        cache=cache_from_args(args),
+        dump=dump_from_args(args),
+        moves=move_index_from_args(args),
+        evolutions=evo_index_from_args(args),
+        metrics=metrics_from_args(args),
+        **throttle_kwargs(args),
     )
 
     # CLI override for fallback list
@@ -433,117 +505,59 @@ def main() -> None:
             except Exception:
                 move_cache = {}
 
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if args.resume and not args.jsonl:
+        raise SystemExit("[err] --resume nécessite --jsonl.")
+    window = max(1, int(args.window))
+    done = read_done_species(out_path) if args.resume else set()
+    if done:
+        print(f"[info] Reprise: {len(done)} espèces déjà présentes dans {out_path}", file=sys.stderr)
+
+    # JSONL : chaque résumé est écrit (et flushé) dès qu'il est prêt ; JSON : document complet à la fin
     results: List[Dict[str, Any]] = []
+    out_f = out_path.open("a" if args.resume else "w", encoding="utf-8") if args.jsonl else None
 
-    if args.mapping_csv:
-        pairs = read_mapping_csv(args.mapping_csv)
-        if not pairs:
-            print("[warn] Le mapping CSV est vide ou invalide.", file=sys.stderr)
-        results = asyncio.run(process_pairs(pairs, include_types, cfg, move_cache))
-
-    elif args.from_dir:
-        pokes = load_pokemon_jsons_from_dir_with_names(args.from_dir)
-        summaries: List[Dict[str, Any]] = []
-        needed_urls: Dict[str, Optional[str]] = {}
-
-        async def enrich_and_collect():
-            async with aiohttp.ClientSession(headers={"User-Agent": cfg.user_agent}) as session:
-                limiter = RateLimiter(cfg.concurrency)
-                species_json_cache: Dict[str, Dict[str, Any]] = {}
-                evo_json_cache: Dict[str, Dict[str, Any]] = {}
-
-                async def get_stage_for_pokemon(poke_json: Dict[str, Any]) -> int:
-                    try:
-                        sp_url = (poke_json.get("species") or {}).get("url")
-                        if not sp_url:
-                            return -1
-                        if sp_url not in species_json_cache:
-                            species_json_cache[sp_url] = await fetch_species_json(session, sp_url, cfg, limiter)
-                        spj = species_json_cache[sp_url]
-                        evo = (spj.get("evolution_chain") or {}).get("url")
-                        if not evo:
-                            return -1
-                        if evo not in evo_json_cache:
-                            evo_json_cache[evo] = await fetch_evolution_chain_json(session, evo, cfg, limiter)
-                        evj = evo_json_cache[evo]
-                        chain = evj.get("chain") or {}
-                        target = (poke_json.get("species") or {}).get("name") or poke_json.get("name")
-                        if not target:
-                            return -1
-                        return compute_stage_from_chain(chain, target)
-                    except Exception:
-                        return -1
-
-                stage_tasks = [asyncio.create_task(get_stage_for_pokemon(pj)) for pj, _ in pokes]
-
-                for (pj, disp), st_fut in zip(pokes, stage_tasks):
-                    stage_val = await st_fut
-                    stats_map = {s["stat"]["name"]: s["base_stat"] for s in pj.get("stats", []) if s.get("stat")}
-
-                    ms, need_types = summarize_sv_moves_from_pokemon_json(pj, include_types, override_species_name=disp)
-
-                    # Compute gender distribution for --from-dir path
-                    gender_dist = {"male": 0.0, "female": 0.0, "genderless": 0.0}
-                    try:
-                        sp_url = (pj.get("species") or {}).get("url")
-                        if sp_url:
-                            if sp_url not in species_json_cache:
-                                species_json_cache[sp_url] = await fetch_species_json(session, sp_url, cfg, limiter)
-                            spj = species_json_cache.get(sp_url, {})
-                            gr = spj.get("gender_rate", -1)
-                            if gr == -1:
-                                gender_dist = {"male": 0.0, "female": 0.0, "genderless": 1.0}
-                            else:
-                                female = float(gr) / 8.0
-                                male = 1.0 - female
-                                gender_dist = {"male": male, "female": female, "genderless": 0.0}
-                    except Exception:
-                        pass
-
-                    summary = {
-                        "Species": disp,
-                        "species": ms.get("species"),
-                        "stage": stage_val,
-                        "stats": stats_map,
-                        "version_group": ms.get("version_group"),
-                        "moves": ms.get("moves"),
-                        "gender_distribution": gender_dist,
-                    }
-                    summaries.append(summary)
-                    for url in need_types.keys():
-                        needed_urls[url] = None
-
-                if include_types and summaries and needed_urls:
-                    to_resolve = list(needed_urls.keys())
-                    await resolve_move_types(session, to_resolve, cfg, move_cache, limiter)
-
-                if include_types:
-                    for s in summaries:
-                        for m in s["moves"]:
-                            url = m.pop("move_url", None)
-                            info = move_cache.get(url) if url else None
-                            if isinstance(info, dict):
-                                m["type"] = info.get("type")
-                                if info.get("name_en") is not None:
-                                    m["name_en"] = info.get("name_en")
-                            else:
-                                m["type"] = info
-
-        try:
-            asyncio.run(enrich_and_collect())
-        except Exception as e:
-            print(f"[warn] Enrichissement stages/types en mode --from-dir: {e}", file=sys.stderr)
-
-        results = summaries
+    def emit(summary: Dict[str, Any]) -> None:
+        if out_f is None:
+            results.append(summary)
+            return
+        out_f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+        out_f.flush()
 
-    else:
-        if args.species:
-            species_list = args.species
+    written = 0
+    try:
+        if args.from_dir:
+            try:
+                written = asyncio.run(stream_dir(args.from_dir, include_types, cfg, move_cache, emit, window, done))
+            except Exception as e:
+                print(f"[warn] Enrichissement stages/types en mode --from-dir: {e}", file=sys.stderr)
         else:
-            species_list = read_species_file(args.species_file)
-
-        pairs = [(sp, sp) for sp in species_list]
-        results = asyncio.run(process_pairs(pairs, include_types, cfg, move_cache))
+            if args.mapping_csv:
+                pairs = read_mapping_csv(args.mapping_csv)
+                if not pairs:
+                    print("[warn] Le mapping CSV est vide ou invalide.", file=sys.stderr)
+            else:
+                species_list = args.species or read_species_file(args.species_file)
+                pairs = [(sp, sp) for sp in species_list]
+            pairs = [pair for pair in pairs if pair[1] not in done]
+            written = asyncio.run(stream_pairs(pairs, include_types, cfg, move_cache, emit, window))
+    finally:
+        if out_f is not None:
+            out_f.close()
+
+    if cfg.dump is not None:
+        print(f"[info] Dump local: {cfg.dump.served} réponses servies sans réseau", file=sys.stderr)
+        cfg.dump.close()
+    if cfg.moves is not None:
+        print(f"[info] Index des moves: {cfg.moves.hits} moves résolus sans /move", file=sys.stderr)
+    if cfg.evolutions is not None:
+        print(f"[info] Index des évolutions: {cfg.evolutions.hits} stades/genres sans /pokemon-species", file=sys.stderr)
+    if cfg.cache is not None:
+        st = cfg.cache.stats()
+        print(f"[info] Cache HTTP: {st['hits']} hits, {st['misses']} misses, "
+              f"{st['revalidations']} revalidations, {st['entries']} entrées", file=sys.stderr)
+        cfg.cache.close()
 
     if args.move_cache:
         try:
@@ -551,18 +565,11 @@ def main() -> None:
         except Exception as e:
             print(f"[warn] Impossible d'écrire le move-cache: {e}", file=sys.stderr)
 
-    out_path = Path(args.out)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-
-    if args.jsonl:
-        with out_path.open("w", encoding="utf-8") as f:
-            for s in results:
-                f.write(json.dumps(s, ensure_ascii=False) + "\n")
-    else:
+    if out_f is None:
         doc = build_document(results)
         with out_path.open("w", encoding="utf-8") as f:
             json.dump(doc, f, ensure_ascii=False, indent=2)
-    print(f"[ok] Écrit: {out_path}", file=sys.stderr)
+    print(f"[ok] Écrit: {out_path} ({written} espèces)", file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -16,33 +16,28 @@ Rules (per user):
 
 Input:  a JSON file with {"results":[ ... species objects ... ]}  (or a plain list)
 Output: a JSON array of destination Pokémon objects (one per species).
+
+transform_species() below is the reference, one species at a time. With numpy installed the
+whole input goes through pokeapi_transform.transform_batch() instead (same output, columnar passes).
+--check runs both on the input and fails on the first species whose JSON differs.
 """
 
 import argparse
 import json
+import sys
+import time
 from pathlib import Path
 from typing import Any, Dict, List
 
-SCALE_DIVISOR = 10  # set to 100 if you truly want /100; /10 matches the sample provided
-
-STAT_KEY_MAP = {
-    "hp": "HP",
-    "attack": "Attack",
-    "defense": "Defense",
-    "special-attack": "Special Attack",
-    "special-defense": "Special Defense",
-    "speed": "Speed",
-}
-
-def round_half_up(x: float) -> int:
-    i = int(x)
-    frac = x - i
-    return i + (1 if frac >= 0.5 else 0)
-
-def normalize_type(t: str | None) -> str | None:
-    if t is None:
-        return None
-    return t[:1].upper() + t[1:].lower()
+from pokeapi_transform import (
+    SCALE_DIVISOR,
+    STAT_KEY_MAP,
+    genders_string,
+    has_numpy,
+    normalize_type,
+    round_half_up,
+    transform_batch,
+)
 
 def transform_species(obj: Dict[str, Any]) -> Dict[str, Any]:
     species_name = obj.get("species") or obj.get("Species") or ""
@@ -106,25 +101,8 @@ def transform_species(obj: Dict[str, Any]) -> Dict[str, Any]:
     # Sort TM/Tutor list alphabetically
     tm_tutor_list = sorted(tm_tutor_list, key=lambda e: (e["Move"].lower() if isinstance(e, dict) else str(e).lower()))
 
-    # Build Other Information with Genders string
-    gd = obj.get("gender_distribution")
-    genders_str = "Genderless"
-    try:
-        if isinstance(gd, dict):
-            male = gd.get("male")
-            female = gd.get("female")
-            genderless = gd.get("genderless")
-            if isinstance(genderless, (int, float)) and float(genderless) >= 1.0:
-                genders_str = "Genderless"
-            elif isinstance(male, (int, float)) and isinstance(female, (int, float)):
-                m_pct = round(float(male) * 100.0, 1)
-                f_pct = round(float(female) * 100.0, 1)
-                genders_str = f"{m_pct}% Male / {f_pct}% Female"
-    except Exception:
-        genders_str = "Genderless"
-
     other_info = {
-        "Genders": genders_str
+        "Genders": genders_string(obj.get("gender_distribution"))
     }
 
     dest = {
@@ -140,6 +118,9 @@ def transform_species(obj: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def load_input(path: Path) -> List[Dict[str, Any]]:
+    if path.suffix == ".jsonl":  # sv_moves_summary.py --jsonl
+        with path.open("r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
     data = json.loads(path.read_text(encoding="utf-8"))
     if isinstance(data, dict) and "results" in data and isinstance(data["results"], list):
         return data["results"]
@@ -147,20 +128,58 @@ def load_input(path: Path) -> List[Dict[str, Any]]:
         return data
     raise ValueError("Input must be a JSON list or an object with a 'results' list.")
 
+def check_engines(species_list: List[Dict[str, Any]], transformed: List[Dict[str, Any]]) -> int:
+    """Compare transform_batch output against transform_species, species by species (JSON, so 1 != True)."""
+    bad = 0
+    for i, (sp, got) in enumerate(zip(species_list, transformed)):
+        want = transform_species(sp)
+        if json.dumps(got, ensure_ascii=False) != json.dumps(want, ensure_ascii=False):
+            if not bad:
+                print(f"[warn] #{i} {want['Species']}: batch and reference differ", file=sys.stderr)
+                print(f"  batch:     {json.dumps(got['Moves'], ensure_ascii=False)}", file=sys.stderr)
+                print(f"  reference: {json.dumps(want['Moves'], ensure_ascii=False)}", file=sys.stderr)
+            bad += 1
+    return bad
+
+
 def main():
     ap = argparse.ArgumentParser(description="Transform sv_all.json to destination format.")
-    ap.add_argument("--in", dest="infile", required=True, help="Path to sv_all.json (JSON list or object with results[])")
+    ap.add_argument("--in", dest="infile", required=True, nargs="+",
+                    help="Path(s) to sv_all.json (JSON list, object with results[], or .jsonl); several files are concatenated")
     ap.add_argument("--out", dest="outfile", required=True, help="Output JSON path.")
+    ap.add_argument("--engine", choices=("auto", "numpy", "python"), default="auto",
+                    help="numpy: columnar batch transform (pokeapi_transform); python: one species at a time; "
+                         "auto: numpy if installed (default)")
+    ap.add_argument("--check", action="store_true",
+                    help="Also run transform_species on every species and exit 1 if the numpy output differs")
     args = ap.parse_args()
 
-    inp = Path(args.infile)
     outp = Path(args.outfile)
 
-    species_list = load_input(inp)
-    transformed = [transform_species(sp) for sp in species_list]
+    species_list: List[Dict[str, Any]] = []
+    for infile in args.infile:
+        species_list.extend(load_input(Path(infile)))
+
+    engine = args.engine
+    if engine == "auto":
+        engine = "numpy" if has_numpy() else "python"
+    t0 = time.perf_counter()
+    if engine == "numpy":
+        transformed = transform_batch(species_list, SCALE_DIVISOR)
+    else:
+        transformed = [transform_species(sp) for sp in species_list]
+    print(f"[info] {engine} transform: {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+
+    if args.check:
+        batch_out = transformed if engine == "numpy" else transform_batch(species_list, SCALE_DIVISOR)
+        bad = check_engines(species_list, batch_out)
+        if bad:
+            print(f"[err] {bad}/{len(species_list)} species differ between engines", file=sys.stderr)
+            sys.exit(1)
+        print(f"[ok] numpy and python engines agree on {len(species_list)} species", file=sys.stderr)
 
     outp.write_text(json.dumps(transformed, ensure_ascii=False, indent=2), encoding="utf-8")
     print(f"[ok] Wrote {outp} ({len(transformed)} species)")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
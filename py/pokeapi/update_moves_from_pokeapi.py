@@ -33,7 +33,11 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional, Set
 
-import aiohttp
+from pokeapi_cache import add_cache_args, cache_from_args
+from pokeapi_client import ClientConfig, PokeApiClient, PokeApiError, add_throttle_args, throttle_kwargs
+from pokeapi_dump import add_dump_args, dump_from_args
+from pokeapi_metrics import add_metrics_args, metrics_from_args
+from pokeapi_moves import add_move_index_args, move_index_from_args
 
 POKEAPI_BASE = "https://pokeapi.co/api/v2"
 
@@ -118,15 +122,10 @@ def unique_sorted_names(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             seen[key] = it
     return sorted(seen.values(), key=lambda x: x.get("Move",""))
 
-async def fetch_json(session: aiohttp.ClientSession, url: str) -> Optional[Dict[str, Any]]:
+async def fetch_json(client: PokeApiClient, url: str) -> Optional[Dict[str, Any]]:
     try:
-        async with session.get(url) as resp:
-            if resp.status == 400:
-                sys.stderr.write(f"[WARN] 400 at {url}\n")
-                return None
-            resp.raise_for_status()
-            return await resp.json()
-    except aiohttp.ClientResponseError as e:
+        return await client.get_json(url)
+    except PokeApiError as e:
         if e.status == 400:
             sys.stderr.write(f"[WARN] 400 at {url}\n")
             return None
@@ -136,10 +135,10 @@ async def fetch_json(session: aiohttp.ClientSession, url: str) -> Optional[Dict[
         sys.stderr.write(f"[ERROR] {url}: {e}\n")
         return None
 
-async def get_move_type(session: aiohttp.ClientSession, move_name_slug: str, cache: Dict[str, str]) -> Optional[str]:
+async def get_move_type(client: PokeApiClient, move_name_slug: str, cache: Dict[str, str]) -> Optional[str]:
     if move_name_slug in cache:
         return cache[move_name_slug]
-    data = await fetch_json(session, f"{POKEAPI_BASE}/move/{move_name_slug}")
+    data = await fetch_json(client, f"move/{move_name_slug}")
     if not data:
         return None
     tname = data.get("type", {}).get("name")
@@ -175,7 +174,7 @@ def version_group_label(vg: str) -> str:
     return info[1] if info else vg
 
 async def build_moves_for_pokemon(
-    session: aiohttp.ClientSession,
+    client: PokeApiClient,
     pokemon_slug: str,
     min_gen: int,
     max_gen: int,
@@ -188,14 +187,14 @@ async def build_moves_for_pokemon(
         tutor:    list of dicts {"Move","Type","Method":"Tutor"}
         egg:      list of dicts {"Move","Type","Method":"Egg"}
     """
-    data = await fetch_json(session, f"{POKEAPI_BASE}/pokemon/{pokemon_slug}")
+    data = await fetch_json(client, f"pokemon/{pokemon_slug}")
     if not data:
         return {"level_up": [], "machine": [], "tutor": [], "egg": []}
     # Get species URL from the /pokemon data to avoid alt-form slugs 404
     species_url = (data.get("species") or {}).get("url")
     evolved = False
     if species_url:
-        species_json = await fetch_json(session, species_url)
+        species_json = await fetch_json(client, species_url)
         evolved = bool(species_json and species_json.get("evolves_from_species"))
 
     # Collect by method and version_group
@@ -231,7 +230,7 @@ async def build_moves_for_pokemon(
                 continue
             label = version_group_label(vg)
             for _, slug in pairs:
-                t = await get_move_type(session, slug, move_type_cache)
+                t = await get_move_type(client, slug, move_type_cache)
                 tags = []
                 # Si ce n’est pas de la gen max, on ajoute le tag Legacy
                 if gen < max_gen:
@@ -264,7 +263,7 @@ async def build_moves_for_pokemon(
     have_pairs: Set[Tuple[str, str]] = set()  # (move_lower, level_str)
 
     async def level_entry(level: int, slug: str, tags: Optional[List[str]] = None) -> Dict[str, Any]:
-        t = await get_move_type(session, slug, move_type_cache)
+        t = await get_move_type(client, slug, move_type_cache)
         entry: Dict[str, Any] = {"Move": to_title(slug), "Type": t or None}
         if level > 0:
             entry["Level"] = level
@@ -347,20 +346,26 @@ async def main_async(args):
                 mapping.append((species, other))
 
     # Prepare HTTP client & cache
-    timeout = aiohttp.ClientTimeout(total=60)
-    conn = aiohttp.TCPConnector(limit=30)  # parallelism cap
-    move_type_cache: Dict[str, str] = {}
-
-    async with aiohttp.ClientSession(timeout=timeout, connector=conn) as session:
-        # Process in small batches for fairness
-        sem = asyncio.Semaphore(30)
-
+    cache = cache_from_args(args)
+    client_cfg = ClientConfig(
+        base_url=args.base_url,
+        timeout=60,
+        max_concurrency=max(1, args.concurrency),  # parallelism cap (adaptive below it)
+        cache=cache,
+        dump=dump_from_args(args),
+        metrics=metrics_from_args(args),
+        **throttle_kwargs(args),
+    )
+    # Types known from the move index are served without any /move request
+    move_index = move_index_from_args(args)
+    move_type_cache: Dict[str, str] = {m.slug: cap_type(m.type) for m in move_index or () if m.type}
+
+    async with PokeApiClient(client_cfg) as client:
         async def process_one(species: str, slug: str):
             if species not in idx_by_species:
                 # Silently ignore missing species in pokedex
                 return
-            async with sem:
-                moves = await build_moves_for_pokemon(session, slug, args.min_gen, args.max_gen, move_type_cache)
+            moves = await build_moves_for_pokemon(client, slug, args.min_gen, args.max_gen, move_type_cache)
             # Mutate pokedex entry
             entry = pokedex[idx_by_species[species]]
             moves_block = entry.setdefault("Moves", {})
@@ -379,6 +384,9 @@ async def main_async(args):
         for chunk_start in range(0, len(tasks), 50):
             await asyncio.gather(*tasks[chunk_start:chunk_start+50])
 
+    if cache is not None:
+        cache.close()
+
     # Save
     with out_path.open("w", encoding="utf-8") as f:
         json.dump(pokedex, f, ensure_ascii=False, indent=2)
@@ -393,6 +401,13 @@ def parse_args():
     p.add_argument("--out", default=None, help="Output path (default: overwrite pokedex)")
     p.add_argument("--min-gen", type=int, default=6, help="Minimum generation (inclusive), default 6")
     p.add_argument("--max-gen", type=int, default=9, help="Maximum generation (inclusive), default 9")
+    p.add_argument("--concurrency", type=int, default=30, help="Max concurrent HTTP requests, default 30")
+    p.add_argument("--base-url", default=POKEAPI_BASE, help="PokeAPI base URL (default: official; e.g. a pokeapi_standin replay server)")
+    add_throttle_args(p)
+    add_metrics_args(p)
+    add_cache_args(p)
+    add_dump_args(p)
+    add_move_index_args(p)
     return p.parse_args()
 
 def main():
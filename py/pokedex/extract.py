@@ -1,7 +1,10 @@
 
-import json, re, logging
+import argparse, bisect, json, re, logging, time
 from pathlib import Path
-import PyPDF2
+
+from pdf_pages import (add_jobs_args, add_page_engine_args, extract_pages, replay_logs, resolve_jobs, timing_line,
+                       timing_summary)
+from pdf_text_cache import add_page_cache_args, page_cache_from_args
 
 DEBUG_KEEP_RAW = False
 
@@ -38,20 +41,29 @@ OUT_LOG = "pokedex_extraction.log"
 # --- Logging setup ---
 logger = logging.getLogger("pokedex-extract")
 logger.setLevel(logging.INFO)
-# Console handler
-ch = logging.StreamHandler()
-ch.setLevel(logging.INFO)
-ch.setFormatter(logging.Formatter("%(levelname)s:%(message)s"))
-logger.addHandler(ch)
-# File handler
-fh = logging.FileHandler(OUT_LOG, mode="w", encoding="utf-8")
-fh.setLevel(logging.INFO)
-fh.setFormatter(logging.Formatter("%(levelname)s:%(message)s"))
-logger.addHandler(fh)
+
+def setup_logging(log_path: str):
+    # Handlers installed from main() only: pool workers re-import this module and must not truncate the log
+    # Console handler
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.INFO)
+    ch.setFormatter(logging.Formatter("%(levelname)s:%(message)s"))
+    logger.addHandler(ch)
+    # File handler
+    fh = logging.FileHandler(log_path, mode="w", encoding="utf-8")
+    fh.setLevel(logging.INFO)
+    fh.setFormatter(logging.Formatter("%(levelname)s:%(message)s"))
+    logger.addHandler(fh)
+
+HSPACE_RE = re.compile(r'[ \t]+')
+NON_LETTERS_RE = re.compile(r'[^A-Za-z]')
+KEY_VALUE_RE = re.compile(r'(?i)^([A-Za-z ][A-Za-z 0-9/()+\'.-]*?)\s*:\s*(.*)$')
+LEVELUP_RE = re.compile(r'^\s*(\d+|Evo\.?)\s+(.+?)\s*-\s*([A-Za-z]+)\s*$', flags=re.IGNORECASE)
+BASE_STAT_RE = re.compile(r'(?i)^(HP|Attack|Defense|Special Attack|Special Defense|Speed)\s*:\s*([0-9]+)')
 
 def clean_line(s: str) -> str:
     s = s.replace('\xa0', ' ').replace('‒', '-').replace('–', '-').replace('—', '-').replace(' )', ')')
-    s = re.sub(r'[ \t]+', ' ', s)
+    s = HSPACE_RE.sub(' ', s)
     return s.strip()
 
 def is_all_caps_title(line: str) -> bool:
@@ -59,7 +71,7 @@ def is_all_caps_title(line: str) -> bool:
     if not l: return False
     if l.upper() in {"POKÉDEX", "POKEDEX", "HOW TO READ: POKEDEX ENTRIES", "CONTENTS"}:
         return False
-    letters = re.sub(r'[^A-Za-z]', '', l)
+    letters = NON_LETTERS_RE.sub('', l)
     return len(letters) >= 3 and letters.isupper()
 
 def fix_species_spacing(name: str) -> str:
@@ -67,11 +79,11 @@ def fix_species_spacing(name: str) -> str:
     # On corrige uniquement les majuscules séparées par un espace
     return re.sub(r'\b([A-Z]{2,})\s+([A-Z]{1,})(\b| )', lambda m: m.group(1) + m.group(2) + m.group(3), name)
 
-def compare_string_with_spaces(s: str, c: str):
-    # Tolère espaces, deux-points, casse
-    import re
-    norm = lambda x: re.sub(r'[\s:]+', '', (x or '')).lower()
-    return norm(s).startswith(norm(c))
+SPACES_COLONS_RE = re.compile(r'[\s:]+')
+
+def header_key(s: str) -> str:
+    # Clé de comparaison des en-têtes (tolère espaces, deux-points, casse) : on compare par startswith
+    return SPACES_COLONS_RE.sub('', s or '').lower()
 
 def fallback_title(lines):
     # Try to pull an UPPERCASE species token even if the line contains "Normal Form", numbers, etc.
@@ -102,7 +114,7 @@ def parse_key_value_block(lines, start_idx, end_idx=None):
     end_idx = end_idx if end_idx is not None else len(lines)
     while i < end_idx:
         line = lines[i]
-        m = re.match(r'(?i)^([A-Za-z ][A-Za-z 0-9/()+\'.-]*?)\s*:\s*(.*)$', line)
+        m = KEY_VALUE_RE.match(line)
         if m:
             key = clean_line(m.group(1))
             val = clean_line(m.group(2))
@@ -111,10 +123,24 @@ def parse_key_value_block(lines, start_idx, end_idx=None):
     return data
 
 
-def parse_moves_list(lines, start_idx):
-    def compact_contains(haystack: str, needle: str) -> bool:
-        return needle.replace(' ', '').lower() in haystack.replace(' ', '').lower()
-
+MOVE_SUBSECTIONS = [
+    # (clé d'en-tête, première ligne d'un en-tête coupé avant "Move List", sous-section)
+    (header_key("Level Up Move List"), "Level Up", "Level Up Move List"),
+    (header_key("TM/HM Move List"), "TM/HM", "TM/HM Move List"),
+    (header_key("TM Move List"), "TM", "TM/HM Move List"),  # en-tête simplifié "TM Move List"
+    (header_key("Egg Move List"), "Egg", "Egg Move List"),
+    (header_key("Tutor Move List"), "Tutor", "Tutor Move List"),
+]
+MOVE_LIST_KEY = header_key("Move List")
+MOVES_STOP_KEYS = tuple(header_key(h) for h in [
+    "Base Stats:", "Basic Information", "Evolution:", "Size Information",
+    "Breeding Information", "Diet", "Habitat", "Capability List",
+    "Skill List", "Mega Evolution"
+])
+MEGA_COMPACT = "megaevolution"
+
+def parse_moves_list(lines, start_idx, keys=None):
+    # keys : header_key de chaque ligne quand l'appelant les a déjà (extract_page)
     sections = {
         "Level Up Move List": [],
         "TM/HM Move List": [],
@@ -126,50 +152,27 @@ def parse_moves_list(lines, start_idx):
     while i < len(lines):
         line = lines[i]
         nxt = lines[i+1] if i+1 < len(lines) else ""
+        key = keys[i] if keys is not None else header_key(line)
 
         # Stop si on voit "Mega Evolution" (même en plein milieu de ligne)
-        if compact_contains(line, "Mega Evolution") or (line == "Mega" and nxt == "Evolution"):
+        if MEGA_COMPACT in line.replace(' ', '').lower() or (line == "Mega" and nxt == "Evolution"):
             logger.debug(f"[Moves] Stopped at Mega Evolution (inline or split): {line} | {nxt}")
             break
 
         # Sauter "Move List" nu (ligne de titre)
-        if compare_string_with_spaces(line, "Move List"):
+        if key.startswith(MOVE_LIST_KEY):
             i += 1
             continue
 
         # Têtes de sous-sections (tolérant aux espaces / césures)
-        if compare_string_with_spaces(line, "Level Up Move List") or (line == "Level Up" and nxt == "Move List"):
-            current = "Level Up Move List"
-            i += 2 if (line == "Level Up" and nxt == "Move List") else 1
-            continue
-
-        if compare_string_with_spaces(line, "TM/HM Move List") or (line == "TM/HM" and nxt == "Move List"):
-            current = "TM/HM Move List"
-            i += 2 if (line == "TM/HM" and nxt == "Move List") else 1
-            continue
-
-        # Also accept simplified header "TM Move List"
-        if compare_string_with_spaces(line, "TM Move List") or (line == "TM" and nxt == "Move List"):
-            current = "TM/HM Move List"
-            i += 2 if (line == "TM" and nxt == "Move List") else 1
-            continue
-
-        if compare_string_with_spaces(line, "Egg Move List") or (line == "Egg" and nxt == "Move List"):
-            current = "Egg Move List"
-            i += 2 if (line == "Egg" and nxt == "Move List") else 1
-            continue
-
-        if compare_string_with_spaces(line, "Tutor Move List") or (line == "Tutor" and nxt == "Move List"):
-            current = "Tutor Move List"
-            i += 2 if (line == "Tutor" and nxt == "Move List") else 1
+        sub = next((m for m in MOVE_SUBSECTIONS if key.startswith(m[0]) or (line == m[1] and nxt == "Move List")), None)
+        if sub:
+            current = sub[2]
+            i += 2 if (line == sub[1] and nxt == "Move List") else 1
             continue
 
         # Stop si on arrive à une autre grande section
-        if any(compare_string_with_spaces(line, h) for h in [
-            "Base Stats:", "Basic Information", "Evolution:", "Size Information",
-            "Breeding Information", "Diet", "Habitat", "Capability List",
-            "Skill List", "Mega Evolution"
-        ]):
+        if key.startswith(MOVES_STOP_KEYS):
             break
 
         if current:
@@ -179,7 +182,7 @@ def parse_moves_list(lines, start_idx):
     def parse_levelup(block_lines):
         entries = []
         for ln in block_lines:
-            m = re.match(r'^\s*(\d+|Evo\.?)\s+(.+?)\s*-\s*([A-Za-z]+)\s*$', ln, flags=re.IGNORECASE)
+            m = LEVELUP_RE.match(ln)
             if m:
                 lvl = m.group(1)
                 entries.append({
@@ -211,100 +214,146 @@ def parse_moves_list(lines, start_idx):
         "Tutor Move List": parse_comma_or_list(sections["Tutor Move List"])
     }
 
-def extract_page(page_text: str, page_index: int):
-    lines = [clean_line(l) for l in (page_text or "").splitlines()]
+KNOWN_HEADERS = [
+    "Base Stats", "Basic Information", "Evolution", "Size Information",
+    "Breeding Information", "Diet", "Habitat", "Capability List", "Skill List",
+    "Move List", "Level Up Move List", "TM/HM Move List", "TM Move List",
+    "Egg Move List", "Tutor Move List", "Mega Evolution"
+]
+KNOWN_HEADERS_RE = re.compile('|'.join(re.escape(h) for h in KNOWN_HEADERS))
+
+# En-têtes coupés sur deux lignes : ('Level Up', 'Move List') -> 'Level Up Move List'
+WRAPPED_HEADERS = {
+    ("Level Up", "Move List"): "Level Up Move List",
+    ("Tutor", "Move List"): "Tutor Move List",
+    ("TM/HM", "Move List"): "TM/HM Move List",
+    ("TM", "Move List"): "TM/HM Move List",
+    ("Egg", "Move List"): "Egg Move List",
+    ("Mega", "Evolution"): "Mega Evolution",
+}
+
+# Sections repérées par la première ligne dont la clé commence par celle de l'en-tête
+SECTION_KEYS = [(name, header_key(h)) for name, h in [
+    ("base", "Base Stats"), ("basic", "Basic Information"), ("evo", "Evolution:"),
+    ("size", "Size Information"), ("breed", "Breeding Information"), ("diet", "Diet"),
+    ("hab", "Habitat"), ("cap", "Capability List"), ("skill", "Skill List"), ("move", "Move List"),
+]]
+CAPABILITY_KEY = header_key("Capability List")
+CAPABILITY_LIST_KEY = header_key("Capability List ")
+
+BASE_STATS_RE = re.compile(r'(?i)^Base Stats:?')
+EVOLUTION_RE = re.compile(r'(?i)^Evolution:')
+CAPABILITY_RE = re.compile(r'(?i)Capability.*List')
+
+def split_known_headers(l: str):
+    """Découpe les en-têtes collés sur une ligne (premier emplacement de chaque en-tête, hors début de ligne)."""
+    if not KNOWN_HEADERS_RE.search(l, 1):
+        return [l]
+    found = []
+    for h in KNOWN_HEADERS:
+        pos = l.find(h)
+        if pos > 0:
+            found.append((pos, h))
+    if not found:
+        return [l]
+    found.sort()
+    out = []
+    start = 0
+    for pos, h in found:
+        before = l[start:pos].strip()
+        if before:
+            out.append(before)
+        out.append(h)
+        start = pos + len(h)
+    rest = l[start:].strip()
+    if rest:
+        out.append(rest)
+    return out
+
+def lex_page(page_text: str, page_index: int):
+    """
+    Lignes réparées d'une page, en une passe : en-têtes coupés ou collés, mots coupés en fin de ligne,
+    "Capability List" suivi de son contenu. Renvoie (lignes, clés header_key, index des sections)
+    avec l'index de la première ligne de chaque section de SECTION_KEYS (-1 si absente) et
+    "mega" / "mega_split" (ligne contenant "Mega Evolution" / ligne "Evolution" après "Mega").
+    """
+    raw = [clean_line(l) for l in (page_text or "").splitlines()]
 
     # --- Dirty fix: some Capability List are wrongly formatted ---
-    KNOWN_HEADERS = [
-        "Base Stats", "Basic Information", "Evolution", "Size Information",
-        "Breeding Information", "Diet", "Habitat", "Capability List", "Skill List",
-        "Move List", "Level Up Move List", "TM/HM Move List", "TM Move List",
-        "Egg Move List", "Tutor Move List", "Mega Evolution"
-    ]
-
-    def compact(s: str) -> str:
-        return (s or "").replace(' ', '').lower()
-
-    fixed_lines = []
-    skip_next = False
     # Normalize wrapped headers like 'Level Up' '\n' 'Move List' -> 'Level Up Move List'
+    merged = []
     j = 0
-    while j < len(lines):
-        if skip_next:
-            skip_next = False
-            j += 1
-            continue
-        cur = lines[j]
-        nxt = lines[j+1] if j+1 < len(lines) else ""
-        if cur == "Level Up" and nxt == "Move List":
-            fixed_lines.append("Level Up Move List")
-            skip_next = True
-        elif cur == "Tutor" and nxt == "Move List":
-            fixed_lines.append("Tutor Move List")
-            skip_next = True
-        elif cur == "TM/HM" and nxt == "Move List":
-            fixed_lines.append("TM/HM Move List")
-            skip_next = True
-        elif cur == "TM" and nxt == "Move List":
-            fixed_lines.append("TM/HM Move List")
-            skip_next = True
-        elif cur == "Egg" and nxt == "Move List":
-            fixed_lines.append("Egg Move List")
-            skip_next = True
-        elif cur == "Mega" and nxt == "Evolution":
-            fixed_lines.append("Mega Evolution")
-            skip_next = True
+    while j < len(raw):
+        header = WRAPPED_HEADERS.get((raw[j], raw[j+1] if j+1 < len(raw) else ""))
+        if header:
+            merged.append(header)
+            j += 2
         else:
-            fixed_lines.append(cur)
-        j += 1
-
-    # Continue with subsequent header splitting fixes using fixed_lines as base
-    lines = fixed_lines
-    fixed_lines = []
-    for i, l in enumerate(lines):
-        if skip_next:
-            skip_next = False
-            continue
+            merged.append(raw[j])
+            j += 1
 
+    lines, keys = [], []
+    idx = {name: -1 for name, _ in SECTION_KEYS}
+    pending = list(SECTION_KEYS)
+    idx["mega"] = idx["mega_split"] = -1
+
+    def push(line: str, key: str) -> None:
+        n = len(lines)
+        if pending:
+            for section in [sk for sk in pending if key.startswith(sk[1])]:
+                idx[section[0]] = n
+                pending.remove(section)
+        if idx["mega"] == -1 and MEGA_COMPACT in line.replace(' ', '').lower():
+            idx["mega"] = n
+        if idx["mega_split"] == -1 and line == 'Evolution' and n and lines[-1] == 'Mega':
+            idx["mega_split"] = n
+        lines.append(line)
+        keys.append(key)
+
+    i = 0
+    while i < len(merged):
+        l = merged[i]
+        i += 1
         # --- Recoller les mots coupés en fin de ligne ---
-        if l.endswith('-') and i + 1 < len(lines):
-            merged = l[:-1].rstrip() + lines[i + 1].lstrip()
-            logger.debug(f"[Page {page_index}] Recollé '{l}' + '{lines[i+1]}' -> '{merged}'")
-            l = merged
-            skip_next = True
+        if l.endswith('-') and i < len(merged):
+            joined = l[:-1].rstrip() + merged[i].lstrip()
+            logger.debug(f"[Page {page_index}] Recollé '{l}' + '{merged[i]}' -> '{joined}'")
+            l = joined
+            i += 1
 
         # --- Découper les headers collés sur la même ligne ---
-        found = []
-        for h in KNOWN_HEADERS:
-            pos = l.find(h)
-            if pos > 0:
-                found.append((pos, h))
-        if found:
-            found.sort()
-            start = 0
-            for pos, h in found:
-                before = l[start:pos].strip()
-                if before:
-                    fixed_lines.append(before)
-                fixed_lines.append(h)
-                start = pos + len(h)
-            rest = l[start:].strip()
-            if rest:
-                fixed_lines.append(rest)
-        else:
-            fixed_lines.append(l)
-
-    lines = fixed_lines
-    fixed_lines = []
-    for l in lines:
-        # Cas spécial : "Capability List" + contenu collés
-        if compare_string_with_spaces(l, "Capability List "):
-            fixed_lines.append("Capability List")
-            fixed_lines.append(l[len("Capability List "):].strip())
-        else:
-            fixed_lines.append(l)
+        for part in split_known_headers(l):
+            key = header_key(part)
+            # Cas spécial : "Capability List" + contenu collés
+            if key.startswith(CAPABILITY_LIST_KEY):
+                push("Capability List", CAPABILITY_KEY)
+                rest = part[len("Capability List "):].strip()
+                push(rest, header_key(rest))
+            else:
+                push(part, key)
+
+    return lines, keys, idx
+
+# Noms de compétences (tolérance aux espaces / deux-points / casse), dans l'ordre de priorité
+SKILL_ALIASES = [(tuple(header_key(v) for v in variants), canonical) for variants, canonical in [
+    # Variantes "Edu" (ordre et espaces indifférents)
+    (["Edu: Tech", "Tech Edu"], "Tech Edu"),
+    (["Edu: Pokémon", "Edu: Pokemon", "Pokémon Edu", "Pokemon Edu"], "Pokémon Edu"),
+    (["Edu: Occult", "Occult Edu"], "Occult Edu"),
+    (["Edu: General", "General Edu"], "General Edu"),
+    (["Edu: Medicine", "Medicine Edu", "Med Edu"], "Medicine Edu"),
+    # Abréviations courantes
+    (["Athl"], "Athletics"),
+    (["Acro"], "Acrobatics"),
+    (["Percep"], "Perception"),
+] + [([c], c) for c in [
+    "Acrobatics", "Athletics", "Charm", "Command", "Guile",
+    "Intimidate", "Intuition", "Perception", "Stealth",
+    "Survival", "Focus"
+]]]
 
-    lines = fixed_lines
+def extract_page(page_text: str, page_index: int):
+    lines, keys, idx = lex_page(page_text, page_index)
 
     if DEBUG_KEEP_RAW:
         record = {"_page_index": page_index, "_raw_text": page_text}
@@ -329,66 +378,53 @@ def extract_page(page_text: str, page_index: int):
         species = species.title()
     record["Species"] = species
 
-    # --- Helpers basés sur compare_string_with_spaces ---
-    def index_of(header: str) -> int:
-        for i, l in enumerate(lines):
-            if compare_string_with_spaces(l, header):
-                return i
-        return -1
-
-    def contains_token(i: int, token: str) -> bool:
-        return token.replace(' ', '').lower() in lines[i].replace(' ', '').lower()
-
-    # Indices des sections (d'abord via compare_string_with_spaces, avec fallback regex si besoin)
-    idx_base  = index_of("Base Stats")
+    # Indices des sections (repérés par lex_page, avec fallback regex si besoin)
+    idx_base  = idx["base"]
     if idx_base == -1:
-        idx_base = next((i for i,l in enumerate(lines) if re.search(r'(?i)^Base Stats:?', l)), -1)
+        idx_base = next((i for i,l in enumerate(lines) if BASE_STATS_RE.search(l)), -1)
 
-    idx_basic = index_of("Basic Information")
-    idx_evo   = index_of("Evolution:")
+    idx_basic = idx["basic"]
+    idx_evo   = idx["evo"]
     if idx_evo == -1:
-        idx_evo = next((i for i,l in enumerate(lines) if re.search(r'(?i)^Evolution:', l)), -1)
+        idx_evo = next((i for i,l in enumerate(lines) if EVOLUTION_RE.search(l)), -1)
 
-    idx_size  = index_of("Size Information")
-    idx_breed = index_of("Breeding Information")
-    idx_diet  = index_of("Diet")
-    idx_hab   = index_of("Habitat")
-    idx_cap   = index_of("Capability List")
+    idx_size  = idx["size"]
+    idx_breed = idx["breed"]
+    idx_diet  = idx["diet"]
+    idx_hab   = idx["hab"]
+    idx_cap   = idx["cap"]
     if idx_cap == -1:
-        idx_cap = next((i for i,l in enumerate(lines) if re.search(r'(?i)Capability.*List', l)), -1)
+        idx_cap = next((i for i,l in enumerate(lines) if CAPABILITY_RE.search(l)), -1)
 
-    idx_skill = index_of("Skill List")
-    idx_move  = index_of("Move List")
+    idx_skill = idx["skill"]
+    idx_move  = idx["move"]
 
     # Mega Evolution (tolérant)
-    idx_mega = next((i for i in range(len(lines)) if contains_token(i, "Mega Evolution")), -1)
-    if idx_mega == -1:
-        for k in range(len(lines)-1):
-            if lines[k] == 'Mega' and lines[k+1] == 'Evolution':
-                idx_mega = k+1
-                break
+    idx_mega = idx["mega"] if idx["mega"] != -1 else idx["mega_split"]
 
     # Base Stats
     if idx_base != -1:
         stats = {}
         for l in lines[idx_base+1 : idx_base+25]:
-            m = re.match(r'(?i)^(HP|Attack|Defense|Special Attack|Special Defense|Speed)\s*:\s*([0-9]+)', l)
+            m = BASE_STAT_RE.match(l)
             if m:
                 stats[m.group(1)] = int(m.group(2))
         if not stats:
             logger.warning(f"[p{page_index} {species}] 'Base Stats' section found but no stats parsed.")
         record["Base Stats"] = stats
 
-    def collect_between(start_idx, next_indices):
+    next_all = [idx_evo, idx_size, idx_breed, idx_diet, idx_hab, idx_cap, idx_skill, idx_move, idx_mega, idx_base, idx_basic]
+    bounds = sorted({i for i in next_all if i != -1})
+
+    def collect_between(start_idx):
+        # Tranche jusqu'au début de section suivant (parmi next_all, triés dans bounds)
         if start_idx == -1: return []
-        following = [i for i in next_indices if i != -1 and i > start_idx]
-        end = min(following) if following else len(lines)
+        k = bisect.bisect_right(bounds, start_idx)
+        end = bounds[k] if k < len(bounds) else len(lines)
         return lines[start_idx+1:end]
 
-    next_all = [idx_evo, idx_size, idx_breed, idx_diet, idx_hab, idx_cap, idx_skill, idx_move, idx_mega, idx_base, idx_basic]
-
     # Basic Info
-    basic_block = collect_between(idx_basic, next_all)
+    basic_block = collect_between(idx_basic)
     if basic_block:
         bi = parse_key_value_block(basic_block, 0, len(basic_block))
         if "Type" in bi and bi["Type"]:
@@ -398,19 +434,19 @@ def extract_page(page_text: str, page_index: int):
         record["Basic Information"] = bi
 
     # Evolution
-    evo_block = collect_between(idx_evo, next_all)
+    evo_block = collect_between(idx_evo)
     if evo_block:
         evo_lines = [l for l in evo_block if l]
         record["Evolution"] = evo_lines
 
     # Size
-    size_block = collect_between(idx_size, next_all)
+    size_block = collect_between(idx_size)
     if size_block:
         si = parse_key_value_block(size_block, 0, len(size_block))
         record["Size Information"] = si
 
     # Breeding
-    breed_block = collect_between(idx_breed, next_all)
+    breed_block = collect_between(idx_breed)
     if breed_block:
         br = parse_key_value_block(breed_block, 0, len(breed_block))
         record["Breeding Information"] = br
@@ -437,7 +473,7 @@ def extract_page(page_text: str, page_index: int):
             logger.warning(f"[p{page_index} {species}] 'Habitat' header found but no ':' value.")
 
     # Capabilities (parenthesis-aware join + comma split outside parentheses)
-    cap_block = collect_between(idx_cap, next_all)
+    cap_block = collect_between(idx_cap)
     if cap_block:
         acc = ""
         level = 0
@@ -465,7 +501,7 @@ def extract_page(page_text: str, page_index: int):
         logger.warning(f"[p{page_index} {species}] No 'Capability List' section found.")
 
     # Skills
-    skill_block = collect_between(idx_skill, next_all)
+    skill_block = collect_between(idx_skill)
     if skill_block:
         skills_text = ' '.join(skill_block)
         skills = {}
@@ -475,38 +511,11 @@ def extract_page(page_text: str, page_index: int):
 
         def normalize_skill_name(n: str) -> str:
             n = clean_line(n)
-
-            # Variantes "Edu" (ordre et espaces indifférents)
-            if compare_string_with_spaces(n, "Edu: Tech") or compare_string_with_spaces(n, "Tech Edu"):
-                return "Tech Edu"
-            if (compare_string_with_spaces(n, "Edu: Pokémon")
-                or compare_string_with_spaces(n, "Edu: Pokemon")
-                or compare_string_with_spaces(n, "Pokémon Edu")
-                or compare_string_with_spaces(n, "Pokemon Edu")):
-                return "Pokémon Edu"
-            if compare_string_with_spaces(n, "Edu: Occult") or compare_string_with_spaces(n, "Occult Edu"):
-                return "Occult Edu"
-            if compare_string_with_spaces(n, "Edu: General") or compare_string_with_spaces(n, "General Edu"):
-                return "General Edu"
-            if (compare_string_with_spaces(n, "Edu: Medicine")
-                or compare_string_with_spaces(n, "Medicine Edu")
-                or compare_string_with_spaces(n, "Med Edu")):
-                return "Medicine Edu"
-
-            # Abréviations courantes
-            if compare_string_with_spaces(n, "Athl"):   return "Athletics"
-            if compare_string_with_spaces(n, "Acro"):   return "Acrobatics"
-            if compare_string_with_spaces(n, "Percep"): return "Perception"
-
-            # Principales compétences « simples » (tolérance aux espaces en trop)
-            for canonical in [
-                "Acrobatics","Athletics","Charm","Command","Guile",
-                "Intimidate","Intuition","Perception","Stealth",
-                "Survival","Focus"
-            ]:
-                if compare_string_with_spaces(n, canonical):
+            key = header_key(n)
+            # Variantes "Edu", abréviations courantes puis compétences « simples » (voir SKILL_ALIASES)
+            for prefixes, canonical in SKILL_ALIASES:
+                if key.startswith(prefixes):
                     return canonical
-
             return n  # défaut : on garde tel quel
 
         # extraction "Nom 2d6(+X)" robuste
@@ -528,11 +537,11 @@ def extract_page(page_text: str, page_index: int):
 
     # Moves
     if idx_move != -1:
-        record["Moves"] = parse_moves_list(lines, idx_move)
+        record["Moves"] = parse_moves_list(lines, idx_move, keys)
 
     # Mega Evolution
     if idx_mega != -1:
-        mega_block = collect_between(idx_mega, next_all)
+        mega_block = collect_between(idx_mega)
         joined = ' '.join([clean_line(x) for x in mega_block])
         joined = re.sub(r'\s+', ' ', joined).strip()
 
@@ -573,21 +582,37 @@ def extract_page(page_text: str, page_index: int):
     return record
 
 def main():
-    reader = PyPDF2.PdfReader(PDF_PATH)
+    ap = argparse.ArgumentParser(description="Extract pokedex records from a dex PDF, one page per species.")
+    ap.add_argument("--pdf", default=PDF_PATH, help=f"Input PDF (default: {PDF_PATH})")
+    ap.add_argument("--out", default=OUT_JSON, help=f"Output JSON (default: {OUT_JSON})")
+    ap.add_argument("--log", default=OUT_LOG, help=f"Log file (default: {OUT_LOG})")
+    ap.add_argument("--pages", nargs=2, type=int, metavar=("START", "END"), help="Page range [START, END) (default: all)")
+    add_jobs_args(ap)
+    add_page_engine_args(ap)
+    add_page_cache_args(ap)
+    args = ap.parse_args()
+    setup_logging(args.log)
+
+    t0 = time.perf_counter()
     records = []
+    results = []
     pages_with_text = 0
-    for i in range(len(reader.pages)):
-    #for i in range(0,11):
-        try:
-            page_text = reader.pages[i].extract_text() or ""
-        except Exception as e:
-            logger.exception(f"[p{i}] Error extracting text: {e}")
+    pages = range(*args.pages) if args.pages else None
+    cache = page_cache_from_args(args)
+    for res in extract_pages(args.pdf, pages, extract_page, jobs=args.jobs, log_name=logger.name, cache=cache,
+                             engine=args.engine):
+        i = res.index
+        results.append(res)
+        replay_logs(logger, res)
+        logger.info(timing_line(res))
+        if res.error is not None:
+            logger.error(f"[p{i}] Error extracting text: {res.error}")
             continue
-        if not page_text.strip():
+        if not res.text.strip():
             logger.warning(f"[p{i}] Empty/blank page text.")
             continue
         pages_with_text += 1
-        rec = extract_page(page_text, i)
+        rec = res.record
 
         # Inclusion condition: species + any meaningful section parsed
         has_any = any(rec.get(k) for k in ["Base Stats", "Moves", "Basic Information", "Skills", "Capabilities"])
@@ -599,12 +624,14 @@ def main():
             continue
         records.append(rec)
 
-    Path(OUT_JSON).write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding='utf-8')
+    Path(args.out).write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding='utf-8')
     #with open(OUT_NDJSON, 'w', encoding='utf-8') as f:
     #    for r in records:
     #        f.write(json.dumps(r, ensure_ascii=False) + "\\n")
 
     logger.info(f"Parsed {len(records)} records from {pages_with_text} non-empty pages.")
+    for line in timing_summary(results, time.perf_counter() - t0, min(resolve_jobs(args.jobs), len(results) or 1)):
+        logger.info(line)
     #logger.info(f"Wrote {OUT_JSON} and {OUT_NDJSON}. Log: {OUT_LOG}")
 
 if __name__ == "__main__":
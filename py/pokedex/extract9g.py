@@ -1,23 +1,30 @@
-import json, re
+import argparse, json, re, time
 from pathlib import Path
-import PyPDF2
 import logging
 
+from pdf_pages import (add_jobs_args, add_page_engine_args, extract_pages, page_count, replay_logs, resolve_jobs,
+                       timing_line, timing_summary)
+from pdf_text_cache import add_page_cache_args, page_cache_from_args
+
 PDF_PATH = "Gen 9 Homebrew Raw Document.pdf"   # ← adapte si besoin
 OUT_JSON = "../../ptu/data/pokedex/pokedex_community_temp.json"
 OUT_NDJSON = "pokedex.ndjson"
 OUT_LOG = "pokedex_extraction.log"
+FIRST_PAGE, LAST_PAGE = 46, 174
 # Logging
 logger = logging.getLogger("pokedex-extract")
 logger.setLevel(logging.INFO)
-ch = logging.StreamHandler()
-ch.setLevel(logging.INFO)
-ch.setFormatter(logging.Formatter("%(levelname)s:%(message)s"))
-logger.addHandler(ch)
-fh = logging.FileHandler(OUT_LOG, mode="w", encoding="utf-8")
-fh.setLevel(logging.INFO)
-fh.setFormatter(logging.Formatter("%(levelname)s:%(message)s"))
-logger.addHandler(fh)
+
+def setup_logging(log_path):
+    # Called from main() only: pool workers re-import this module and must not truncate the log
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.INFO)
+    ch.setFormatter(logging.Formatter("%(levelname)s:%(message)s"))
+    logger.addHandler(ch)
+    fh = logging.FileHandler(log_path, mode="w", encoding="utf-8")
+    fh.setLevel(logging.INFO)
+    fh.setFormatter(logging.Formatter("%(levelname)s:%(message)s"))
+    logger.addHandler(fh)
 
 def split_outside_parentheses(text):
     """
@@ -415,29 +422,49 @@ def extract_page(page_text: str, page_index: int):
     return record
 
 def main():
-    reader = PyPDF2.PdfReader(PDF_PATH)
+    ap = argparse.ArgumentParser(description="Extract pokedex records from the Gen 9 homebrew PDF.")
+    ap.add_argument("--pdf", default=PDF_PATH, help=f"Input PDF (default: {PDF_PATH})")
+    ap.add_argument("--out", default=OUT_JSON, help=f"Output JSON (default: {OUT_JSON})")
+    ap.add_argument("--log", default=OUT_LOG, help=f"Log file (default: {OUT_LOG})")
+    ap.add_argument("--pages", nargs=2, type=int, default=[FIRST_PAGE, LAST_PAGE], metavar=("START", "END"),
+                    help=f"Dex page range [START, END) (default: {FIRST_PAGE} {LAST_PAGE})")
+    add_jobs_args(ap)
+    add_page_engine_args(ap)
+    add_page_cache_args(ap)
+    args = ap.parse_args()
+    setup_logging(args.log)
+
+    t0 = time.perf_counter()
+    first, last = args.pages
+    cache = page_cache_from_args(args)
+    total = page_count(args.pdf, cache, args.engine)
     records = []
-    #for i in range(len(reader.pages)):
-    for i in range(46, 174):
-        page_text = reader.pages[i].extract_text() or ""
-        if not page_text.strip(): continue
-        rec = extract_page(page_text, i)
-        if rec.get("Species") and (rec.get("Base Stats") or rec.get("Moves") or rec.get("Basic Information")):
+    results = []
+    rotom_in_text = False
+    # Pages after the dex range are only read for the Rotom sanity check below
+    for res in extract_pages(args.pdf, range(first, total), extract_page, jobs=args.jobs, log_name=logger.name,
+                             parse_pages=range(first, last), cache=cache, engine=args.engine):
+        if res.error is not None:
+            logger.error(f"[p{res.index}] Error extracting text: {res.error}")
+            continue
+        rotom_in_text = rotom_in_text or bool(re.search(r"(?i)\brotom\b", res.text))
+        if res.index >= last:
+            continue
+        results.append(res)
+        replay_logs(logger, res)
+        logger.info(timing_line(res))
+        rec = res.record
+        if rec and rec.get("Species") and (rec.get("Base Stats") or rec.get("Moves") or rec.get("Basic Information")):
             records.append(rec)
 
-    Path(OUT_JSON).write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding='utf-8')
+    Path(args.out).write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding='utf-8')
     # Sanity: report if Rotom appears in text but not parsed
-    try:
-        all_text = []
-        for i in range(46,len(reader.pages)):
-            t = reader.pages[i].extract_text() or ""
-            all_text.append(t)
-        if any(re.search(r"(?i)\brotom\b", t) for t in all_text) and not any("ROTOM" in (r.get("Species","").upper()) for r in records):
-            logger.error("ROTOM appears in PDF text but no Rotom records parsed. Check title/header parsing.")
-    except Exception as e:
-        logger.info(f"Rotom check skipped: {e}")
+    if rotom_in_text and not any("ROTOM" in (r.get("Species","").upper()) for r in records):
+        logger.error("ROTOM appears in PDF text but no Rotom records parsed. Check title/header parsing.")
     logger.info(f"Parsed {len(records)} records.")
-    logger.info(f"Outputs: {OUT_JSON}, {OUT_NDJSON}. Log: {OUT_LOG}")
+    for line in timing_summary(results, time.perf_counter() - t0, min(resolve_jobs(args.jobs), len(results) or 1)):
+        logger.info(line)
+    logger.info(f"Outputs: {args.out}, {OUT_NDJSON}. Log: {args.log}")
 
     with open(OUT_NDJSON, 'w', encoding='utf-8') as f:
         for r in records:
@@ -1,33 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+get_number_api.py
+-----------------
+Renseigne "Number" (numéro du Pokédex national) pour chaque fiche d'un ou plusieurs pokédex PTU.
+
+Toutes les espèces des fichiers sont résolues en un seul lot concurrent (pokeapi_numbers) :
+index des noms, /pokemon-species/, puis /pokemon/ et son lien variété -> espèce pour les formes.
+Les résultats sont gardés dans l'index persistant pokeapi_numbers.json ; les runs suivants
+(et pokedex_sort_by_number.py --number-index) ne refont aucune requête pour ces noms.
+
+    python get_number_api.py --in ../../ptu/data/pokedex/fandex/pokedex_variant.json
+    python get_number_api.py --in a.json b.json --concurrency 32 --retry-missing
+"""
+
+import argparse
+import asyncio
 import json
-import requests
+import sys
+import time
 from pathlib import Path
 
-INPUT_FILE = "../../ptu/data/pokedex/fandex/pokedex_variant.json"
-OUTPUT_FILE = "../../ptu/data/pokedex/fandex/pokedex_variant.json"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "pokeapi"))
+from pokeapi_cache import add_cache_args, cache_from_args  # noqa: E402
+from pokeapi_client import ClientConfig, add_throttle_args, throttle_kwargs  # noqa: E402
+from pokeapi_dump import add_dump_args, dump_from_args  # noqa: E402
+from pokeapi_metrics import add_metrics_args, metrics_from_args  # noqa: E402
+from pokeapi_names import add_name_index_args, name_index_from_args  # noqa: E402
+from pokeapi_numbers import POKEAPI, add_number_index_args, number_index_from_args, resolve_many  # noqa: E402
 
-API_URL = "https://pokeapi.co/api/v2/pokemon-species/{}"
+DEFAULT_INPUT = "../../ptu/data/pokedex/fandex/pokedex_variant.json"
 
 
-def get_pokemon_number(species_name):
-    response = requests.get(API_URL.format(species_name.lower()), timeout=10)
+def main():
+    ap = argparse.ArgumentParser(description="Ajoute le numéro du Pokédex national (PokeAPI) à chaque fiche.")
+    ap.add_argument("--in", dest="inputs", nargs="+", default=[DEFAULT_INPUT],
+                    help=f"Pokédex JSON à compléter, modifiés sur place (défaut: {DEFAULT_INPUT}).")
+    ap.add_argument("--out", help="Fichier de sortie (une seule entrée).")
+    ap.add_argument("--concurrency", type=int, default=16, help="Requêtes PokeAPI simultanées (défaut: 16).")
+    ap.add_argument("--base-url", default=POKEAPI, help="Base URL PokeAPI (défaut: officiel).")
+    ap.add_argument("--retry-missing", action="store_true", help="Redemander les noms mémorisés comme introuvables.")
+    add_number_index_args(ap)
+    add_name_index_args(ap)
+    add_throttle_args(ap)
+    add_metrics_args(ap)
+    add_cache_args(ap)
+    add_dump_args(ap)
+    args = ap.parse_args()
 
-    if response.status_code != 200:
-        print(f"Impossible de trouver {species_name}")
-        return None
+    if args.out and len(args.inputs) > 1:
+        ap.error("--out n'accepte qu'un seul fichier --in")
 
-    return response.json()["id"]
+    t0 = time.perf_counter()
+    docs = []
+    for path in args.inputs:
+        with open(path, "r", encoding="utf-8") as f:
+            docs.append((path, json.load(f)))
 
+    index = number_index_from_args(args)
+    cfg = ClientConfig(
+        base_url=args.base_url,
+        max_concurrency=max(1, args.concurrency),
+        cache=cache_from_args(args),
+        dump=dump_from_args(args),
+        metrics=metrics_from_args(args),
+        **throttle_kwargs(args),
+    )
+    species = [p.get("Species") for _, data in docs for p in data]
+    numbers = asyncio.run(resolve_many(cfg, species, index, name_index_from_args(args), args.retry_missing))
+    if index.added:
+        index.save(args.number_index)
+        print(f"[info] Index des numéros : {index.added} nouveaux noms ({Path(args.number_index).name})", file=sys.stderr)
 
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    data = json.load(f)
+    for name, number in numbers.items():
+        if number is None and name not in index.errors:
+            print(f"Impossible de trouver {name}")
 
-for pokemon in data:
-    species = pokemon.get("Species")
+    for path, data in docs:
+        for pokemon in data:
+            species = pokemon.get("Species")
+            if species:
+                pokemon["Number"] = numbers.get(species)
+        out = args.out or path
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"Fichier généré : {out}")
 
-    if species:
-        pokemon["Number"] = get_pokemon_number(species)
+    print(f"[ok] {len(numbers)} espèces, {sum(n is not None for n in numbers.values())} numérotées, "
+          f"{len(index.errors)} en erreur ({time.perf_counter() - t0:.1f}s)", file=sys.stderr)
 
-with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    json.dump(data, f, ensure_ascii=False, indent=2)
 
-print(f"Fichier généré : {OUTPUT_FILE}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
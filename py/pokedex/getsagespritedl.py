@@ -1,20 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+getsagespritedl.py
+------------------
+Télécharge les sprites listés dans sprites.csv (front / back / mini) vers sprites/<dossier>/<numero>.<ext>.
+
+Manifeste persistant (sprites/manifest.json) : fichier -> url, ETag, Last-Modified, taille, sha256.
+  - une même URL peut alimenter plusieurs fichiers : chacun a son entrée, et une entrée dont l'URL
+    ne correspond plus au CSV est ignorée (le fichier est retéléchargé) ;
+  - un fichier déjà au manifeste et présent sur disque est revalidé par requête conditionnelle
+    (If-None-Match / If-Modified-Since) : 304 -> rien n'est réécrit ; --no-revalidate le saute sans requête ;
+  - reprise : chaque succès est inscrit au manifeste au fil de l'eau (sauvegarde atomique périodique),
+    les fichiers sont écrits via un .part renommé : un arrêt brutal ne laisse pas d'image tronquée ;
+  - un fichier présent mais absent du manifeste (ancienne version du script) est adopté tel quel ;
+  - déduplication par contenu (sha256) entre front/back/mini : --dedupe hardlink (défaut) remplace
+    la copie par un lien physique, --dedupe reference n'écrit pas la copie et note "same_as" au manifeste.
+
+Rapport final : téléchargés / inchangés (304 ou contenu identique) / dédupliqués / échecs, octets, fichiers/s et Mo/s.
+--base-url redirige tous les téléchargements vers un serveur local (même chemin), pour les tests.
+
+    python getsagespritedl.py
+    python getsagespritedl.py --concurrency 16 --progress --metrics-json sprites_metrics.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
 import csv
+import hashlib
+import json
 import os
+import shutil
+import sys
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from urllib.parse import urlparse
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse, urlsplit
 
-import requests
+# Client HTTP partagé avec les scripts py/pokeapi (limiteur adaptatif, retries, métriques)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "pokeapi"))
+from pokeapi_client import ClientConfig, PokeApiClient, add_throttle_args, throttle_kwargs  # noqa: E402
+from pokeapi_metrics import add_metrics_args, metrics_from_args  # noqa: E402
 
 CSV_FILE = "sprites.csv"
 OUTPUT_DIR = "sprites"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = 2
 
 MAX_WORKERS = 32
+SAVE_EVERY = 50
 
-session = requests.Session()
-
-for folder in ["front", "back", "mini"]:
-    (Path(OUTPUT_DIR) / folder).mkdir(parents=True, exist_ok=True)
+COLUMNS = [
+    ("front_sprite", "front"),
+    ("back_sprite", "back"),
+    ("mini_sprite", "mini"),
+]
 
 
 def get_extension(url):
@@ -26,70 +69,290 @@ def get_extension(url):
     return ext
 
 
-def download_file(url, output_path):
-    try:
-        r = session.get(url, timeout=30)
-        r.raise_for_status()
-
-        with open(output_path, "wb") as f:
-            f.write(r.content)
-
-        return f"✓ {output_path}"
-
-    except Exception as e:
-        return f"✗ {output_path} -> {e}"
-
-
-jobs = []
-
-with open(CSV_FILE, encoding="utf-8-sig") as f:
-    reader = csv.DictReader(f)
-
-    for row in reader:
-        num = int(row["numero"])
-
-        mapping = [
-            ("front_sprite", "front"),
-            ("back_sprite", "back"),
-            ("mini_sprite", "mini"),
-        ]
-
-        for column, folder in mapping:
-            url = row[column].strip()
-
-            if not url:
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def rebase(url: str, base_url: Optional[str]) -> str:
+    """Même chemin, autre hôte : https://static.../a/b.png + http://127.0.0.1:8771 -> http://127.0.0.1:8771/a/b.png"""
+    if not base_url:
+        return url
+    parts = urlsplit(url)
+    return base_url.rstrip("/") + parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+@dataclass
+class Job:
+    url: str
+    path: Path   # chemin de sortie
+    rel: str     # chemin relatif au dossier de sortie (clé du manifeste)
+
+
+def read_jobs(csv_file: Path, out_dir: Path) -> List[Job]:
+    jobs: List[Job] = []
+    with csv_file.open(encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            num = int(row["numero"])
+            for column, folder in COLUMNS:
+                url = (row.get(column) or "").strip()
+                if not url:
+                    continue
+                rel = f"{folder}/{num:03d}{get_extension(url)}"
+                jobs.append(Job(url, out_dir / rel, rel))
+    return jobs
+
+
+class Manifest:
+    """chemin relatif -> {url, etag, last_modified, size, sha256[, same_as]} ; sauvegarde atomique.
+
+    Le format 1 (clé url -> {path, ...}) est converti au chargement : une URL partagée par plusieurs
+    fichiers n'y avait qu'une entrée, les autres fichiers sont simplement (re)téléchargés ou adoptés.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            try:
+                doc = json.loads(path.read_text(encoding="utf-8"))
+                if doc.get("format") == MANIFEST_FORMAT:
+                    self.files = doc.get("files") or {}
+                elif doc.get("format") == 1:
+                    for url, e in (doc.get("files") or {}).items():
+                        self.files[e["path"]] = {"url": url, **{k: v for k, v in e.items() if k != "path"}}
+                else:
+                    print(f"[warn] {path}: format inconnu, manifeste ignoré", file=sys.stderr)
+            except ValueError:
+                print(f"[warn] {path}: illisible, manifeste ignoré", file=sys.stderr)
+        self._dirty = 0
+
+    def by_hash(self) -> Dict[str, str]:
+        """sha256 -> chemin relatif d'un fichier réellement écrit portant ce contenu."""
+        out: Dict[str, str] = {}
+        for rel, entry in self.files.items():
+            if entry.get("sha256") and not entry.get("same_as"):
+                out.setdefault(entry["sha256"], rel)
+        return out
+
+    def set(self, rel: str, entry: Dict[str, Any]) -> None:
+        self.files[rel] = entry
+        self._dirty += 1
+        if self._dirty >= SAVE_EVERY:
+            self.save()
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        doc = {"format": MANIFEST_FORMAT, "files": dict(sorted(self.files.items()))}
+        tmp.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._dirty = 0
+
+
+class Downloader:
+    def __init__(self, client: PokeApiClient, manifest: Manifest, out_dir: Path, base_url: Optional[str],
+                 revalidate: bool, dedupe: str):
+        self.client = client
+        self.manifest = manifest
+        self.out_dir = out_dir
+        self.base_url = base_url
+        self.revalidate = revalidate
+        self.dedupe = dedupe
+        self.hashes = manifest.by_hash()
+        self.counts = {"downloaded": 0, "unchanged": 0, "skipped": 0, "adopted": 0, "deduped": 0, "failed": 0}
+        self.bytes = 0
+        self.failures: List[str] = []
+
+    def _known(self, job: Job) -> Optional[Dict[str, Any]]:
+        """Entrée du manifeste pour ce fichier, si elle provient bien de la même URL."""
+        entry = self.manifest.files.get(job.rel)
+        return entry if entry is not None and entry.get("url") == job.url else None
+
+    def _present(self, rel: str, entry: Dict[str, Any]) -> bool:
+        """Le fichier du manifeste est-il toujours là (ou sa référence, en mode reference) ?"""
+        target = self.out_dir / (entry.get("same_as") or rel)
+        return target.exists() and target.stat().st_size == entry.get("size")
+
+    def _referenced(self, rel: str) -> bool:
+        return any(e.get("same_as") == rel for e in self.manifest.files.values())
+
+    def _detach_references(self, rel: str) -> None:
+        """Matérialise (lien physique, sinon copie) les entrées "same_as" pointant sur rel avant sa réécriture."""
+        src = self.out_dir / rel
+        for path, e in list(self.manifest.files.items()):
+            if e.get("same_as") != rel or not src.exists():
                 continue
+            dst = self.out_dir / path
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copyfile(src, dst)
+            e = {k: v for k, v in e.items() if k != "same_as"}
+            self.manifest.set(path, e)
+            self.hashes.setdefault(e["sha256"], path)
+
+    def _adopt(self, job: Job) -> None:
+        digest = sha256_file(job.path)
+        self.manifest.set(job.rel, {"url": job.url, "size": job.path.stat().st_size, "sha256": digest})
+        self.hashes.setdefault(digest, job.rel)
+        self.counts["adopted"] += 1
+
+    def _store(self, job: Job, body: bytes, headers: Any) -> None:
+        digest = hashlib.sha256(body).hexdigest()
+        entry: Dict[str, Any] = {"url": job.url, "size": len(body), "sha256": digest}
+        for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified")):
+            if headers.get(header):
+                entry[key] = headers[header]
+
+        known = self._known(job)
+        if known is not None and known.get("sha256") == digest and self._present(job.rel, known):
+            # même contenu (fichier adopté sans validateurs, ou serveur sans 304) : seuls les validateurs changent
+            self.manifest.set(job.rel, {**known, **{k: v for k, v in entry.items() if k in ("etag", "last_modified")}})
+            self.counts["unchanged"] += 1
+            return
+
+        # contenu changé : ce fichier ne porte plus son ancien hash, ses références reçoivent l'ancien contenu
+        for old in [d for d, rel in self.hashes.items() if rel == job.rel and d != digest]:
+            del self.hashes[old]
+            self._detach_references(job.rel)
+
+        holder = self.hashes.get(digest)
+        if holder == job.rel:
+            holder = None
+        if holder is not None and self.dedupe != "off" and (self.out_dir / holder).exists():
+            if self.dedupe == "reference" and not self._referenced(job.rel):
+                entry["same_as"] = holder
+                if job.path.exists():
+                    job.path.unlink()
+                self.manifest.set(job.rel, entry)
+                self.counts["deduped"] += 1
+                return
+            tmp = job.path.with_name(job.path.name + ".part")
+            try:
+                if not (job.path.exists() and os.path.samefile(self.out_dir / holder, job.path)):
+                    if tmp.exists():
+                        tmp.unlink()
+                    os.link(self.out_dir / holder, tmp)
+                    os.replace(tmp, job.path)
+                self.manifest.set(job.rel, entry)
+                self.counts["deduped"] += 1
+                return
+            except OSError:
+                pass  # lien physique impossible (FS, droits) : on écrit une copie normale
+
+        tmp = job.path.with_name(job.path.name + ".part")
+        tmp.write_bytes(body)
+        os.replace(tmp, job.path)
+        self.hashes.setdefault(digest, job.rel)
+        self.manifest.set(job.rel, entry)
+        self.counts["downloaded"] += 1
+
+    async def fetch(self, job: Job) -> None:
+        entry = self._known(job)
+        headers: Dict[str, str] = {}
+        if entry is not None and self._present(job.rel, entry):
+            if not self.revalidate:
+                self.counts["skipped"] += 1
+                return
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        elif job.rel not in self.manifest.files and job.path.exists():
+            self._adopt(job)
+            return
+
+        try:
+            status, body, resp_headers = await self.client.request(rebase(job.url, self.base_url), headers)
+        except Exception as e:
+            self.counts["failed"] += 1
+            self.failures.append(f"{job.rel} <- {job.url} : {e}")
+            return
+        if status == 304 and headers:
+            self.counts["unchanged"] += 1
+            self.client.metrics.source("revalidated")
+            return
+        if status != 200:
+            self.counts["failed"] += 1
+            self.failures.append(f"{job.rel} <- {job.url} : HTTP {status}")
+            return
+        self.client.metrics.source("network")
+        self.bytes += len(body)  # compté aussi quand le contenu s'avère identique
+        self._store(job, body, resp_headers)
+
+
+async def run(jobs: List[Job], args: argparse.Namespace, manifest: Manifest, out_dir: Path) -> Downloader:
+    cfg = ClientConfig(
+        timeout=60,
+        max_concurrency=max(1, args.concurrency),
+        user_agent="ptu-data-sprites/1.0",
+        metrics=metrics_from_args(args),
+        **throttle_kwargs(args),
+    )
+    async with PokeApiClient(cfg) as client:
+        dl = Downloader(client, manifest, out_dir, args.base_url, not args.no_revalidate, args.dedupe)
+        done = 0
+
+        async def one(job: Job) -> None:
+            nonlocal done
+            await dl.fetch(job)
+            done += 1
+            if done % 50 == 0:
+                print(f"[info] {done}/{len(jobs)}", file=sys.stderr)
+
+        # même fichier de sortie demandé deux fois : le dernier l'emporte, comme avant
+        unique = list({job.rel: job for job in jobs}.values())
+        await asyncio.gather(*(one(job) for job in unique))
+    return dl
+
+
+def print_report(dl: Downloader, total: int, elapsed: float) -> None:
+    c = dl.counts
+    mb = dl.bytes / 1e6
+    print(f"[done] {total} fichiers en {elapsed:.1f}s | téléchargés {c['downloaded']} | dédupliqués {c['deduped']} | "
+          f"inchangés {c['unchanged']} | sautés {c['skipped']} | adoptés {c['adopted']} | échecs {c['failed']}")
+    fetched = c["downloaded"] + c["deduped"] + c["unchanged"]
+    print(f"[done] {mb:.1f} Mo reçus | {fetched / elapsed if elapsed else 0:.1f} fichiers/s | "
+          f"{mb / elapsed if elapsed else 0:.2f} Mo/s | {dl.client.requests} requêtes, {dl.client.retries} retries")
+    for line in dl.failures:
+        print(f"✗ {line}")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Téléchargement des sprites (manifeste, requêtes conditionnelles, dédup).")
+    p.add_argument("--csv", default=CSV_FILE, help=f"CSV numero,espece,front_sprite,back_sprite,mini_sprite (défaut: {CSV_FILE}).")
+    p.add_argument("--out-dir", default=OUTPUT_DIR, help=f"Dossier de sortie (défaut: {OUTPUT_DIR}).")
+    p.add_argument("--manifest", default=None, help=f"Manifeste JSON (défaut: <out-dir>/{MANIFEST_NAME}).")
+    p.add_argument("--concurrency", type=int, default=MAX_WORKERS, help=f"Téléchargements simultanés max (défaut: {MAX_WORKERS}).")
+    p.add_argument("--no-revalidate", action="store_true",
+                   help="Ne pas interroger le serveur pour les fichiers déjà au manifeste (reprise pure).")
+    p.add_argument("--dedupe", choices=("hardlink", "reference", "off"), default="hardlink",
+                   help="Images identiques : lien physique (défaut), référence au manifeste sans copie, ou copies.")
+    p.add_argument("--base-url", default=None, help="Servir toutes les URLs depuis cet hôte (serveur local de test).")
+    add_throttle_args(p)
+    add_metrics_args(p)
+    args = p.parse_args()
+
+    out_dir = Path(args.out_dir)
+    for _, folder in COLUMNS:
+        (out_dir / folder).mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(Path(args.manifest) if args.manifest else out_dir / MANIFEST_NAME)
+
+    jobs = read_jobs(Path(args.csv), out_dir)
+    print(f"{len(jobs)} fichiers référencés ({len(manifest.files)} au manifeste)")
+
+    t0 = time.perf_counter()
+    try:
+        dl = asyncio.run(run(jobs, args, manifest, out_dir))
+    finally:
+        manifest.save()
+    print_report(dl, len(jobs), time.perf_counter() - t0)
+    print("Téléchargement terminé.")
 
-            ext = get_extension(url)
-
-            output_path = (
-                Path(OUTPUT_DIR)
-                / folder
-                / f"{num:03d}{ext}"
-            )
-
-            if output_path.exists():
-                continue
-
-            jobs.append((url, output_path))
-
-print(f"{len(jobs)} fichiers à télécharger")
-
-
-with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-    futures = [
-        executor.submit(download_file, url, path)
-        for url, path in jobs
-    ]
-
-    completed = 0
-
-    for future in as_completed(futures):
-        completed += 1
-
-        if completed % 50 == 0:
-            print(f"{completed}/{len(jobs)}")
-
-        print(future.result())
 
-print("Téléchargement terminé.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,10 @@ Pragmatic per-page Base Stats injector:
     (Case-insensitive; accepts "Attack"/"Defense", "SpA"/"SpD", optional dots/spaces.)
   * Ignore any "Total" numbers.
 
-- If text extraction returns nothing, fall back to OCR (PyMuPDF + Tesseract).
+- Pages whose text layer gives no name + stats (every page if extraction returns nothing)
+  are OCR'd (PyMuPDF + Tesseract): rendered in grayscale, cropped to the name band and the
+  stats region, passed to Tesseract in memory, in a process pool (--jobs). OCR results are
+  cached per page content hash (pdf_text_cache), so an unchanged page is never OCR'd twice.
 
 Usage:
   python inject_base_stats_from_pdf_pages.py \
@@ -21,7 +24,7 @@ Usage:
     --pokedex-out pokedex.out.json \
     [--mapping name_map.csv] \
     [--dpi 200] \
-    [--force-ocr] \
+    [--force-ocr | --no-ocr] [--ocr-full-page] [--jobs N] \
     [--debug]
 
 Requires:
@@ -29,11 +32,17 @@ Requires:
   and Tesseract OCR installed & in PATH (Windows build: https://github.com/UB-Mannheim/tesseract/wiki)
 """
 
-import argparse, csv, json, re, sys, unicodedata
+import argparse, csv, hashlib, json, re, sys, unicodedata
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import pytesseract
+from pdf_pages import add_jobs_args, resolve_jobs
+from pdf_engines import add_engine_args, extract_document
+from pdf_text_cache import PageTextCache, add_page_cache_args, module_versions, page_cache_from_args
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+TEXT_ENGINES = ["pdfminer", "pypdf2"]
+
 def normalize(s: str) -> str:
     # Normalize unicode & spaces
     s = unicodedata.normalize("NFKC", s)
@@ -43,68 +52,111 @@ def normalize(s: str) -> str:
     s = re.sub(r"[ \t]+", " ", s)
     return s
 
-def text_from_pdf(pdf_path: Path) -> List[str]:
-    """Return list of page texts using pdfminer/PyPDF2 (no OCR)."""
-    pages: List[str] = []
-    # Try pdfminer first
-    try:
-        from pdfminer.high_level import extract_text_to_fp
-        from pdfminer.layout import LAParams
-        import io
-        with open(pdf_path, "rb") as f:
-            output = io.StringIO()
-            extract_text_to_fp(f, output, laparams=LAParams(), output_type="text", codec=None)
-            whole = output.getvalue()
-        # Split by form feed if present, else naive split on '\f'
-        parts = whole.split("\f")
-        if len(parts) > 1:
-            pages = parts
-        else:
-            pages = [whole]
-        return [normalize(p) for p in pages]
-    except Exception as e:
-        sys.stderr.write(f"[INFO] pdfminer failed ({e}); trying PyPDF2...\n")
-    # PyPDF2 fallback
+def text_from_pdf(pdf_path: Path, cache: Optional[PageTextCache] = None,
+                  engines: List[str] = TEXT_ENGINES) -> List[str]:
+    """Return list of page texts from the first working text engine (no OCR), via the page-text cache."""
     try:
-        import PyPDF2
-        with open(pdf_path, "rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            for pg in reader.pages:
-                try:
-                    txt = pg.extract_text() or ""
-                except Exception as e2:
-                    sys.stderr.write(f"[WARN] PyPDF2 page error: {e2}\n")
-                    txt = ""
-                pages.append(normalize(txt))
-    except Exception as e:
-        sys.stderr.write(f"[INFO] PyPDF2 failed ({e}).\n")
-    return pages
+        _, pages = extract_document(pdf_path, engines, cache)
+    except RuntimeError as e:
+        sys.stderr.write(f"[INFO] {e}\n")
+        return []
+    return [normalize(p) for p in pages]
+
+# --- OCR (only pages whose text layer does not parse) ---
+OCR_ENGINE = "tesseract"
+OCR_LANG = "eng"
+NAME_BAND = 0.12   # top fraction of the page OCR'd for the species name when the capture is cropped
+STAT_LABELS = ("HP", "ATK", "DEF", "SPD", "Speed", "Attack", "Defense")
+
+def page_content_hash(doc, page) -> str:
+    """Hash of what is drawn on the page (content stream + images), independent of the rest of the PDF."""
+    h = hashlib.sha256(page.read_contents() or b"")
+    h.update(repr(tuple(page.rect)).encode())
+    for img in page.get_images(full=True):
+        h.update(doc.xref_stream_raw(img[0]) or b"")
+    return h.hexdigest()
+
+def ocr_clips(page, crop: bool) -> List[Tuple[float, float, float, float]]:
+    """
+    Regions to OCR, in page points. Cropped: the name band at the top plus the band holding the stat
+    labels of the text layer (full width, so the numbers next to them are kept); else the whole page.
+    """
+    r = page.rect
+    full = [(r.x0, r.y0, r.x1, r.y1)]
+    if not crop:
+        return full
+    hits = [h for label in STAT_LABELS for h in page.search_for(label)]
+    if len(hits) < 3:
+        return full
+    line = max(h.height for h in hits)
+    top = max(r.y0, min(h.y0 for h in hits) - 2 * line)
+    bottom = min(r.y1, max(h.y1 for h in hits) + 2 * line)
+    name_bottom = r.y0 + r.height * NAME_BAND
+    if top <= name_bottom:
+        return [(r.x0, r.y0, r.x1, bottom)]
+    return [(r.x0, r.y0, r.x1, name_bottom), (r.x0, top, r.x1, bottom)]
 
-def text_from_pdf_ocr(pdf_path: Path, dpi: int) -> List[str]:
-    """OCR each page with PyMuPDF + Tesseract."""
+_ocr_worker: Dict[str, object] = {}
+
+def _ocr_init(pdf_path: str) -> None:
+    import fitz  # PyMuPDF
+    _ocr_worker["doc"] = fitz.open(pdf_path)
+
+def _ocr_page(job: Tuple[int, List[Tuple[float, float, float, float]], int]) -> Tuple[int, str]:
+    """Render the clips as grayscale pixmaps and hand them to Tesseract in memory (no temp file)."""
+    import fitz  # PyMuPDF
+    from PIL import Image
+    index, clips, dpi = job
+    page = _ocr_worker["doc"][index]
+    mat = fitz.Matrix(dpi/72.0, dpi/72.0)
+    parts = []
+    for clip in clips:
+        pix = page.get_pixmap(matrix=mat, clip=fitz.Rect(*clip), alpha=False, colorspace=fitz.csGRAY)
+        img = Image.frombytes("L", (pix.width, pix.height), pix.samples, "raw", "L", pix.stride)
+        parts.append(pytesseract.image_to_string(img, lang=OCR_LANG))
+    return index, normalize("\n".join(parts))
+
+def ocr_pages(pdf_path: Path, indices: Optional[List[int]], dpi: int, jobs: int = 0, crop: bool = True,
+              cache: Optional[PageTextCache] = None) -> Dict[int, str]:
+    """OCR the given pages (0-based, None = all) in a process pool; results cached per page content hash."""
     try:
         import fitz  # PyMuPDF
     except Exception as e:
         raise RuntimeError("PyMuPDF (fitz) is required for OCR fallback. pip install pymupdf") from e
-    try:
-        import pytesseract
-    except Exception as e:
-        raise RuntimeError("pytesseract is required for OCR fallback. pip install pytesseract and install Tesseract OCR engine.") from e
 
     doc = fitz.open(str(pdf_path))
-    out: List[str] = []
-    for page in doc:
-        mat = fitz.Matrix(dpi/72.0, dpi/72.0)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        import tempfile, os
-        tmp_png = Path(tempfile.gettempdir()) / f"_ocr_{os.getpid()}_{page.number+1}.png"
-        pix.save(str(tmp_png))
-        txt = pytesseract.image_to_string(str(tmp_png), lang="eng")
-        try:
-            tmp_png.unlink(missing_ok=True)
-        except Exception:
-            pass
-        out.append(normalize(txt))
+    versions = module_versions("fitz", "pytesseract")
+    out: Dict[int, str] = {}
+    todo = []
+    keys: Dict[int, Tuple[str, dict]] = {}
+    for i in (range(doc.page_count) if indices is None else indices):
+        if i >= doc.page_count:
+            continue
+        page = doc[i]
+        clips = ocr_clips(page, crop)
+        if cache is not None:
+            key = f"page:{page_content_hash(doc, page)}"
+            opts = {"dpi": dpi, "lang": OCR_LANG, "clips": [[round(v, 1) for v in c] for c in clips], **versions}
+            hit = cache.get_many(key, OCR_ENGINE, opts, [0])
+            if 0 in hit:
+                out[i] = hit[0]
+                continue
+            keys[i] = (key, opts)
+        todo.append((i, clips, dpi))
+    doc.close()
+    if len(out):
+        sys.stderr.write(f"[INFO] OCR: {len(out)} page(s) from cache.\n")
+    if not todo:
+        return out
+
+    jobs = min(resolve_jobs(jobs), len(todo))
+    sys.stderr.write(f"[INFO] OCR: {len(todo)} page(s) with {jobs} process(es).\n")
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_ocr_init, initargs=(str(pdf_path),)) as ex:
+        for i, txt in ex.map(_ocr_page, todo):
+            out[i] = txt
+            if cache is not None:
+                key, opts = keys[i]
+                cache.put_many(key, OCR_ENGINE, opts, [(0, txt)])
     return out
 
 # Pragmatic patterns
@@ -196,20 +248,36 @@ def main():
     ap.add_argument("--mapping", default=None, help="Optional CSV pdf_name,species")
     ap.add_argument("--dpi", type=int, default=200, help="OCR DPI (default 200)")
     ap.add_argument("--force-ocr", action="store_true", help="Use OCR for all pages")
+    ap.add_argument("--no-ocr", action="store_true", help="Never OCR (text layer only)")
+    ap.add_argument("--ocr-full-page", action="store_true",
+                    help="OCR the whole page instead of the name band + stats region")
     ap.add_argument("--debug", action="store_true", help="Print per-page parsing diagnostics")
+    add_jobs_args(ap)
+    add_engine_args(ap, TEXT_ENGINES)
+    add_page_cache_args(ap)
     args = ap.parse_args()
 
     pdf_path = Path(args.pdf)
     mapping = load_mapping_csv(Path(args.mapping) if args.mapping else None)
 
-    pages = []
-    if args.force_ocr:
-        pages = text_from_pdf_ocr(pdf_path, args.dpi)
-    else:
-        pages = text_from_pdf(pdf_path)
+    cache = page_cache_from_args(args)
+    pages = [] if args.force_ocr else text_from_pdf(pdf_path, cache, args.engine)
+    ocr_used = 0
+    if not args.no_ocr:
+        # OCR only the pages whose text layer gives no name + stats (all of them if it is empty)
+        failed = [i for i, t in enumerate(pages) if not (first_nonempty_line(t or "") and parse_page_stats(t or ""))]
         if not any(p.strip() for p in pages):
-            sys.stderr.write("[INFO] Text extractor empty; falling back to OCR.\n")
-            pages = text_from_pdf_ocr(pdf_path, args.dpi)
+            if not args.force_ocr:
+                sys.stderr.write("[INFO] Text extractor empty; falling back to OCR.\n")
+            failed = None
+        if failed is None or failed:
+            ocr = ocr_pages(pdf_path, failed, args.dpi, args.jobs, not args.ocr_full_page, cache)
+            if ocr:
+                pages += [""] * (max(ocr) + 1 - len(pages))
+            for i, txt in sorted(ocr.items()):
+                if failed is None or (first_nonempty_line(txt) and parse_page_stats(txt)):
+                    pages[i] = txt
+                    ocr_used += 1
 
     with open(args.pokedex_in, "r", encoding="utf-8") as f:
         pokedex = json.load(f)
@@ -238,6 +306,7 @@ def main():
 
     print(json.dumps({
         "pages_seen": len(pages),
+        "pages_ocr": ocr_used,
         "species_updated": updated,
         "pages_missed": missed
     }, ensure_ascii=False, indent=2))
@@ -23,34 +23,47 @@ import re
 import sys
 import time
 import unicodedata
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 try:
     import requests
 except ImportError as exc:
     raise SystemExit("Requires 'requests' (pip install requests)") from exc
 
+# Index des moves partagé avec les scripts py/pokeapi (pokeapi_moves.idx)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "pokeapi"))
+from pokeapi_moves import MoveIndex, add_move_index_args, move_index_from_args  # noqa: E402
+from pdf_engines import DEFAULT_CHAIN, add_engine_args, extract_document  # noqa: E402
+from pdf_text_cache import PageTextCache, add_page_cache_args, page_cache_from_args  # noqa: E402
+
 
 SECTION_MOVE_RE = re.compile(r"^\s*§\s*(\d+)\s+(.+?)\s*-\s*([A-Za-z][A-Za-z ]*)\s*$")
+HSPACE_RE = re.compile(r"[\t ]+")
+NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+SPACES_RE = re.compile(r"\s+")
+FORM_WORD_RE = re.compile(r"\bforme?\b")
+DEX_NUMBER_PREFIX_RE = re.compile(r"^\s*#?\d{1,4}\s*[-.:)]?\s*")
 
 
 def normalize_spaces(value: str) -> str:
     value = unicodedata.normalize("NFKC", value)
     value = value.replace("\u00A0", " ")
-    value = re.sub(r"[\t ]+", " ", value)
+    value = HSPACE_RE.sub(" ", value)
     return value.strip()
 
 
 def normalize_name_key(value: str) -> str:
-    value = unicodedata.normalize("NFKD", value)
-    value = "".join(ch for ch in value if not unicodedata.combining(ch))
-    value = value.replace("♀", " female ").replace("♂", " male ")
+    if not value.isascii():  # ASCII: NFKD and accent stripping change nothing
+        value = unicodedata.normalize("NFKD", value)
+        value = "".join(ch for ch in value if not unicodedata.combining(ch))
+        value = value.replace("♀", " female ").replace("♂", " male ")
     value = value.lower()
-    value = re.sub(r"[^a-z0-9]+", " ", value)
-    value = re.sub(r"\s+", " ", value).strip()
+    value = NON_ALNUM_RE.sub(" ", value)
+    value = SPACES_RE.sub(" ", value).strip()
     return value
 
 
@@ -96,30 +109,12 @@ def http_get_json(session: requests.Session, url: str, tries: int = 3, backoff:
     return None
 
 
-def extract_pdf_pages_text(pdf_path: Path) -> List[str]:
-    # Try PyMuPDF first.
-    try:
-        import fitz  # type: ignore
-
-        doc = fitz.open(str(pdf_path))
-        pages = [normalize_spaces(page.get_text("text") or "") for page in doc]
-        if any(page for page in pages):
-            return pages
-    except Exception as exc:  # noqa: BLE001
-        sys.stderr.write(f"[INFO] PyMuPDF extraction failed: {exc}\n")
-
-    # Fallback: PyPDF2.
-    try:
-        import PyPDF2  # type: ignore
-
-        pages = []
-        with pdf_path.open("rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            for page in reader.pages:
-                pages.append(normalize_spaces(page.extract_text() or ""))
-        return pages
-    except Exception as exc:  # noqa: BLE001
-        raise RuntimeError(f"Unable to extract text from PDF: {exc}") from exc
+def extract_pdf_pages_text(pdf_path: Path, cache: Optional[PageTextCache] = None,
+                           engines: Sequence[str] = DEFAULT_CHAIN) -> List[str]:
+    # First engine of the chain that yields text (PyMuPDF, then PyPDF2 by default).
+    engine, pages = extract_document(pdf_path, engines, cache)
+    sys.stderr.write(f"[INFO] PDF text extracted with {engine}\n")
+    return [normalize_spaces(page) for page in pages]
 
 
 @dataclass
@@ -152,8 +147,8 @@ def extract_entries_by_species(pokedex: Sequence[Dict[str, Any]]) -> Dict[str, L
 
 def normalize_form_key(value: str) -> str:
     base = normalize_name_key(value)
-    base = re.sub(r"\bforme?\b", "", base)
-    base = re.sub(r"\s+", " ", base).strip()
+    base = FORM_WORD_RE.sub("", base)
+    base = SPACES_RE.sub(" ", base).strip()
     return base
 
 
@@ -163,7 +158,7 @@ def line_to_species_candidate(line: str) -> List[str]:
         return []
 
     variants = [src]
-    variants.append(re.sub(r"^\s*#?\d{1,4}\s*[-.:)]?\s*", "", src))
+    variants.append(DEX_NUMBER_PREFIX_RE.sub("", src))
 
     splitters = [" - ", " (", " [", " | "]
     extra_variants: List[str] = []
@@ -181,51 +176,129 @@ def line_to_species_candidate(line: str) -> List[str]:
     return out
 
 
+class KeywordAutomaton:
+    """
+    Automate d'Aho-Corasick sur des clés normalisées : toutes les clés présentes comme sous-chaîne
+    d'un texte en un seul parcours linéaire (remplace les tests `clé in ligne` clé par clé).
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.out: List[Tuple[str, ...]] = [()]
+        for key in dict.fromkeys(k for k in keys if k):
+            state = 0
+            for ch in key:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.out.append(())
+                state = nxt
+            self.out[state] += (key,)
+
+        # Liens d'échec (parcours en largeur) ; chaque état hérite des clés de son suffixe le plus long.
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] += self.out[self.fail[nxt]]
+
+    def find(self, text: str) -> Set[str]:
+        """Clés présentes dans text."""
+        goto, fail, out = self.goto, self.fail, self.out
+        found: Set[str] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    def find_lines(self, texts: Sequence[str]) -> List[Set[str]]:
+        """Clés présentes dans chaque texte (une correspondance ne chevauche jamais deux lignes)."""
+        return [self.find(text) for text in texts]
+
+
+@dataclass
+class FormAutomata:
+    forms: List[Tuple[str, str, str]]  # (forme, normalize_name_key, normalize_form_key), ordre du pokédex = priorité
+    full: KeywordAutomaton
+    compact: KeywordAutomaton
+
+
+def build_form_automata(entries_for_species: Sequence[Dict[str, Any]]) -> FormAutomata:
+    forms: List[str] = []
+    for entry in entries_for_species:
+        form = entry.get("Form")
+        if isinstance(form, str) and form.strip() and form not in forms:
+            forms.append(form)
+    keyed = [(form, normalize_name_key(form), normalize_form_key(form)) for form in forms]
+    return FormAutomata(
+        forms=keyed,
+        full=KeywordAutomaton(full for _, full, _ in keyed),
+        compact=KeywordAutomaton(compact for _, _, compact in keyed),
+    )
+
+
 def detect_species_on_page(
     lines: Sequence[str],
     species_map: Dict[str, str],
     fallback_species: Optional[str] = None,
+    automaton: Optional[KeywordAutomaton] = None,
 ) -> Optional[str]:
+    # automaton : KeywordAutomaton(species_map), construit une fois par l'appelant pour tout le PDF.
+    if automaton is None:
+        automaton = KeywordAutomaton(species_map)
     # We prioritize early lines where headings usually appear.
     for line in lines[:30]:
-        candidates = line_to_species_candidate(line)
-        for candidate in candidates:
+        # Every candidate of a line is a substring of its normalized key: lines where the automaton
+        # finds no species key cannot match and skip the candidate variants.
+        if not automaton.find(normalize_name_key(normalize_spaces(line))):
+            continue
+        for candidate in line_to_species_candidate(line):
             if candidate in species_map:
                 return species_map[candidate]
     return fallback_species
 
 
-def detect_form_on_page(lines: Sequence[str], entries_for_species: Sequence[Dict[str, Any]]) -> Optional[str]:
+def detect_form_on_page(
+    lines: Sequence[str],
+    entries_for_species: Sequence[Dict[str, Any]],
+    automata: Optional[FormAutomata] = None,
+) -> Optional[str]:
     if not entries_for_species:
         return None
+    if automata is None:
+        automata = build_form_automata(entries_for_species)
 
-    header_keys = [normalize_name_key(line) for line in lines[:6]]
-    header_form_keys = [normalize_form_key(line) for line in lines[:6]]
     line_keys = [normalize_name_key(line) for line in lines[:40]]
-
-    form_candidates: List[str] = []
-    for entry in entries_for_species:
-        form = entry.get("Form")
-        if isinstance(form, str) and form.strip() and form not in form_candidates:
-            form_candidates.append(form)
+    header_hits = set().union(*automata.full.find_lines(line_keys[:6]))
 
     # 1) Strong match in header lines with full form label.
-    for form in form_candidates:
-        form_key = normalize_name_key(form)
-        if any(form_key and form_key in hk for hk in header_keys):
+    for form, form_key, _ in automata.forms:
+        if form_key in header_hits:
             return form
 
     # 2) Header fallback with compact form key (without "form/forme").
     # This stays limited to headers to avoid matching words like "Normal" in move text.
-    for form in form_candidates:
-        compact_form_key = normalize_form_key(form)
-        if any(compact_form_key and compact_form_key in hfk for hfk in header_form_keys):
+    compact_hits = set().union(*automata.compact.find_lines([normalize_form_key(line) for line in lines[:6]]))
+    for form, _, compact_form_key in automata.forms:
+        if compact_form_key in compact_hits:
             return form
 
     # 3) Broad fallback with full form label only.
-    for form in form_candidates:
-        form_key = normalize_name_key(form)
-        if any(form_key and form_key in lk for lk in line_keys):
+    line_hits_all = header_hits.union(*automata.full.find_lines(line_keys[6:]))
+    for form, form_key, _ in automata.forms:
+        if form_key in line_hits_all:
             return form
 
     return None
@@ -240,18 +313,22 @@ def parse_section_lines_from_pdf_pages(
     warnings: List[str] = []
     last_species: Optional[str] = None
     last_form: Optional[str] = None
+    species_automaton = KeywordAutomaton(species_map)
+    form_automata: Dict[str, FormAutomata] = {}
 
     for idx, page_text in enumerate(pages, start=1):
-        lines = [normalize_spaces(line) for line in (page_text or "").splitlines() if normalize_spaces(line)]
+        lines = [line for line in map(normalize_spaces, (page_text or "").splitlines()) if line]
         if not lines:
             continue
 
-        species = detect_species_on_page(lines, species_map, last_species)
+        species = detect_species_on_page(lines, species_map, last_species, species_automaton)
         form: Optional[str] = None
         if species:
             entries_for_species = entries_by_species.get(species, [])
             if len(entries_for_species) > 1:
-                form = detect_form_on_page(lines, entries_for_species)
+                if species not in form_automata:
+                    form_automata[species] = build_form_automata(entries_for_species)
+                form = detect_form_on_page(lines, entries_for_species, form_automata[species])
                 if not form and last_species == species:
                     form = last_form
                 if not form:
@@ -283,9 +360,20 @@ def parse_section_lines_from_pdf_pages(
     return parsed, warnings
 
 
-def fetch_move_payloads(session: requests.Session, move_names: Sequence[str], workers: int) -> Dict[str, Dict[str, Any]]:
+def fetch_move_payloads(
+    session: requests.Session,
+    move_names: Sequence[str],
+    workers: int,
+    index: Optional[MoveIndex] = None,
+) -> Dict[str, Dict[str, Any]]:
     slugs = sorted({slugify_move_name(name) for name in move_names if slugify_move_name(name)})
     out: Dict[str, Dict[str, Any]] = {}
+    if index is not None:
+        for slug in slugs:
+            info = index.get(slug)
+            if info is not None:
+                out[slug] = info.payload()
+        slugs = [slug for slug in slugs if slug not in out]
 
     def fetch_one(slug: str) -> Tuple[str, Optional[Dict[str, Any]]]:
         data = http_get_json(session, f"https://pokeapi.co/api/v2/move/{slug}")
@@ -509,6 +597,9 @@ def main() -> None:
         default=8,
         help="Nombre de workers pour les appels PokeAPI.",
     )
+    add_move_index_args(parser)
+    add_engine_args(parser)
+    add_page_cache_args(parser)
     args = parser.parse_args()
 
     pdf_path = Path(args.pdf)
@@ -529,11 +620,16 @@ def main() -> None:
     species_map = extract_species_map(pokedex)
     entries_by_species = extract_entries_by_species(pokedex)
 
-    pages = extract_pdf_pages_text(pdf_path)
+    pages = extract_pdf_pages_text(pdf_path, page_cache_from_args(args), args.engine)
     parsed_moves, parse_warnings = parse_section_lines_from_pdf_pages(pages, species_map, entries_by_species)
 
     session = make_session()
-    move_payloads = fetch_move_payloads(session, [m.move_pdf_name for m in parsed_moves], workers=args.workers)
+    move_payloads = fetch_move_payloads(
+        session,
+        [m.move_pdf_name for m in parsed_moves],
+        workers=args.workers,
+        index=move_index_from_args(args),
+    )
 
     inject_summary = inject_moves(pokedex, parsed_moves, move_payloads)
 
@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pdf_engines.py
+--------------
+Moteurs d'extraction du texte des PDF, derrière une interface commune, pour tous les scripts d'ingestion :
+extract.py / extract9g.py (page par page, pdf_pages), inject_section_moves_from_playtest_pdf.py,
+inject_base_stats_from_pdf_pages.py et les scrapers pdfplumber de moves/talents.
+
+Moteurs (ENGINES) : pymupdf (fitz), pypdf2, pdfminer, pdfplumber, pdfplumber-2col (deux demi-pages)
+et tesseract (OCR pleine page, PyMuPDF + pytesseract). Chaque moteur donne le texte brut ; la
+normalisation reste propre à chaque script. Les options du moteur (versions des bibliothèques,
+paramètres) font partie de la clé du cache pdf_text_cache.
+
+Chaîne de repli : extract_document(pdf, ["pymupdf", "pypdf2"], cache) rend le premier moteur
+disponible qui réussit et trouve du texte (sinon le dernier résultat obtenu).
+
+Benchmark : chaque moteur tourne seul dans un processus neuf (pages/s, pic de RSS), puis le texte
+est parsé (extract.extract_page par défaut) et comparé champ par champ à un pokédex de référence :
+
+    python pdf_engines.py list
+    python pdf_engines.py bench --pdf "../1-6G Pokedex_Playtest105Plus.pdf" \\
+        --golden ../../ptu/data/pokedex/core/pokedex_core.min.json --pages 12 60
+    python pdf_engines.py bench --pdf dex9g.pdf --parser extract9g:extract_page --engines pypdf2 pymupdf
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import logging
+import multiprocessing
+import re
+import sys
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from pdf_text_cache import PageTextCache, cached_document, module_versions
+
+DEFAULT_CHAIN = ["pymupdf", "pypdf2"]
+DEFAULT_FIELDS = ["Base Stats", "Basic Information", "Capabilities", "Skills", "Moves"]
+
+
+class PdfEngine(ABC):
+    """
+    Interface d'un moteur : open() rend un document (propre au processus), page_text() le texte d'une page.
+    document() extrait tout le PDF ; les moteurs qui savent faire mieux en un seul passage la surchargent.
+    """
+
+    name = ""
+    modules: Tuple[str, ...] = ()
+
+    def available(self) -> bool:
+        return all(v is not None for v in module_versions(*self.modules).values())
+
+    def options(self) -> Dict[str, Any]:
+        return module_versions(*self.modules)
+
+    @abstractmethod
+    def open(self, pdf_path: Path | str) -> Any:
+        ...
+
+    @abstractmethod
+    def page_count(self, doc: Any) -> int:
+        ...
+
+    @abstractmethod
+    def page_text(self, doc: Any, index: int) -> str:
+        ...
+
+    def close(self, doc: Any) -> None:
+        close = getattr(doc, "close", None)
+        if close is not None:
+            close()
+
+    def document(self, pdf_path: Path | str) -> List[str]:
+        doc = self.open(pdf_path)
+        try:
+            pages = []
+            for i in range(self.page_count(doc)):
+                try:
+                    pages.append(self.page_text(doc, i))
+                except Exception as e:  # noqa: BLE001
+                    print(f"[warn] {self.name} p{i}: {e}", file=sys.stderr)
+                    pages.append("")
+            return pages
+        finally:
+            self.close(doc)
+
+
+class PyPdf2Engine(PdfEngine):
+    name = "pypdf2"
+    modules = ("PyPDF2",)
+
+    def open(self, pdf_path: Path | str) -> Any:
+        import PyPDF2
+        return PyPDF2.PdfReader(str(pdf_path))
+
+    def page_count(self, doc: Any) -> int:
+        return len(doc.pages)
+
+    def page_text(self, doc: Any, index: int) -> str:
+        return doc.pages[index].extract_text() or ""
+
+    def close(self, doc: Any) -> None:
+        pass
+
+
+class PyMuPdfEngine(PdfEngine):
+    name = "pymupdf"
+    modules = ("fitz",)
+
+    def open(self, pdf_path: Path | str) -> Any:
+        import fitz
+        return fitz.open(str(pdf_path))
+
+    def page_count(self, doc: Any) -> int:
+        return len(doc)
+
+    def page_text(self, doc: Any, index: int) -> str:
+        return doc[index].get_text("text") or ""
+
+
+class PdfMinerEngine(PdfEngine):
+    """Page par page : extract_text(page_numbers=[i]) ; document entier : un seul passage découpé sur \\f."""
+
+    name = "pdfminer"
+    modules = ("pdfminer",)
+
+    def open(self, pdf_path: Path | str) -> Any:
+        from pdfminer.pdfpage import PDFPage
+        with open(pdf_path, "rb") as f:
+            count = sum(1 for _ in PDFPage.get_pages(f))
+        return {"path": str(pdf_path), "pages": count}
+
+    def page_count(self, doc: Any) -> int:
+        return doc["pages"]
+
+    def page_text(self, doc: Any, index: int) -> str:
+        from pdfminer.high_level import extract_text
+        from pdfminer.layout import LAParams
+        return extract_text(doc["path"], page_numbers=[index], laparams=LAParams()) or ""
+
+    def close(self, doc: Any) -> None:
+        pass
+
+    def document(self, pdf_path: Path | str) -> List[str]:
+        import io
+        from pdfminer.high_level import extract_text_to_fp
+        from pdfminer.layout import LAParams
+        output = io.StringIO()
+        with open(pdf_path, "rb") as f:
+            extract_text_to_fp(f, output, laparams=LAParams(), output_type="text", codec=None)
+        parts = output.getvalue().split("\f")
+        if len(parts) > 1 and not parts[-1].strip():
+            parts.pop()  # pdfminer termine chaque page par \f
+        return parts
+
+
+class PdfPlumberEngine(PdfEngine):
+    """columns=2 : moitié gauche puis moitié droite de la page (page_columns les rend séparément)."""
+
+    modules = ("pdfplumber",)
+
+    def __init__(self, columns: int = 1):
+        self.columns = columns
+        self.name = "pdfplumber" if columns == 1 else f"pdfplumber-{columns}col"
+
+    def options(self) -> Dict[str, Any]:
+        return {"columns": self.columns, **module_versions(*self.modules)}
+
+    def open(self, pdf_path: Path | str) -> Any:
+        import pdfplumber
+        return pdfplumber.open(pdf_path)
+
+    def page_count(self, doc: Any) -> int:
+        return len(doc.pages)
+
+    def page_columns(self, doc: Any, index: int) -> List[Optional[str]]:
+        page = doc.pages[index]
+        width, height = page.width, page.height
+        step = width / self.columns
+        return [page.within_bbox((step * c, 0, step * (c + 1), height)).extract_text() for c in range(self.columns)]
+
+    def page_text(self, doc: Any, index: int) -> str:
+        if self.columns == 1:
+            return doc.pages[index].extract_text() or ""
+        return "\n".join(c for c in self.page_columns(doc, index) if c)
+
+
+class TesseractEngine(PdfEngine):
+    """OCR pleine page : rendu PyMuPDF en niveaux de gris puis pytesseract (référence pour les PDF sans texte)."""
+
+    name = "tesseract"
+    modules = ("fitz", "pytesseract", "PIL")
+
+    def __init__(self, dpi: int = 200, lang: str = "eng"):
+        self.dpi = dpi
+        self.lang = lang
+
+    def options(self) -> Dict[str, Any]:
+        import pytesseract
+        try:
+            tesseract = str(pytesseract.get_tesseract_version())
+        except Exception:  # noqa: BLE001
+            tesseract = None
+        return {"dpi": self.dpi, "lang": self.lang, "tesseract": tesseract, **module_versions(*self.modules)}
+
+    def open(self, pdf_path: Path | str) -> Any:
+        import fitz
+        return fitz.open(str(pdf_path))
+
+    def page_count(self, doc: Any) -> int:
+        return len(doc)
+
+    def page_text(self, doc: Any, index: int) -> str:
+        import fitz
+        import pytesseract
+        from PIL import Image
+        pix = doc[index].get_pixmap(dpi=self.dpi, colorspace=fitz.csGRAY)
+        img = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+        return pytesseract.image_to_string(img, lang=self.lang) or ""
+
+
+ENGINES: Dict[str, PdfEngine] = {
+    e.name: e for e in (PyMuPdfEngine(), PyPdf2Engine(), PdfMinerEngine(), PdfPlumberEngine(),
+                        PdfPlumberEngine(columns=2), TesseractEngine())
+}
+
+
+def get_engine(name: str) -> PdfEngine:
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"moteur PDF inconnu : {name} (choix : {', '.join(ENGINES)})") from None
+
+
+# --- Extraction ----------------------------------------------------------------
+
+def engine_document(pdf_path: Path | str, engine: str, cache: Optional[PageTextCache] = None) -> List[str]:
+    """Texte brut de toutes les pages avec un moteur donné, via le cache."""
+    eng = get_engine(engine)
+    return cached_document(cache, pdf_path, eng.name, eng.options(), lambda: eng.document(pdf_path))
+
+
+def extract_document(pdf_path: Path | str, chain: Sequence[str] = DEFAULT_CHAIN,
+                     cache: Optional[PageTextCache] = None) -> Tuple[str, List[str]]:
+    """
+    (moteur retenu, texte brut des pages) : premier moteur de la chaîne disponible qui réussit avec
+    au moins une page non vide ; à défaut le dernier résultat obtenu. RuntimeError si tous échouent.
+    """
+    last: Optional[Tuple[str, List[str]]] = None
+    errors = []
+    for name in chain:
+        eng = get_engine(name)
+        if not eng.available():
+            errors.append(f"{name}: non installé")
+            continue
+        try:
+            pages = engine_document(pdf_path, name, cache)
+        except Exception as e:  # noqa: BLE001
+            print(f"[info] Extraction {name} en échec : {e}", file=sys.stderr)
+            errors.append(f"{name}: {e}")
+            continue
+        if any(p.strip() for p in pages):
+            return name, pages
+        print(f"[info] Extraction {name} : aucun texte", file=sys.stderr)
+        last = (name, pages)
+    if last is not None:
+        return last
+    raise RuntimeError(f"Impossible d'extraire le texte de {pdf_path} ({'; '.join(errors)})")
+
+
+def pdfplumber_pages(pdf_path: Path | str, cache: Optional[PageTextCache] = None) -> List[str]:
+    """Texte de chaque page via pdfplumber (scrapers de talents)."""
+    return engine_document(pdf_path, "pdfplumber", cache)
+
+
+def pdfplumber_columns(pdf_path: Path | str,
+                       cache: Optional[PageTextCache] = None) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    (moitié gauche, moitié droite) de chaque page via pdfplumber (scrapers de moves/talents en deux colonnes) ;
+    chaque script les assemble lui-même. Stocké en JSON [gauche, droite] dans le cache.
+    """
+    eng = ENGINES["pdfplumber-2col"]
+
+    def extract() -> List[str]:
+        doc = eng.open(pdf_path)
+        try:
+            return [json.dumps(eng.page_columns(doc, i), ensure_ascii=False) for i in range(eng.page_count(doc))]
+        finally:
+            eng.close(doc)
+
+    pages = cached_document(cache, pdf_path, "pdfplumber", eng.options(), extract)
+    return [tuple(json.loads(p)) for p in pages]
+
+
+# --- Benchmark ---------------------------------------------------------------------
+
+def peak_rss_mb() -> Optional[float]:
+    """Pic de mémoire résidente du processus courant (Mo), None si non mesurable."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024  # octets sur macOS, Ko ailleurs
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1 << 20)
+    except ImportError:
+        return None
+
+
+def _bench_engine(name: str, pdf_path: str, pages: Optional[Sequence[int]]) -> Dict[str, Any]:
+    """Exécuté dans un processus neuf : le pic de RSS ne mesure que ce moteur."""
+    eng = get_engine(name)
+    base = peak_rss_mb()
+    t0 = time.perf_counter()
+    doc = eng.open(pdf_path)
+    try:
+        indices = list(range(eng.page_count(doc))) if pages is None else list(pages)
+        texts = []
+        errors = 0
+        for i in indices:
+            try:
+                texts.append(eng.page_text(doc, i))
+            except Exception:  # noqa: BLE001
+                texts.append("")
+                errors += 1
+    finally:
+        eng.close(doc)
+    return {"engine": name, "pages": indices, "texts": texts, "errors": errors,
+            "seconds": time.perf_counter() - t0, "rss_base_mb": base, "rss_peak_mb": peak_rss_mb()}
+
+
+def load_parser(spec: str) -> Callable[[str, int], Any]:
+    """"module:fonction" importée depuis ce dossier (parse(texte, index) -> fiche)."""
+    module, _, func = spec.partition(":")
+    return getattr(importlib.import_module(module), func or "extract_page")
+
+
+def species_key(name: Any) -> str:
+    return re.sub(r"[^a-z0-9]+", "", str(name or "").casefold())
+
+
+def flatten_fields(value: Any, prefix: str = "") -> Dict[str, str]:
+    """Champs feuilles "Section.Clé" -> valeur normalisée (une liste compte pour un seul champ)."""
+    if isinstance(value, Mapping):
+        out: Dict[str, str] = {}
+        for k, v in value.items():
+            out.update(flatten_fields(v, f"{prefix}.{k}" if prefix else str(k)))
+        return out
+    return {prefix: json.dumps(value, ensure_ascii=False, sort_keys=True)}
+
+
+def field_accuracy(records: Iterable[Mapping[str, Any]], golden: Mapping[str, Mapping[str, Any]],
+                   expected: Iterable[str], fields: Sequence[str]) -> Dict[str, Any]:
+    """Part des champs de référence retrouvés à l'identique, pour les espèces attendues."""
+    parsed = {species_key(r.get("Species")): r for r in records if r and r.get("Species")}
+    total = matched = found = 0
+    worst: Dict[str, int] = {}
+    for key in expected:
+        ref = flatten_fields({f: golden[key][f] for f in fields if f in golden[key]})
+        rec = parsed.get(key)
+        found += rec is not None
+        got = flatten_fields({f: rec[f] for f in fields if f in rec}) if rec is not None else {}
+        for path, value in ref.items():
+            total += 1
+            if got.get(path) == value:
+                matched += 1
+            else:
+                section = path.split(".", 1)[0]
+                worst[section] = worst.get(section, 0) + 1
+    return {"species": found, "fields": total, "matched": matched,
+            "accuracy": matched / total if total else 0.0, "mismatches": worst}
+
+
+def run_bench(pdf_path: str, engines: Sequence[str], pages: Optional[Sequence[int]], golden_path: Optional[str],
+              parser: str, fields: Sequence[str]) -> List[Dict[str, Any]]:
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for name in engines:
+        if not get_engine(name).available():
+            print(f"[warn] {name} : bibliothèque absente, ignoré", file=sys.stderr)
+            continue
+        print(f"[info] {name}...", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+            try:
+                results.append(ex.submit(_bench_engine, name, pdf_path, pages).result())
+            except Exception as e:  # noqa: BLE001
+                print(f"[warn] {name} en échec : {e}", file=sys.stderr)
+    if not golden_path or not results:
+        return results
+
+    golden = {species_key(r.get("Species")): r for r in json.loads(Path(golden_path).read_text(encoding="utf-8"))
+              if isinstance(r, dict) and r.get("Species")}
+    parse = load_parser(parser)
+    logging.disable(logging.CRITICAL)  # diagnostics du parseur : inutiles ici, la précision les résume
+    try:
+        for res in results:
+            t0 = time.perf_counter()
+            res["records"] = [parse(t, i) for i, t in zip(res["pages"], res["texts"]) if t.strip()]
+            res["parse_seconds"] = time.perf_counter() - t0
+    finally:
+        logging.disable(logging.NOTSET)
+    # espèces attendues : celles de la référence qu'au moins un moteur trouve dans ces pages
+    expected = sorted({species_key(r.get("Species")) for res in results for r in res["records"] if r} & golden.keys())
+    for res in results:
+        res.update(field_accuracy(res["records"], golden, expected, fields))
+    return results
+
+
+def bench_table(results: Sequence[Mapping[str, Any]]) -> List[str]:
+    has_acc = any("accuracy" in r for r in results)
+    head = f"{'engine':<16} {'pages':>6} {'pages/s':>9} {'peak RSS':>10} {'errors':>6}"
+    if has_acc:
+        head += f" {'species':>8} {'fields':>13} {'accuracy':>9}"
+    lines = [head]
+    for r in results:
+        rate = len(r["pages"]) / r["seconds"] if r["seconds"] else 0.0
+        rss = f"{r['rss_peak_mb']:.0f} MB" if r.get("rss_peak_mb") is not None else "?"
+        line = f"{r['engine']:<16} {len(r['pages']):>6} {rate:>9.1f} {rss:>10} {r['errors']:>6}"
+        if has_acc:
+            line += f" {r['species']:>8} {r['matched']:>6}/{r['fields']:<6} {r['accuracy'] * 100:>8.1f}%"
+        lines.append(line)
+    return lines
+
+
+def pick_engine(results: Sequence[Mapping[str, Any]], tolerance: float) -> Optional[Mapping[str, Any]]:
+    """Le plus rapide parmi les moteurs à moins de tolerance de la meilleure précision."""
+    scored = [r for r in results if "accuracy" in r and r["fields"]]
+    if not scored:
+        return None
+    best = max(r["accuracy"] for r in scored)
+    ok = [r for r in scored if r["accuracy"] >= best - tolerance]
+    return min(ok, key=lambda r: r["seconds"] / max(1, len(r["pages"])))
+
+
+# --- Intégration CLI ----------------------------------------------------------
+
+def add_engine_args(p: argparse.ArgumentParser, default: Sequence[str] = DEFAULT_CHAIN) -> None:
+    p.add_argument("--engine", nargs="+", default=list(default), choices=list(ENGINES), metavar="ENGINE",
+                   help=f"Moteur(s) d'extraction du texte, essayés dans l'ordre (défaut: {' '.join(default)} ; "
+                        f"choix : {', '.join(ENGINES)}).")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Moteurs d'extraction du texte PDF : liste et benchmark.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="Moteurs connus et bibliothèques installées.")
+
+    b = sub.add_parser("bench", help="Débit, pic de RSS et précision du parsing de chaque moteur sur un PDF.")
+    b.add_argument("--pdf", required=True)
+    b.add_argument("--engines", nargs="+", default=[n for n in ENGINES if n != "tesseract"], choices=list(ENGINES),
+                   metavar="ENGINE", help="Moteurs à comparer (défaut: tous sauf tesseract).")
+    b.add_argument("--pages", nargs=2, type=int, metavar=("START", "END"), help="Pages [START, END) (défaut: toutes).")
+    b.add_argument("--golden", help="Pokédex JSON de référence (ex. pokedex_core.min.json) pour la précision.")
+    b.add_argument("--parser", default="extract:extract_page",
+                   help="Parseur module:fonction(texte, index) -> fiche (défaut: extract:extract_page).")
+    b.add_argument("--fields", nargs="+", default=DEFAULT_FIELDS,
+                   help=f"Sections comparées (défaut: {' '.join(DEFAULT_FIELDS)}).")
+    b.add_argument("--tolerance", type=float, default=0.0,
+                   help="Écart de précision accepté pour recommander un moteur plus rapide (défaut: 0).")
+    b.add_argument("--json", dest="json_out", help="Écrire aussi le rapport JSON ici.")
+
+    args = p.parse_args()
+    if args.cmd == "list":
+        for name, eng in ENGINES.items():
+            versions = ", ".join(f"{m} {v or 'absent'}" for m, v in module_versions(*eng.modules).items())
+            print(f"{name:<16} {'ok' if eng.available() else '--':<3} {versions}")
+        return
+
+    pages = list(range(*args.pages)) if args.pages else None
+    results = run_bench(args.pdf, args.engines, pages, args.golden, args.parser, args.fields)
+    if not results:
+        raise SystemExit("[ERR] Aucun moteur n'a pu être mesuré")
+    for line in bench_table(results):
+        print(line)
+    for r in results:
+        if r.get("mismatches"):
+            detail = ", ".join(f"{k} {v}" for k, v in sorted(r["mismatches"].items(), key=lambda kv: -kv[1]))
+            print(f"[info] {r['engine']} : champs différents par section : {detail}", file=sys.stderr)
+    choice = pick_engine(results, args.tolerance)
+    if choice is not None:
+        print(f"[ok] Moteur recommandé : {choice['engine']} ({choice['accuracy'] * 100:.1f}% des champs)",
+              file=sys.stderr)
+    if args.json_out:
+        report = [{**{k: v for k, v in r.items() if k not in ("texts", "records")}, "pages": len(r["pages"])}
+                  for r in results]
+        Path(args.json_out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[ok] Rapport écrit : {args.json_out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pdf_pages.py
+------------
+Extraction des pages d'un PDF en parallèle pour les parseurs du pokédex (extract.py, extract9g.py).
+
+Les pages sont découpées en blocs contigus répartis sur un pool de processus ; chaque worker ouvre
+son propre document avec le moteur choisi (pdf_engines, PyPDF2 par défaut ; un lecteur ne passe pas
+d'un processus à l'autre), extrait le texte puis appelle la fonction de parsing de la page (extract_page). Les résultats reviennent dans l'ordre
+des pages : la sortie est identique à la boucle séquentielle.
+
+Les messages logués pendant le parsing dans un worker sont capturés et ré-émis par le processus
+principal (replay_logs), page par page et dans l'ordre ; chaque page rapporte aussi ses durées
+(extraction du texte, parsing) pour timing_line / timing_summary.
+
+Avec un cache (pdf_text_cache), le texte des pages déjà extraites n'est pas relu dans le PDF :
+seul le parsing est refait, et les workers n'ouvrent le PDF que s'il reste des pages à extraire.
+
+    for res in extract_pages(pdf, None, extract_page, jobs=args.jobs, log_name=logger.name, cache=cache):
+        replay_logs(logger, res)
+        ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Container, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from pdf_engines import ENGINES, get_engine
+from pdf_text_cache import PageTextCache, file_sha256
+
+ParseFn = Callable[[str, int], Any]
+Task = Tuple[int, bool, Optional[str]]  # (page, à parser, texte en cache)
+
+DEFAULT_ENGINE = "pypdf2"
+CHUNKS_PER_JOB = 4  # plusieurs blocs par worker pour équilibrer les pages lentes
+FLUSH_EVERY = 64    # pages extraites écrites dans le cache par lots
+
+
+@dataclass
+class PageResult:
+    index: int
+    text: str = ""
+    record: Any = None              # parse(text, index), None si page vide / non parsée
+    error: Optional[str] = None     # échec de l'extraction du texte (message + trace)
+    cached: bool = False            # texte lu dans le cache
+    text_seconds: float = 0.0
+    parse_seconds: float = 0.0
+    logs: List[Tuple[int, str]] = field(default_factory=list)  # (niveau, message) capturés dans un worker
+
+
+def _count(pdf_path: str, engine: str) -> int:
+    eng = get_engine(engine)
+    doc = eng.open(pdf_path)
+    try:
+        return eng.page_count(doc)
+    finally:
+        eng.close(doc)
+
+
+def page_count(pdf_path: str, cache: Optional[PageTextCache] = None, engine: str = DEFAULT_ENGINE) -> int:
+    if cache is not None:
+        pdf = file_sha256(pdf_path)
+        n = cache.page_count(pdf)
+        if n is None:
+            n = _count(pdf_path, engine)
+            cache.set_page_count(pdf, n)
+        return n
+    return _count(pdf_path, engine)
+
+
+def resolve_jobs(jobs: int) -> int:
+    return jobs if jobs and jobs > 0 else (os.cpu_count() or 1)
+
+
+def _process_page(engine: str, reader: Callable[[], Any], task: Task, parse: Optional[ParseFn]) -> PageResult:
+    index, do_parse, text = task
+    res = PageResult(index)
+    t0 = time.perf_counter()
+    if text is not None:
+        res.text, res.cached = text, True
+    else:
+        try:
+            res.text = get_engine(engine).page_text(reader(), index)
+        except Exception as e:
+            res.error = f"{e}\n{traceback.format_exc().rstrip()}"
+    res.text_seconds = time.perf_counter() - t0
+    if res.error is None and parse is not None and do_parse and res.text.strip():
+        t0 = time.perf_counter()
+        res.record = parse(res.text, index)
+        res.parse_seconds = time.perf_counter() - t0
+    return res
+
+
+# --- Workers -----------------------------------------------------------------------
+
+class _Capture(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.setFormatter(logging.Formatter("%(message)s"))
+        self.records: List[Tuple[int, str]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append((record.levelno, self.format(record)))
+
+
+_worker: Dict[str, Any] = {}
+
+
+def _worker_reader() -> Any:
+    if "reader" not in _worker:
+        _worker["reader"] = get_engine(_worker["engine"]).open(_worker["pdf_path"])
+    return _worker["reader"]
+
+
+def _init_worker(pdf_path: str, engine: str, parse: Optional[ParseFn], log_name: Optional[str]) -> None:
+    _worker["pdf_path"] = pdf_path
+    _worker["engine"] = engine
+    _worker["parse"] = parse
+    capture = _Capture()
+    if log_name:
+        # remplace les handlers hérités (fork) : seul le processus principal écrit le log
+        lg = logging.getLogger(log_name)
+        lg.handlers = [capture]
+        lg.propagate = False
+    _worker["capture"] = capture
+
+
+def _run_chunk(chunk: Sequence[Task]) -> List[PageResult]:
+    capture: _Capture = _worker["capture"]
+    out = []
+    for task in chunk:
+        capture.records = []
+        res = _process_page(_worker["engine"], _worker_reader, task, _worker["parse"])
+        res.logs = capture.records
+        out.append(res)
+    return out
+
+
+def chunked(items: Sequence[Any], jobs: int) -> List[Sequence[Any]]:
+    size = max(1, math.ceil(len(items) / (jobs * CHUNKS_PER_JOB)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# --- API -----------------------------------------------------------------------------
+
+def extract_pages(pdf_path: str, pages: Optional[Iterable[int]] = None, parse: Optional[ParseFn] = None,
+                  jobs: int = 1, log_name: Optional[str] = None,
+                  parse_pages: Optional[Container[int]] = None,
+                  cache: Optional[PageTextCache] = None, engine: str = DEFAULT_ENGINE) -> Iterator[PageResult]:
+    """
+    Texte de chaque page (toutes si pages est None) et parse(texte, index) des pages non vides,
+    dans l'ordre de pages. parse doit être une fonction de module (sérialisable pour le pool) ;
+    parse_pages restreint le parsing à ces pages (les autres ne rendent que le texte) ;
+    engine est un nom de pdf_engines.ENGINES.
+    """
+    pdf = file_sha256(pdf_path) if cache is not None else None
+    opts = get_engine(engine).options() if cache is not None else None
+    pages = list(range(page_count(pdf_path, cache, engine)) if pages is None else pages)
+    cached = cache.get_many(pdf, engine, opts, pages) if cache is not None else {}
+    tasks: List[Task] = [(i, parse_pages is None or i in parse_pages, cached.get(i)) for i in pages]
+
+    pending: List[Tuple[int, str]] = []
+
+    def keep(res: PageResult) -> PageResult:
+        if cache is not None and not res.cached and res.error is None:
+            pending.append((res.index, res.text))
+            if len(pending) >= FLUSH_EVERY:
+                cache.put_many(pdf, engine, opts, pending)
+                pending.clear()
+        return res
+
+    jobs = min(resolve_jobs(jobs), len(tasks))
+    try:
+        if jobs <= 1:
+            reader: Dict[str, Any] = {}
+
+            def get_reader() -> Any:
+                if "reader" not in reader:
+                    reader["reader"] = get_engine(engine).open(pdf_path)
+                return reader["reader"]
+
+            for task in tasks:
+                yield keep(_process_page(engine, get_reader, task, parse))
+            return
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(str(pdf_path), engine, parse, log_name)) as ex:
+            for results in ex.map(_run_chunk, chunked(tasks, jobs)):
+                for res in results:
+                    yield keep(res)
+    finally:
+        if cache is not None and pending:
+            cache.put_many(pdf, engine, opts, pending)
+
+
+def replay_logs(logger: logging.Logger, res: PageResult) -> None:
+    for level, message in res.logs:
+        logger.log(level, message)
+
+
+def timing_line(res: PageResult) -> str:
+    source = " (cache)" if res.cached else ""
+    return f"[p{res.index}] text {res.text_seconds * 1000:.1f} ms{source}, parse {res.parse_seconds * 1000:.1f} ms"
+
+
+def timing_summary(results: Sequence[PageResult], wall: float, jobs: int, slowest: int = 5) -> List[str]:
+    text_s = sum(r.text_seconds for r in results)
+    parse_s = sum(r.parse_seconds for r in results)
+    cached = sum(r.cached for r in results)
+    lines = [f"{len(results)} pages in {wall:.1f}s with {jobs} job(s) ({len(results) / wall if wall else 0:.1f} pages/s); "
+             f"cumulated text {text_s:.1f}s ({cached} from cache), parse {parse_s:.1f}s"]
+    worst = sorted(results, key=lambda r: r.text_seconds + r.parse_seconds, reverse=True)[:slowest]
+    if worst:
+        lines.append("Slowest pages: " + ", ".join(
+            f"p{r.index} {(r.text_seconds + r.parse_seconds) * 1000:.0f} ms" for r in worst))
+    return lines
+
+
+def add_jobs_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--jobs", type=int, default=0,
+                   help="Processus d'extraction en parallèle (défaut: 0 = tous les cœurs ; 1 = séquentiel).")
+
+
+def add_page_engine_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--engine", default=DEFAULT_ENGINE, choices=list(ENGINES),
+                   help=f"Moteur d'extraction du texte des pages (défaut: {DEFAULT_ENGINE} ; "
+                        f"comparer avec pdf_engines.py bench).")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pdf_text_cache.py
+-----------------
+Cache disque partagé (SQLite) du texte extrait des pages PDF, pour tous les scripts d'ingestion :
+extract.py, extract9g.py, inject_section_moves_from_playtest_pdf.py, inject_base_stats_from_pdf_pages.py
+et les scrapers pdfplumber de moves/talents (py/ptu moves json*.py, py/ptu abilities *.py, py/abilities sumo.py).
+
+- Clé : (sha256 du PDF, page, moteur, options du moteur). Le contenu du fichier fait foi :
+  un PDF renommé ou déplacé reste en cache, un PDF modifié ne l'est plus.
+- Les options (JSON trié) contiennent tout ce qui change le texte : version de la bibliothèque,
+  DPI et langue de l'OCR, découpage en colonnes...
+- Texte compressé zlib ; le nombre de pages de chaque PDF est aussi gardé.
+
+Un document n'est marqué complet (document()) que lorsqu'une extraction de toutes ses pages a été stockée
+par put_document ; les extractions page à page (pdf_pages) passent par get_many / put_many.
+
+    cache = page_cache_from_args(args)            # None avec --no-text-cache
+    pages = cached_document(cache, pdf, "pdfplumber", {"columns": 2}, lambda: extraire(pdf))
+
+Les moteurs eux-mêmes (et pdfplumber_pages / pdfplumber_columns) sont dans pdf_engines.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+DEFAULT_TEXT_CACHE = Path(__file__).resolve().parent / "pdf_text_cache.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    pdf     TEXT NOT NULL,
+    page    INTEGER NOT NULL,
+    engine  TEXT NOT NULL,
+    options TEXT NOT NULL,
+    text    BLOB NOT NULL,
+    PRIMARY KEY (pdf, engine, options, page)
+);
+CREATE TABLE IF NOT EXISTS documents (
+    pdf       TEXT NOT NULL,
+    engine    TEXT NOT NULL,
+    options   TEXT NOT NULL,
+    pages     INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (pdf, engine, options)
+);
+CREATE TABLE IF NOT EXISTS files (
+    pdf   TEXT PRIMARY KEY,
+    pages INTEGER NOT NULL
+);
+"""
+
+_hashes: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_sha256(path: Path | str) -> str:
+    """sha256 du contenu (mémorisé par chemin, taille et date de modification pour le processus)."""
+    p = Path(path).resolve()
+    st = p.stat()
+    memo = (str(p), st.st_size, st.st_mtime_ns)
+    if memo not in _hashes:
+        h = hashlib.sha256()
+        with p.open("rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        _hashes[memo] = h.hexdigest()
+    return _hashes[memo]
+
+
+def module_versions(*modules: str) -> Dict[str, Optional[str]]:
+    """Versions des bibliothèques d'extraction (None si absente), à mettre dans les options du moteur."""
+    import importlib
+    out: Dict[str, Optional[str]] = {}
+    for name in modules:
+        try:
+            mod = importlib.import_module(name)
+        except Exception:
+            out[name] = None
+            continue
+        out[name] = str(getattr(mod, "__version__", None) or getattr(mod, "VersionBind", None) or "?")
+    return out
+
+
+def options_key(options: Optional[Mapping[str, Any]]) -> str:
+    return json.dumps(dict(options or {}), sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _pack(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def _unpack(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
+
+
+class PageTextCache:
+    def __init__(self, path: Path | str = DEFAULT_TEXT_CACHE):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    # --- pages ---------------------------------------------------------------
+
+    def get_many(self, pdf: str, engine: str, options: Optional[Mapping[str, Any]],
+                 pages: Iterable[int]) -> Dict[int, str]:
+        """{page: texte} des pages présentes en cache (pdf = file_sha256)."""
+        wanted = set(pages)
+        rows = self._db.execute(
+            "SELECT page, text FROM pages WHERE pdf = ? AND engine = ? AND options = ?",
+            (pdf, engine, options_key(options)),
+        ).fetchall()
+        found = {page: _unpack(text) for page, text in rows if page in wanted}
+        self.hits += len(found)
+        self.misses += len(wanted) - len(found)
+        return found
+
+    def put_many(self, pdf: str, engine: str, options: Optional[Mapping[str, Any]],
+                 items: Iterable[Tuple[int, str]]) -> None:
+        opts = options_key(options)
+        rows = [(pdf, page, engine, opts, _pack(text)) for page, text in items]
+        if not rows:
+            return
+        self._db.execute("BEGIN")
+        self._db.executemany("INSERT OR REPLACE INTO pages(pdf, page, engine, options, text) VALUES (?, ?, ?, ?, ?)", rows)
+        self._db.execute("COMMIT")
+
+    # --- documents entiers -------------------------------------------------------
+
+    def document(self, pdf: str, engine: str, options: Optional[Mapping[str, Any]] = None) -> Optional[List[str]]:
+        """Toutes les pages d'une extraction complète, None si elle n'a jamais été stockée."""
+        opts = options_key(options)
+        row = self._db.execute(
+            "SELECT pages FROM documents WHERE pdf = ? AND engine = ? AND options = ?", (pdf, engine, opts)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        found = self.get_many(pdf, engine, options, range(row[0]))
+        if len(found) != row[0]:
+            return None
+        return [found[i] for i in range(row[0])]
+
+    def put_document(self, pdf: str, engine: str, options: Optional[Mapping[str, Any]], pages: List[str]) -> None:
+        self.put_many(pdf, engine, options, enumerate(pages))
+        self._db.execute(
+            "INSERT OR REPLACE INTO documents(pdf, engine, options, pages, stored_at) VALUES (?, ?, ?, ?, ?)",
+            (pdf, engine, options_key(options), len(pages), time.time()),
+        )
+
+    # --- nombre de pages -------------------------------------------------------------
+
+    def page_count(self, pdf: str) -> Optional[int]:
+        row = self._db.execute("SELECT pages FROM files WHERE pdf = ?", (pdf,)).fetchone()
+        return row[0] if row else None
+
+    def set_page_count(self, pdf: str, pages: int) -> None:
+        self._db.execute("INSERT OR REPLACE INTO files(pdf, pages) VALUES (?, ?)", (pdf, pages))
+
+    def stats(self) -> Dict[str, Any]:
+        n = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {"pages": n, "bytes": os.path.getsize(self.path), "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "PageTextCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def cached_document(cache: Optional[PageTextCache], pdf_path: Path | str, engine: str,
+                    options: Optional[Mapping[str, Any]], extract: Callable[[], List[str]]) -> List[str]:
+    """Texte de toutes les pages : depuis le cache, sinon extract() puis stockage."""
+    if cache is None:
+        return extract()
+    pdf = file_sha256(pdf_path)
+    pages = cache.document(pdf, engine, options)
+    if pages is not None:
+        print(f"[info] Texte du PDF en cache ({engine}, {len(pages)} pages)", file=sys.stderr)
+        return pages
+    pages = extract()
+    cache.put_document(pdf, engine, options, pages)
+    cache.set_page_count(pdf, len(pages))
+    return pages
+
+
+# --- Intégration CLI ----------------------------------------------------------
+
+def add_page_cache_args(p: argparse.ArgumentParser) -> None:
+    g = p.add_argument_group("cache du texte PDF")
+    g.add_argument("--text-cache", default=str(DEFAULT_TEXT_CACHE),
+                   help=f"Base SQLite du texte extrait des pages (défaut: {DEFAULT_TEXT_CACHE.name}).")
+    g.add_argument("--no-text-cache", action="store_true", help="Toujours réextraire le texte du PDF.")
+
+
+def page_cache_from_args(args: argparse.Namespace) -> Optional[PageTextCache]:
+    if getattr(args, "no_text_cache", False):
+        return None
+    return PageTextCache(args.text_cache)
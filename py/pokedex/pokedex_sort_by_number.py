@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
-import json, csv, re, argparse, pathlib
+import json, csv, re, argparse, pathlib, sys
 from collections import OrderedDict
 
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "pokeapi"))
+from pokeapi_numbers import NumberIndex  # noqa: E402
+
 def normalize(s):
     return re.sub(r"\s+", " ", s.strip().lower())
 
@@ -40,10 +43,15 @@ def insert_after_species(e: OrderedDict, key: str, number_val):
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("-i","--input", required=True, help="JSON d'entrée (parser)")
-    ap.add_argument("-r","--ref", required=True, help="CSV référence Pokédex")
+    ap.add_argument("-r","--ref", required=False, help="CSV référence Pokédex")
+    ap.add_argument("-n","--number-index", required=False,
+                    help="Index des numéros (pokeapi_numbers.json, rempli par get_number_api.py) ; "
+                         "complète --ref, sans requête réseau")
     ap.add_argument("-o","--output", required=False, help="JSON de sortie")
     args = ap.parse_args()
 
+    if not args.ref and not args.number_index:
+        ap.error("--ref et/ou --number-index requis")
     if not args.output:
         args.output = args.input
 
@@ -51,7 +59,8 @@ def main():
     raw = pathlib.Path(args.input).read_text(encoding="utf-8")
     data = json.loads(raw, object_pairs_hook=OrderedDict)
 
-    ref = load_ref(args.ref)
+    ref = load_ref(args.ref) if args.ref else {}
+    numbers = NumberIndex.load(args.number_index) if args.number_index else None
 
     # Traiter chaque entrée
     out = []
@@ -61,6 +70,8 @@ def main():
 
         nm = normalize(e.get("Species", e.get("Specie", "")))
         number = ref.get(nm, None)  # None si non trouvé
+        if number is None and numbers is not None:
+            number = numbers.get(nm)
 
         if species_key:
             e = insert_after_species(e, species_key, number)
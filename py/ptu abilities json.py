@@ -1,25 +1,27 @@
-import pdfplumber
 import re
 import json
+import sys
+from pathlib import Path
+
+# Texte des pages via le cache partagé avec les scripts py/pokedex (pdf_text_cache.sqlite)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "pokedex"))
+from pdf_engines import pdfplumber_columns  # noqa: E402
+from pdf_text_cache import PageTextCache  # noqa: E402
 
 def extraire_blocs_abilities_colonnes(pdf_path):
     blocs_extraits = []
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            width = page.width
-            height = page.height
-
-            # Deux colonnes : gauche et droite
-            gauche = page.within_bbox((0, 0, width / 2, height)).extract_text()
-            droite = page.within_bbox((width / 2, 0, width, height)).extract_text()
+    # Deux colonnes : gauche et droite (cache partagé pdf_text_cache)
+    with PageTextCache() as cache:
+        colonnes = pdfplumber_columns(pdf_path, cache=cache)
 
-            texte = (gauche or "") + "\n" + (droite or "")
-            blocs = re.split(r'\n(?=Ability\s*:)', texte)
+    for gauche, droite in colonnes:
+        texte = (gauche or "") + "\n" + (droite or "")
+        blocs = re.split(r'\n(?=Ability\s*:)', texte)
 
-            for bloc in blocs:
-                if "Ability:" in bloc and "Effect:" in bloc:
-                    blocs_extraits.append(bloc.strip())
+        for bloc in blocs:
+            if "Ability:" in bloc and "Effect:" in bloc:
+                blocs_extraits.append(bloc.strip())
 
     return blocs_extraits
 
@@ -1,25 +1,28 @@
-import pdfplumber
 import re
 import json
+import sys
+from pathlib import Path
+
+# Texte des pages via le cache partagé avec les scripts py/pokedex (pdf_text_cache.sqlite)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "pokedex"))
+from pdf_engines import pdfplumber_columns  # noqa: E402
+from pdf_text_cache import PageTextCache  # noqa: E402
 
 def extraire_blocs_moves(pdf_path):
     blocs_moves = []
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            width = page.width
-            height = page.height
-
-            # Extraire les deux colonnes
-            gauche = page.within_bbox((0, 0, width / 2, height)).extract_text()
-            droite = page.within_bbox((width / 2, 0, width, height)).extract_text()
-            texte = (gauche or "") + "\n" + (droite or "")
-
-            # Regrouper par bloc commençant par "Move:"
-            blocs = re.split(r'\n(?=Move\s*:)', texte)
-            for bloc in blocs:
-                if "Move:" in bloc and "Effect:" in bloc:
-                    blocs_moves.append(bloc.strip())
+    # Extraire les deux colonnes (cache partagé pdf_text_cache)
+    with PageTextCache() as cache:
+        colonnes = pdfplumber_columns(pdf_path, cache=cache)
+
+    for gauche, droite in colonnes:
+        texte = (gauche or "") + "\n" + (droite or "")
+
+        # Regrouper par bloc commençant par "Move:"
+        blocs = re.split(r'\n(?=Move\s*:)', texte)
+        for bloc in blocs:
+            if "Move:" in bloc and "Effect:" in bloc:
+                blocs_moves.append(bloc.strip())
 
     return blocs_moves
 